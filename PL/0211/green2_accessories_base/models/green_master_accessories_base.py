@@ -94,19 +94,49 @@ class GreenMasterAccessoriesBase(models.Model):
                  'profiles_component_ids.total_cost')
     def _compute_accessories_totals(self):
         """Compute total costs for each accessory section"""
+        accessories_totals = self._get_accessories_totals()
         for record in self:
-            record.total_brackets_cost = sum(record.brackets_component_ids.mapped('total_cost'))
-            record.total_wires_connectors_cost = sum(record.wires_connectors_component_ids.mapped('total_cost'))
-            record.total_clamps_cost = sum(record.clamps_component_ids.mapped('total_cost'))
-            record.total_foundation_cost = sum(record.foundation_component_ids.mapped('total_cost'))
-            record.total_profiles_cost = sum(record.profiles_component_ids.mapped('total_cost'))
-            record.total_accessories_cost = (
-                record.total_brackets_cost + 
-                record.total_wires_connectors_cost + 
-                record.total_clamps_cost + 
-                record.total_foundation_cost + 
-                record.total_profiles_cost
+            record._apply_accessories_totals(accessories_totals[record.id])
+    
+    def _apply_accessories_totals(self, costs):
+        """Write the accessory cost fields from one project's ``_get_accessories_totals`` entry"""
+        self.ensure_one()
+        self.total_brackets_cost = costs.get('brackets', 0.0)
+        self.total_wires_connectors_cost = costs.get('wires_connectors', 0.0)
+        self.total_clamps_cost = costs.get('clamps', 0.0)
+        self.total_foundation_cost = costs.get('foundation', 0.0)
+        self.total_profiles_cost = costs.get('profiles', 0.0)
+        self.total_accessories_cost = (
+            self.total_brackets_cost + 
+            self.total_wires_connectors_cost + 
+            self.total_clamps_cost + 
+            self.total_foundation_cost + 
+            self.total_profiles_cost
+        )
+    
+    def _get_accessories_totals(self):
+        """Accessory cost per section for every project in ``self``: ``{project_id: {section: cost}}``.
+        
+        Saved projects are aggregated with one grouped query over accessories.component.line;
+        records being edited in a form are summed from their lines in memory.
+        """
+        totals = {record.id: {} for record in self}
+        stored = self.filtered(lambda r: not isinstance(r.id, models.NewId))
+        if stored:
+            groups = self.env['accessories.component.line'].read_group(
+                [('green_master_id', 'in', stored.ids)],
+                ['total_cost:sum'],
+                ['green_master_id', 'section'],
+                lazy=False,
             )
+            for group in groups:
+                totals[group['green_master_id'][0]][group['section']] = group['total_cost'] or 0.0
+        
+        for record in self - stored:
+            costs = totals[record.id]
+            for line in record.accessories_component_ids:
+                costs[line.section] = costs.get(line.section, 0.0) + line.total_cost
+        return totals
     
     def _calculate_all_accessories(self):
         """Base method for accessories calculation - to be extended by specific modules"""
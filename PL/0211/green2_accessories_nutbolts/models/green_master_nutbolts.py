@@ -28,9 +28,11 @@ class GreenMasterNutbolts(models.Model):
     @api.depends('nutbolts_component_ids.total_cost')
     def _compute_accessories_totals(self):
         super()._compute_accessories_totals()
-        for record in self:
-            record.total_nutbolts_cost = sum(record.nutbolts_component_ids.mapped('total_cost'))
-            record.total_accessories_cost += record.total_nutbolts_cost
+    
+    def _apply_accessories_totals(self, costs):
+        super()._apply_accessories_totals(costs)
+        self.total_nutbolts_cost = costs.get('nutbolts', 0.0)
+        self.total_accessories_cost += self.total_nutbolts_cost
     
     def _calculate_all_accessories(self):
         super()._calculate_all_accessories()
@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+"""Frame section calculator for the green2_base engine (no ORM access)"""
+from odoo.addons.green2_base.engine import component
+
+PARAM_FIELDS = ('no_anchor_frame_lines', 'thick_column')
+
+
+def column_counts(p):
+    """Return the column counts per type for a frame configuration"""
+    no_of_spans = p['no_of_spans']
+    no_of_bays = p['no_of_bays']
+    no_anchor_frame_lines = p['no_anchor_frame_lines']
+    thick_column = p['thick_column']
+
+    total_anchor_frames = no_anchor_frame_lines * no_of_spans
+
+    # Calculate middle and quadruple columns
+    no_middle_columns = 0
+    no_quadraple_columns = 0
+    if int(p['no_column_big_frame']) == 1:
+        no_middle_columns = total_anchor_frames
+    elif int(p['no_column_big_frame']) == 2:
+        no_quadraple_columns = total_anchor_frames * 2
+    elif int(p['no_column_big_frame']) == 3:
+        no_middle_columns = total_anchor_frames
+        no_quadraple_columns = total_anchor_frames * 2
+
+    # Calculate thick columns
+    no_thick_columns = 0
+    no_af_main_columns = 0
+    no_main_columns = 0
+
+    total_column_positions = (no_of_spans + 1) * (no_of_bays + 1)
+
+    if thick_column == '0':  # No thick columns
+        if no_anchor_frame_lines > 0:
+            no_af_main_columns = no_anchor_frame_lines * (no_of_spans + 1)
+        no_main_columns = total_column_positions - no_af_main_columns
+    elif thick_column == '1':  # 4 Corners
+        no_thick_columns = 4
+        if no_anchor_frame_lines == 1:
+            no_af_main_columns = (no_of_spans + 1) - 2
+        elif no_anchor_frame_lines >= 2:
+            no_af_main_columns = (2 * (no_of_spans + 1)) - 4
+        else:
+            no_af_main_columns = 0
+        no_main_columns = total_column_positions - no_af_main_columns - no_thick_columns
+    elif thick_column == '2':  # Both Bay Sides
+        no_thick_columns = (no_of_bays + 1) * 2
+        if no_anchor_frame_lines == 1:
+            no_af_main_columns = (no_of_spans + 1) - 2
+        elif no_anchor_frame_lines >= 2:
+            no_af_main_columns = (no_anchor_frame_lines * (no_of_spans + 1)) - 4
+        else:
+            no_af_main_columns = 0
+        no_main_columns = total_column_positions - no_af_main_columns - no_thick_columns
+    elif thick_column == '3':  # Both Span Sides
+        no_thick_columns = (no_of_spans + 1) * 2
+        if no_anchor_frame_lines > 2:
+            no_af_main_columns = (no_of_spans + 1) * (no_anchor_frame_lines - 2)
+        else:
+            no_af_main_columns = 0
+        no_main_columns = total_column_positions - no_af_main_columns - no_thick_columns
+    elif thick_column == '4':  # All 4 Sides
+        no_thick_columns = ((no_of_spans + 1) * 2) + ((no_of_bays - 1) * 2)
+        no_af_main_columns = 0
+        no_main_columns = total_column_positions - no_thick_columns
+
+    return {
+        'middle': no_middle_columns,
+        'quadruple': no_quadraple_columns,
+        'main': no_main_columns,
+        'af_main': no_af_main_columns,
+        'thick': no_thick_columns,
+    }
+
+
+def calculate(p):
+    """Calculate frame-specific components"""
+    specs = []
+    counts = column_counts(p)
+
+    # Column components
+    if counts['middle'] > 0:
+        specs.append(component('frame', 'Middle Columns', counts['middle'], p['top_ridge_height']))
+
+    if counts['quadruple'] > 0:
+        quadruple_column_length = p['column_height'] + ((p['top_ridge_height'] - p['column_height']) * 0.6)
+        specs.append(component('frame', 'Quadruple Columns', counts['quadruple'], quadruple_column_length))
+
+    if counts['main'] > 0:
+        specs.append(component('frame', 'Main Columns', counts['main'], p['column_height']))
+
+    if counts['af_main'] > 0:
+        specs.append(component('frame', 'AF Main Columns', counts['af_main'], p['column_height']))
+
+    if counts['thick'] > 0:
+        specs.append(component('frame', 'Thick Columns', counts['thick'], p['column_height']))
+
+    # Foundation components
+    if p['foundation_length'] > 0:
+        for key, name in (('main', 'Main Columns Foundations'),
+                          ('af_main', 'AF Main Columns Foundations'),
+                          ('middle', 'Middle Columns Foundations'),
+                          ('quadruple', 'Quadruple Columns Foundations'),
+                          ('thick', 'Thick Columns Foundations')):
+            if counts[key] > 0:
+                specs.append(component('frame', name, counts[key], p['foundation_length']))
+
+    return specs
@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+"""Lower section calculator for the green2_base engine (no ORM access)"""
+from odoo.addons.green2_base.engine import component, master_length
+
+PARAM_FIELDS = (
+    'front_back_c_c_cross_bracing_x', 'middle_c_c_cross_bracing_x',
+    'cross_bracing_column_arch', 'cross_bracing_column_bottom',
+    'bay_side_border_purlin', 'span_side_border_purlin',
+    'gutter_type', 'gutter_ippf_full', 'gutter_ippf_drainage_extension',
+    'gutter_funnel_ippf', 'gutter_end_cap', 'gutter_extension',
+)
+
+LENGTH_MASTER_FIELDS = (
+    'length_front_back_c_c_cross_bracing_x', 'length_middle_c_c_cross_bracing_x',
+    'length_cross_bracing_column_arch', 'length_cross_bracing_column_bottom',
+)
+
+
+def calculate(p):
+    """Calculate lower section-specific components"""
+    specs = []
+    no_of_spans = p['no_of_spans']
+    no_of_bays = p['no_of_bays']
+    bay_width = p['bay_width']
+    gutter_slope = int(p['gutter_slope'])
+    last_span_gutter = p['last_span_gutter']
+
+    # Cross Bracing calculations
+    no_front_back_c_c_cross_bracing_x = int(p['front_back_c_c_cross_bracing_x']) * (no_of_spans + 1) * 4
+    no_middle_c_c_cross_bracing_x = p['middle_c_c_cross_bracing_x'] * (no_of_spans + 1) * 2
+    no_cross_bracing_column_arch = int(p['cross_bracing_column_arch']) * (no_of_spans * 4)
+    no_cross_bracing_column_bottom = int(p['cross_bracing_column_bottom']) * (no_of_spans * 4)
+
+    # Border Purlin calculations
+    no_bay_side_border_purlin = int(p['bay_side_border_purlin']) * no_of_bays * 2
+    no_span_side_border_purlin = int(p['span_side_border_purlin']) * no_of_spans * (int(p['no_column_big_frame']) + 1) * 2
+
+    # Gutter calculations
+    no_gutter_ippf_full = 0
+    no_gutter_ippf_drainage_ext = 0
+    no_gutter_funnel_ippf_funnel = 0
+    no_gutter_end_cap = 0
+
+    no_gutters_continuous = 0
+    gutter_length_continuous = 0
+    gutter_purlin_length_continuous = 0
+    gutter_purlin_nos_continuous = 0
+    gutter_purlin_extension_nos = 0
+    gutter_purlin_extension_length = 0
+
+    gutter_lines = (no_of_spans + 1) if last_span_gutter else (no_of_spans - 1)
+
+    if p['gutter_type'] == 'ippf':
+        if p['gutter_ippf_full']:
+            no_gutter_ippf_full = gutter_lines * no_of_bays
+
+        if p['gutter_ippf_drainage_extension']:
+            no_gutter_ippf_drainage_ext = gutter_lines * gutter_slope
+
+        if p['gutter_funnel_ippf']:
+            no_gutter_funnel_ippf_funnel = gutter_lines * gutter_slope
+
+        if p['gutter_end_cap'] and p['gutter_funnel_ippf'] and gutter_slope == 1:
+            no_gutter_end_cap = gutter_lines
+
+    elif p['gutter_type'] == 'continuous':
+        no_gutters_continuous = no_of_spans - 1
+        gutter_length_continuous = p['span_length'] + int(p['gutter_extension'])
+        gutter_purlin_length_continuous = bay_width
+        gutter_purlin_nos_continuous = (no_of_spans - 1) * no_of_bays * 2
+        gutter_purlin_extension_nos = (no_of_spans - 1) * 4
+        gutter_purlin_extension_length = int(p['gutter_extension'])
+
+    # Cross Bracing components
+    for count, name, field_name, default_length in (
+            (no_front_back_c_c_cross_bracing_x, 'Front & Back Column to Column Cross Bracing X',
+             'length_front_back_c_c_cross_bracing_x', 2.5),
+            (no_middle_c_c_cross_bracing_x, 'Internal CC Cross Bracing X',
+             'length_middle_c_c_cross_bracing_x', 2.5),
+            (no_cross_bracing_column_arch, 'Cross Bracing Column to Arch',
+             'length_cross_bracing_column_arch', 2.0),
+            (no_cross_bracing_column_bottom, 'Cross Bracing Column to Bottom Chord',
+             'length_cross_bracing_column_bottom', 2.0)):
+        if count > 0:
+            length, master_id = master_length(p, field_name, default_length)
+            specs.append(component('lower', name, count, length, master_id))
+
+    # Border Purlin components
+    if no_bay_side_border_purlin > 0:
+        specs.append(component('lower', 'Bay Side Border Purlin', no_bay_side_border_purlin, bay_width))
+
+    if no_span_side_border_purlin > 0:
+        span_side_length = p['span_width'] / (int(p['no_column_big_frame']) + 1)
+        specs.append(component('lower', 'Span Side Border Purlin', no_span_side_border_purlin, span_side_length))
+
+    # Gutter components
+    if no_gutter_ippf_full > 0:
+        specs.append(component('lower', 'Gutter IPPF Full', no_gutter_ippf_full, bay_width + 0.04))
+
+    if no_gutter_funnel_ippf_funnel > 0:
+        specs.append(component('lower', 'Gutter Funnel IPPF', no_gutter_funnel_ippf_funnel, 0.5))
+
+    if no_gutter_ippf_drainage_ext > 0:
+        specs.append(component('lower', 'Gutter IPPF Drainage Extension', no_gutter_ippf_drainage_ext, 0.3))
+
+    if no_gutter_end_cap > 0:
+        specs.append(component('lower', 'Gutter End Cap', no_gutter_end_cap, 0.1))
+
+    if no_gutters_continuous > 0:
+        specs.append(component('lower', 'Gutter Continuous', no_gutters_continuous, gutter_length_continuous))
+
+    if gutter_purlin_nos_continuous > 0:
+        specs.append(component('lower', 'Gutter Purlin', gutter_purlin_nos_continuous, gutter_purlin_length_continuous))
+
+    if gutter_purlin_extension_nos > 0 and gutter_purlin_extension_length > 0:
+        specs.append(component('lower', 'Gutter Purlin For Extension',
+                               gutter_purlin_extension_nos, gutter_purlin_extension_length))
+
+    return specs
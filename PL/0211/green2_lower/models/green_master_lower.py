@@ -1,6 +1,8 @@
 from odoo import models, fields, api
 import logging
 
+from .. import engine as lower_engine
+
 _logger = logging.getLogger(__name__)
 
 class GreenMasterLower(models.Model):
@@ -219,178 +221,13 @@ class GreenMasterLower(models.Model):
             self.gutter_funnel_ippf = False
             self.gutter_end_cap = False
     
-    def _calculate_all_components(self):
+    def _get_engine_calculators(self):
         """Extend calculation to add lower section components"""
-        super()._calculate_all_components()
-        self._calculate_lower_components()
-    
-    def _calculate_lower_components(self):
-        """Calculate lower section-specific components"""
-        component_vals = []
-        
-        # Cross Bracing calculations
-        no_front_back_c_c_cross_bracing_x = int(self.front_back_c_c_cross_bracing_x) * (self.no_of_spans + 1) * 4
-        no_middle_c_c_cross_bracing_x = self.middle_c_c_cross_bracing_x * (self.no_of_spans + 1) * 2
-        no_cross_bracing_column_arch = int(self.cross_bracing_column_arch) * (self.no_of_spans * 4)
-        no_cross_bracing_column_bottom = int(self.cross_bracing_column_bottom) * (self.no_of_spans * 4)
-        
-        # Border Purlin calculations (MOVED FROM TRUSS)
-        no_bay_side_border_purlin = int(self.bay_side_border_purlin) * self.no_of_bays * 2
-        no_span_side_border_purlin = int(self.span_side_border_purlin) * self.no_of_spans * (int(self.no_column_big_frame) + 1) * 2
-        
-        # Gutter calculations
-        no_gutter_ippf_full = 0
-        no_gutter_ippf_drainage_ext = 0
-        no_gutter_funnel_ippf_funnel = 0
-        no_gutter_end_cap = 0
-        
-        no_gutters_continuous = 0
-        gutter_length_continuous = 0
-        gutter_purlin_length_continuous = 0
-        gutter_purlin_nos_continuous = 0
-        gutter_purlin_extension_nos = 0
-        gutter_purlin_extension_length = 0
-        
-        if self.gutter_type == 'ippf':
-            if self.gutter_ippf_full:
-                if self.last_span_gutter:
-                    no_gutter_ippf_full = (self.no_of_spans + 1) * self.no_of_bays
-                else:
-                    no_gutter_ippf_full = (self.no_of_spans - 1) * self.no_of_bays
-            
-            if self.gutter_ippf_drainage_extension:
-                if self.last_span_gutter:
-                    no_gutter_ippf_drainage_ext = (self.no_of_spans + 1) * int(self.gutter_slope)
-                else:
-                    no_gutter_ippf_drainage_ext = (self.no_of_spans - 1) * int(self.gutter_slope)
-            
-            if self.gutter_funnel_ippf:
-                if self.last_span_gutter:
-                    no_gutter_funnel_ippf_funnel = (self.no_of_spans + 1) * int(self.gutter_slope)
-                else:
-                    no_gutter_funnel_ippf_funnel = (self.no_of_spans - 1) * int(self.gutter_slope)
-            
-            if self.gutter_end_cap and self.gutter_funnel_ippf and int(self.gutter_slope) == 1:
-                if self.last_span_gutter:
-                    no_gutter_end_cap = self.no_of_spans + 1
-                else:
-                    no_gutter_end_cap = self.no_of_spans - 1
-        
-        elif self.gutter_type == 'continuous':
-            no_gutters_continuous = self.no_of_spans - 1
-            gutter_length_continuous = self.span_length + int(self.gutter_extension)
-            gutter_purlin_length_continuous = self.bay_width
-            gutter_purlin_nos_continuous = (self.no_of_spans - 1) * self.no_of_bays * 2
-            gutter_purlin_extension_nos = (self.no_of_spans - 1) * 4
-            gutter_purlin_extension_length = int(self.gutter_extension)
-        
-        # Create Cross Bracing components
-        if no_front_back_c_c_cross_bracing_x > 0:
-            front_back_bracing_length = self._get_length_master_value(self.length_front_back_c_c_cross_bracing_x, 2.5)
-            component_vals.append(self._create_component_val(
-                'lower', 'Front & Back Column to Column Cross Bracing X', 
-                no_front_back_c_c_cross_bracing_x, 
-                front_back_bracing_length,
-                self.length_front_back_c_c_cross_bracing_x
-            ))
-        
-        if no_middle_c_c_cross_bracing_x > 0:
-            middle_bracing_length = self._get_length_master_value(self.length_middle_c_c_cross_bracing_x, 2.5)
-            component_vals.append(self._create_component_val(
-                'lower', 'Internal CC Cross Bracing X', 
-                no_middle_c_c_cross_bracing_x, 
-                middle_bracing_length,
-                self.length_middle_c_c_cross_bracing_x
-            ))
-        
-        if no_cross_bracing_column_arch > 0:
-            column_arch_bracing_length = self._get_length_master_value(self.length_cross_bracing_column_arch, 2.0)
-            component_vals.append(self._create_component_val(
-                'lower', 'Cross Bracing Column to Arch', 
-                no_cross_bracing_column_arch, 
-                column_arch_bracing_length,
-                self.length_cross_bracing_column_arch
-            ))
-        
-        if no_cross_bracing_column_bottom > 0:
-            column_bottom_bracing_length = self._get_length_master_value(self.length_cross_bracing_column_bottom, 2.0)
-            component_vals.append(self._create_component_val(
-                'lower', 'Cross Bracing Column to Bottom Chord', 
-                no_cross_bracing_column_bottom, 
-                column_bottom_bracing_length,
-                self.length_cross_bracing_column_bottom
-            ))
-        
-        # Create Border Purlin components (MOVED FROM TRUSS)
-        if no_bay_side_border_purlin > 0:
-            component_vals.append(self._create_component_val(
-                'lower', 'Bay Side Border Purlin', 
-                no_bay_side_border_purlin, 
-                self.bay_width
-            ))
-        
-        if no_span_side_border_purlin > 0:
-            span_side_length = self.span_width / (int(self.no_column_big_frame) + 1)
-            component_vals.append(self._create_component_val(
-                'lower', 'Span Side Border Purlin', 
-                no_span_side_border_purlin, 
-                span_side_length
-            ))
-        
-        # Create Gutter components
-        if no_gutter_ippf_full > 0:
-            component_vals.append(self._create_component_val(
-                'lower', 'Gutter IPPF Full', 
-                no_gutter_ippf_full, 
-                self.bay_width + 0.04
-            ))
-        
-        if no_gutter_funnel_ippf_funnel > 0:
-            component_vals.append(self._create_component_val(
-                'lower', 'Gutter Funnel IPPF', 
-                no_gutter_funnel_ippf_funnel, 
-                0.5
-            ))
-        
-        if no_gutter_ippf_drainage_ext > 0:
-            component_vals.append(self._create_component_val(
-                'lower', 'Gutter IPPF Drainage Extension', 
-                no_gutter_ippf_drainage_ext, 
-                0.3
-            ))
-        
-        if no_gutter_end_cap > 0:
-            component_vals.append(self._create_component_val(
-                'lower', 'Gutter End Cap', 
-                no_gutter_end_cap, 
-                0.1
-            ))
-        
-        if no_gutters_continuous > 0:
-            component_vals.append(self._create_component_val(
-                'lower', 'Gutter Continuous', 
-                no_gutters_continuous, 
-                gutter_length_continuous
-            ))
-        
-        if gutter_purlin_nos_continuous > 0:
-            component_vals.append(self._create_component_val(
-                'lower', 'Gutter Purlin', 
-                gutter_purlin_nos_continuous, 
-                gutter_purlin_length_continuous
-            ))
-        
-        if gutter_purlin_extension_nos > 0 and gutter_purlin_extension_length > 0:
-            component_vals.append(self._create_component_val(
-                'lower', 'Gutter Purlin For Extension', 
-                gutter_purlin_extension_nos, 
-                gutter_purlin_extension_length
-            ))
-        
-        # Create all lower component lines
-        for val in component_vals:
-            try:
-                self.env['component.line'].create(val)
-                _logger.info(f"Created lower component: {val['name']} - Nos: {val['nos']} - Length: {val['length']}")
-            except Exception as e:
-                _logger.error(f"Error creating lower component {val.get('name', 'Unknown')}: {e}")
\ No newline at end of file
+        return super()._get_engine_calculators() + [lower_engine.calculate]
+    
+    def _get_engine_params(self):
+        """Extend engine parameters with lower section configuration"""
+        params = super()._get_engine_params()
+        params.update(self._get_engine_values(lower_engine.PARAM_FIELDS))
+        params['length_masters'].update(self._get_engine_length_masters(lower_engine.LENGTH_MASTER_FIELDS))
+        return params
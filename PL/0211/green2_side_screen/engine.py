@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+"""Side screen section calculator for the green2_base engine (no ORM access)"""
+from math import ceil
+
+from odoo.addons.green2_base.engine import component, master_length
+
+PARAM_FIELDS = (
+    'no_of_curtains', 'length_side_screen_rollup_handles', 'side_screen_guard',
+    'side_screen_guard_box', 'no_side_screen_guard_box',
+)
+
+LENGTH_MASTER_FIELDS = (
+    'length_side_screen_roll_up_pipe_joiner', 'length_side_screen_guard',
+    'length_side_screen_guard_spacer', 'length_side_screen_guard_box_h_pipe',
+)
+
+
+def calculate(p):
+    """Calculate side screen-specific components.
+
+    ``total_hockeys`` is filled in by the ASC module when it is installed.
+    """
+    specs = []
+    no_of_curtains = p['no_of_curtains']
+    no_side_screen_guard_box = p['no_side_screen_guard_box']
+    no_total_hockeys = p.get('total_hockeys', 0)
+
+    # Calculate roll up pipe
+    side_screen_roll_up_pipe = 0
+    side_screen_roll_up_pipe_joiner = 0
+
+    if no_of_curtains > 0 or p['side_screen_guard'] or p['side_screen_guard_box']:
+        side_screen_roll_up_pipe = ceil((p['bay_length'] / 5.95) * 2) + ceil((p['span_length'] / 5.95) * 2)
+        side_screen_roll_up_pipe_joiner = int(side_screen_roll_up_pipe) - 4
+
+    # Calculate guard components
+    no_side_screen_guard = 0
+    if p['side_screen_guard'] and no_of_curtains > 0:
+        no_side_screen_guard = no_total_hockeys if no_total_hockeys > 0 else ((p['no_of_spans'] + 1) * (p['no_of_bays'] + 1))
+
+    # Rollup handles
+    no_side_screen_rollup_handles = no_of_curtains if no_of_curtains > 0 else 0
+
+    # Guard box components
+    no_side_screen_guard_box_pipe = 0
+    no_side_screen_guard_box_h_pipe = 0
+    if no_side_screen_guard_box > 0 and no_of_curtains > 0:
+        no_side_screen_guard_box_pipe = no_side_screen_guard_box * 2
+        no_side_screen_guard_box_h_pipe = no_side_screen_guard_box * 2
+
+    # Guard spacer
+    side_screen_guard_spacer = 0
+    if no_of_curtains > 0:
+        side_screen_guard_spacer = (no_side_screen_guard * 2) + (no_side_screen_guard_box * 4)
+
+    # Create components
+    if side_screen_roll_up_pipe > 0:
+        specs.append(component('side_screen', 'Side Screen Roll Up Pipe', side_screen_roll_up_pipe, 6.0))
+
+    if side_screen_roll_up_pipe_joiner > 0:
+        length, master_id = master_length(p, 'length_side_screen_roll_up_pipe_joiner', 0.5)
+        specs.append(component('side_screen', 'Side Screen Roll Up Pipe Joiner',
+                               side_screen_roll_up_pipe_joiner, length, master_id))
+
+    if no_side_screen_rollup_handles > 0 and p['length_side_screen_rollup_handles'] > 0:
+        specs.append(component('side_screen', 'Side Screen Rollup Handles',
+                               no_side_screen_rollup_handles, p['length_side_screen_rollup_handles']))
+
+    if no_side_screen_guard > 0:
+        length, master_id = master_length(p, 'length_side_screen_guard', 1.0)
+        specs.append(component('side_screen', 'Side Screen Guard', no_side_screen_guard, length, master_id))
+
+    if no_side_screen_guard_box_pipe > 0:
+        box_pipe_length = p['column_height']
+        if no_total_hockeys > 0:
+            box_pipe_length = p['column_height'] + 1.5
+        specs.append(component('side_screen', 'Side Screen Guard Box Pipe',
+                               no_side_screen_guard_box_pipe, box_pipe_length))
+
+    if no_side_screen_guard_box_h_pipe > 0:
+        length, master_id = master_length(p, 'length_side_screen_guard_box_h_pipe', 1.0)
+        specs.append(component('side_screen', 'Side Screen Guard Box H Pipe',
+                               no_side_screen_guard_box_h_pipe, length, master_id))
+
+    if side_screen_guard_spacer > 0:
+        length, master_id = master_length(p, 'length_side_screen_guard_spacer', 0.3)
+        specs.append(component('side_screen', 'Side Screen Guard Spacer', side_screen_guard_spacer, length, master_id))
+
+    return specs
@@ -1,7 +1,8 @@
 from odoo import models, fields, api
-from math import ceil
 import logging
 
+from .. import engine as side_screen_engine
+
 _logger = logging.getLogger(__name__)
 
 class GreenMasterSideScreen(models.Model):
@@ -88,114 +89,17 @@ class GreenMasterSideScreen(models.Model):
         if not self.side_screen_guard_box:
             self.no_side_screen_guard_box = 0
     
-    def _calculate_all_components(self):
+    def _get_engine_calculators(self):
         """Extend calculation to add side screen components"""
-        super()._calculate_all_components()
-        self._calculate_side_screen_components()
+        return super()._get_engine_calculators() + [side_screen_engine.calculate]
     
-    def _calculate_side_screen_components(self):
-        """Calculate side screen-specific components"""
-        component_vals = []
-        
-        # Calculate roll up pipe
-        side_screen_roll_up_pipe = 0
-        side_screen_roll_up_pipe_joiner = 0
-        
-        if self.no_of_curtains > 0 or self.side_screen_guard or self.side_screen_guard_box:
-            side_screen_roll_up_pipe = ceil((self.bay_length / 5.95) * 2) + ceil((self.span_length / 5.95) * 2)
-            side_screen_roll_up_pipe_joiner = int(side_screen_roll_up_pipe) - 4
-        
-        # Calculate guard components
-        no_side_screen_guard = 0
-        if self.side_screen_guard and self.no_of_curtains > 0:
-            # Check if ASC is enabled
-            no_total_hockeys = self._calculate_total_hockeys()
-            no_side_screen_guard = no_total_hockeys if no_total_hockeys > 0 else ((self.no_of_spans + 1) * (self.no_of_bays + 1))
-        
-        # Rollup handles
-        no_side_screen_rollup_handles = self.no_of_curtains if self.no_of_curtains > 0 else 0
-        
-        # Guard box components
-        no_side_screen_guard_box_pipe = 0
-        no_side_screen_guard_box_h_pipe = 0
-        if self.no_side_screen_guard_box > 0 and self.no_of_curtains > 0:
-            no_side_screen_guard_box_pipe = self.no_side_screen_guard_box * 2
-            no_side_screen_guard_box_h_pipe = self.no_side_screen_guard_box * 2
-        
-        # Guard spacer
-        side_screen_guard_spacer = 0
-        if self.no_of_curtains > 0:
-            side_screen_guard_spacer = (no_side_screen_guard * 2) + (self.no_side_screen_guard_box * 4)
-        
-        # Create components
-        if side_screen_roll_up_pipe > 0:
-            component_vals.append(self._create_component_val(
-                'side_screen', 'Side Screen Roll Up Pipe', 
-                side_screen_roll_up_pipe, 
-                6.0
-            ))
-        
-        if side_screen_roll_up_pipe_joiner > 0:
-            joiner_length = self._get_length_master_value(self.length_side_screen_roll_up_pipe_joiner, 0.5)
-            component_vals.append(self._create_component_val(
-                'side_screen', 'Side Screen Roll Up Pipe Joiner', 
-                side_screen_roll_up_pipe_joiner, 
-                joiner_length,
-                self.length_side_screen_roll_up_pipe_joiner
-            ))
-        
-        if no_side_screen_rollup_handles > 0 and self.length_side_screen_rollup_handles > 0:
-            component_vals.append(self._create_component_val(
-                'side_screen', 'Side Screen Rollup Handles', 
-                no_side_screen_rollup_handles, 
-                self.length_side_screen_rollup_handles
-            ))
-        
-        if no_side_screen_guard > 0:
-            guard_length = self._get_length_master_value(self.length_side_screen_guard, 1.0)
-            component_vals.append(self._create_component_val(
-                'side_screen', 'Side Screen Guard', 
-                no_side_screen_guard, 
-                guard_length,
-                self.length_side_screen_guard
-            ))
-        
-        if no_side_screen_guard_box_pipe > 0:
-            no_total_hockeys = self._calculate_total_hockeys()
-            box_pipe_length = self.column_height
-            if no_total_hockeys > 0:
-                box_pipe_length = self.column_height + 1.5
-            component_vals.append(self._create_component_val(
-                'side_screen', 'Side Screen Guard Box Pipe', 
-                no_side_screen_guard_box_pipe, 
-                box_pipe_length
-            ))
-        
-        if no_side_screen_guard_box_h_pipe > 0:
-            box_h_pipe_length = self._get_length_master_value(self.length_side_screen_guard_box_h_pipe, 1.0)
-            component_vals.append(self._create_component_val(
-                'side_screen', 'Side Screen Guard Box H Pipe', 
-                no_side_screen_guard_box_h_pipe, 
-                box_h_pipe_length,
-                self.length_side_screen_guard_box_h_pipe
-            ))
-        
-        if side_screen_guard_spacer > 0:
-            spacer_length = self._get_length_master_value(self.length_side_screen_guard_spacer, 0.3)
-            component_vals.append(self._create_component_val(
-                'side_screen', 'Side Screen Guard Spacer', 
-                side_screen_guard_spacer, 
-                spacer_length,
-                self.length_side_screen_guard_spacer
-            ))
-        
-        # Create all side screen component lines
-        for val in component_vals:
-            try:
-                self.env['component.line'].create(val)
-                _logger.info(f"Created side screen component: {val['name']} - Nos: {val['nos']} - Length: {val['length']}")
-            except Exception as e:
-                _logger.error(f"Error creating side screen component {val.get('name', 'Unknown')}: {e}")
+    def _get_engine_params(self):
+        """Extend engine parameters with side screen configuration"""
+        params = super()._get_engine_params()
+        params.update(self._get_engine_values(side_screen_engine.PARAM_FIELDS))
+        params['length_masters'].update(self._get_engine_length_masters(side_screen_engine.LENGTH_MASTER_FIELDS))
+        params['total_hockeys'] = self._calculate_total_hockeys()
+        return params
     
     def _calculate_total_hockeys(self):
         """Calculate total hockeys if ASC is enabled - needed for side screen"""
@@ -0,0 +1,199 @@
+# -*- coding: utf-8 -*-
+"""Truss section calculator for the green2_base engine (no ORM access)"""
+import logging
+
+from odoo.addons.green2_base.engine import component, master_length
+
+_logger = logging.getLogger(__name__)
+
+PARAM_FIELDS = (
+    'no_anchor_frame_lines', 'arch_support_type', 'is_bottom_chord',
+    'v_support_bottom_chord_frame', 'v_support_for_af',
+    'no_vent_big_arch_support_frame', 'no_vent_small_arch_support_frame',
+    'arch_middle_purlin_big_arch', 'arch_middle_purlin_big_arch_pcs',
+    'arch_middle_purlin_small_arch', 'arch_middle_purlin_small_arch_pcs',
+)
+
+LENGTH_MASTER_FIELDS = (
+    'length_v_support_bottom_chord_frame', 'length_arch_support_big',
+    'length_arch_support_big_small', 'length_arch_support_small_big_arch',
+    'length_arch_support_small_small_arch', 'length_vent_big_arch_support',
+    'length_vent_small_arch_support',
+)
+
+
+def arch_support_flags(arch_support_type):
+    """Return (big, big_small, small_big_arch, small_small_arch) flags for an arch support type"""
+    if arch_support_type in ('w', 'm'):
+        # W or M: All 4 compulsory
+        return True, True, True, True
+    if arch_support_type == 'arch_2_bottom':
+        # Arch to Bottom: Both Small only
+        return False, False, True, True
+    if arch_support_type == 'arch_2_straight':
+        # Arch to Straight Middle: Both Big only
+        return True, True, False, False
+    return False, False, False, False
+
+
+def arch_middle_purlin_count(position, pcs, no_of_spans, no_of_bays):
+    """Number of arch middle purlins for a position option and pieces per position"""
+    pcs = int(pcs)
+    if position == '1':
+        return pcs * 4
+    if position == '2':
+        return pcs * (no_of_spans * 2)
+    if position == '3':
+        return pcs * (no_of_bays * 2)
+    if position == '4':
+        return pcs * ((no_of_spans * 2) + (no_of_bays * 2) - 4)
+    if position == '5':
+        return pcs * (no_of_spans * no_of_bays)
+    return 0
+
+
+def calculate(p):
+    """Calculate truss-specific components"""
+    specs = []
+    no_of_spans = p['no_of_spans']
+    no_of_bays = p['no_of_bays']
+    span_width = p['span_width']
+    bay_width = p['bay_width']
+
+    # Get frame calculations needed for truss
+    total_anchor_frames = p['no_anchor_frame_lines'] * no_of_spans
+    total_normal_frames = (no_of_spans * (no_of_bays + 1)) - total_anchor_frames
+
+    # Arch calculations
+    arch_big = (no_of_bays + 1) * no_of_spans
+    arch_small = arch_big
+
+    # Bottom Chord calculations
+    bottom_chord_af_normal = 0
+    bottom_chord_af_male = 0
+    bottom_chord_af_female = 0
+    bottom_chord_il_normal = 0
+    bottom_chord_il_male = 0
+    bottom_chord_il_female = 0
+
+    if p['is_bottom_chord']:
+        if p['no_column_big_frame'] == '0':
+            if span_width <= 6:
+                bottom_chord_af_normal = total_anchor_frames
+            else:
+                bottom_chord_af_male = total_anchor_frames
+                bottom_chord_af_female = total_anchor_frames
+        elif p['no_column_big_frame'] == '1':
+            bottom_chord_af_normal = total_anchor_frames * 2
+        elif p['no_column_big_frame'] == '2':
+            bottom_chord_af_normal = total_anchor_frames * 3
+        elif p['no_column_big_frame'] == '3':
+            bottom_chord_af_normal = total_anchor_frames * 4
+
+        if span_width <= 6:
+            bottom_chord_il_normal = total_normal_frames
+        else:
+            bottom_chord_il_male = total_normal_frames
+            bottom_chord_il_female = total_normal_frames
+
+    # V Support calculation with AF option
+    no_v_support_for_normal = int(p['v_support_bottom_chord_frame']) * total_normal_frames
+    no_v_support_for_af = int(p['v_support_bottom_chord_frame']) * total_anchor_frames if p['v_support_for_af'] else 0
+    no_v_support_bottom_chord_total = no_v_support_for_normal + no_v_support_for_af
+
+    # Arch Support Straight Middle
+    arch_support_staraight_middle = 0
+    if p['is_bottom_chord']:
+        arch_support_staraight_middle = arch_big - total_anchor_frames
+
+    # Arch Support calculations based on arch support type
+    is_big, is_big_small, is_small_big_arch, is_small_small_arch = arch_support_flags(p['arch_support_type'])
+    arch_support_big = arch_big if is_big else 0
+    arch_support_big_small = arch_small if is_big_small else 0
+    arch_support_small_big_arch = arch_big if is_small_big_arch else 0
+    arch_support_small_small_arch = arch_small if is_small_small_arch else 0
+
+    # Vent Support calculations
+    vent_big_arch_support = int(arch_big) * int(p['no_vent_big_arch_support_frame'])
+    vent_small_arch_support = no_of_bays * no_of_spans * int(p['no_vent_small_arch_support_frame'])
+
+    # Purlin calculations
+    big_arch_purlin = no_of_bays * no_of_spans
+    small_arch_purlin = int(big_arch_purlin)
+    gable_purlin = 0 if p['last_span_gutter'] else no_of_bays * 2
+
+    # Arch Middle Purlin calculations
+    no_arch_middle_purlin_small_arch = arch_middle_purlin_count(
+        p['arch_middle_purlin_small_arch'], p['arch_middle_purlin_small_arch_pcs'], no_of_spans, no_of_bays)
+    no_arch_middle_purlin_big_arch = arch_middle_purlin_count(
+        p['arch_middle_purlin_big_arch'], p['arch_middle_purlin_big_arch_pcs'], no_of_spans, no_of_bays)
+
+    if no_arch_middle_purlin_big_arch > 0:
+        specs.append(component('truss', 'Arch Middle Purlin Big Arch', no_arch_middle_purlin_big_arch, bay_width))
+
+    if no_arch_middle_purlin_small_arch > 0:
+        specs.append(component('truss', 'Arch Middle Purlin Small Arch', no_arch_middle_purlin_small_arch, bay_width))
+
+    # Arch components
+    if arch_big > 0:
+        specs.append(component('truss', 'Big Arch', arch_big, p['big_arch_length']))
+
+    if arch_small > 0:
+        specs.append(component('truss', 'Small Arch', arch_small, p['small_arch_length']))
+
+    # Bottom Chord components
+    if p['is_bottom_chord']:
+        if bottom_chord_af_normal > 0:
+            length_af_normal = span_width / (1 + int(p['no_column_big_frame']))
+            specs.append(component('truss', 'Bottom Chord Anchor Frame Singular', bottom_chord_af_normal, length_af_normal))
+
+        if bottom_chord_af_male > 0:
+            specs.append(component('truss', 'Bottom Chord Anchor Frame Male', bottom_chord_af_male, span_width / 2))
+
+        if bottom_chord_af_female > 0:
+            specs.append(component('truss', 'Bottom Chord Anchor Frame Female', bottom_chord_af_female, span_width / 2))
+
+        if bottom_chord_il_normal > 0:
+            specs.append(component('truss', 'Bottom Chord Inner Line Singular', bottom_chord_il_normal, span_width))
+
+        if bottom_chord_il_male > 0:
+            specs.append(component('truss', 'Bottom Chord Inner Line Male', bottom_chord_il_male, span_width / 2))
+
+        if bottom_chord_il_female > 0:
+            specs.append(component('truss', 'Bottom Chord Inner Line Female', bottom_chord_il_female, span_width / 2))
+
+        # V Support component - merged with AF option
+        if no_v_support_bottom_chord_total > 0:
+            length, master_id = master_length(p, 'length_v_support_bottom_chord_frame', 1.5)
+            specs.append(component('truss', 'V Support Bottom Chord', no_v_support_bottom_chord_total, length, master_id))
+            _logger.debug(f"V Support: {no_v_support_bottom_chord_total} total "
+                          f"(Normal: {no_v_support_for_normal}, "
+                          f"AF: {no_v_support_for_af}, AF Included: {p['v_support_for_af']})")
+
+        if arch_support_staraight_middle > 0:
+            specs.append(component('truss', 'Arch Support Straight Middle', arch_support_staraight_middle,
+                                   p['top_ridge_height'] - p['column_height']))
+
+    # Arch Support components based on selection
+    for count, name, field_name, default_length in (
+            (arch_support_big, 'Arch Support Big (Big Arch)', 'length_arch_support_big', 2.0),
+            (arch_support_big_small, 'Arch Support Big (Small Arch)', 'length_arch_support_big_small', 2.0),
+            (arch_support_small_big_arch, 'Arch Support Small for Big Arch', 'length_arch_support_small_big_arch', 1.5),
+            (arch_support_small_small_arch, 'Arch Support Small for Small Arch', 'length_arch_support_small_small_arch', 1.5),
+            (vent_big_arch_support, 'Vent Support for Big Arch', 'length_vent_big_arch_support', 2.0),
+            (vent_small_arch_support, 'Vent Support for Small Arch', 'length_vent_small_arch_support', 1.5)):
+        if count > 0:
+            length, master_id = master_length(p, field_name, default_length)
+            specs.append(component('truss', name, count, length, master_id))
+
+    # Purlin components
+    if big_arch_purlin > 0:
+        specs.append(component('truss', 'Big Arch Purlin', big_arch_purlin, bay_width))
+
+    if small_arch_purlin > 0:
+        specs.append(component('truss', 'Small Arch Purlin', small_arch_purlin, bay_width))
+
+    if gable_purlin > 0:
+        specs.append(component('truss', 'Gable Purlin', gable_purlin, bay_width))
+
+    return specs
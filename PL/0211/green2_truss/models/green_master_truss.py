@@ -2,6 +2,8 @@
 from odoo import models, fields, api
 import logging
 
+from .. import engine as truss_engine
+
 _logger = logging.getLogger(__name__)
 
 class GreenMasterTruss(models.Model):
@@ -144,29 +146,10 @@ class GreenMasterTruss(models.Model):
     def _compute_arch_support_flags(self):
         """Auto-set arch support flags based on arch_support_type"""
         for record in self:
-            if record.arch_support_type == 'w' or record.arch_support_type == 'm':
-                # W or M: All 4 compulsory
-                record.is_arch_support_big = True
-                record.is_arch_support_big_small = True
-                record.is_arch_support_small_big_arch = True
-                record.is_arch_support_small_small_arch = True
-            elif record.arch_support_type == 'arch_2_bottom':
-                # Arch to Bottom: Both Small only
-                record.is_arch_support_big = False
-                record.is_arch_support_big_small = False
-                record.is_arch_support_small_big_arch = True
-                record.is_arch_support_small_small_arch = True
-            elif record.arch_support_type == 'arch_2_straight':
-                # Arch to Straight Middle: Both Big only
-                record.is_arch_support_big = True
-                record.is_arch_support_big_small = True
-                record.is_arch_support_small_big_arch = False
-                record.is_arch_support_small_small_arch = False
-            else:  # 'none'
-                record.is_arch_support_big = False
-                record.is_arch_support_big_small = False
-                record.is_arch_support_small_big_arch = False
-                record.is_arch_support_small_small_arch = False
+            (record.is_arch_support_big,
+             record.is_arch_support_big_small,
+             record.is_arch_support_small_big_arch,
+             record.is_arch_support_small_small_arch) = truss_engine.arch_support_flags(record.arch_support_type)
     
     @api.onchange('arch_support_type')
     def _onchange_arch_support_type(self):
@@ -186,287 +169,13 @@ class GreenMasterTruss(models.Model):
     
    
     
-    def _calculate_all_components(self):
+    def _get_engine_calculators(self):
         """Extend calculation to add truss components"""
-        super()._calculate_all_components()
-        self._calculate_truss_components()
-    
-    def _calculate_truss_components(self):
-        """Calculate truss-specific components"""
-        component_vals = []
-        
-        # Get frame calculations needed for truss
-        total_anchor_frames = self.no_anchor_frame_lines * self.no_of_spans
-        total_normal_frames = (self.no_of_spans * (self.no_of_bays + 1)) - total_anchor_frames
-        
-        # Arch calculations
-        arch_big = (self.no_of_bays + 1) * self.no_of_spans
-        arch_small = arch_big
-        
-        # Bottom Chord calculations
-        bottom_chord_af_normal = 0
-        bottom_chord_af_male = 0
-        bottom_chord_af_female = 0
-        bottom_chord_il_normal = 0
-        bottom_chord_il_male = 0
-        bottom_chord_il_female = 0
-        
-        if self.is_bottom_chord:
-            if self.no_column_big_frame == '0':
-                if self.span_width <= 6:
-                    bottom_chord_af_normal = total_anchor_frames
-                else:
-                    bottom_chord_af_male = total_anchor_frames
-                    bottom_chord_af_female = total_anchor_frames
-            elif self.no_column_big_frame == '1':
-                bottom_chord_af_normal = total_anchor_frames * 2
-            elif self.no_column_big_frame == '2':
-                bottom_chord_af_normal = total_anchor_frames * 3
-            elif self.no_column_big_frame == '3':
-                bottom_chord_af_normal = total_anchor_frames * 4
-            
-            if self.span_width <= 6:
-                bottom_chord_il_normal = total_normal_frames
-            else:
-                bottom_chord_il_male = total_normal_frames
-                bottom_chord_il_female = total_normal_frames
-        
-        # NEW CODE - V Support calculation with AF option
-        total_frames_all = total_normal_frames + total_anchor_frames
-        no_v_support_for_normal = int(self.v_support_bottom_chord_frame) * total_normal_frames
-        no_v_support_for_af = int(self.v_support_bottom_chord_frame) * total_anchor_frames if self.v_support_for_af else 0
-        no_v_support_bottom_chord_total = no_v_support_for_normal + no_v_support_for_af
-
-        
-        # Arch Support calculations - Keep existing Arch Support Straight Middle calculation
-        arch_support_staraight_middle = 0
-        if self.is_bottom_chord:
-            arch_support_staraight_middle = arch_big - total_anchor_frames
-        
-        # Arch Support calculations based on computed flags
-        arch_support_big = arch_big if self.is_arch_support_big else 0
-        arch_support_big_small = arch_small if self.is_arch_support_big_small else 0
-        arch_support_small_big_arch = arch_big if self.is_arch_support_small_big_arch else 0
-        arch_support_small_small_arch = arch_small if self.is_arch_support_small_small_arch else 0
-        
-        # Vent Support calculations
-        vent_big_arch_support = int(arch_big) * int(self.no_vent_big_arch_support_frame)
-        vent_small_arch_support = self.no_of_bays * self.no_of_spans * int(self.no_vent_small_arch_support_frame)
-        
-        # Purlin calculations
-        big_arch_purlin = self.no_of_bays * self.no_of_spans
-        small_arch_purlin = int(big_arch_purlin)
-        gable_purlin = 0 if self.last_span_gutter else self.no_of_bays * 2
-        
-        
-        # Arch Middle Purlin calculations (MOVED FROM LOWER)
-        no_arch_middle_purlin_small_arch = 0
-        if self.arch_middle_purlin_small_arch == '0':
-            no_arch_middle_purlin_small_arch = 0
-        elif self.arch_middle_purlin_small_arch == '1':
-            no_arch_middle_purlin_small_arch = int(self.arch_middle_purlin_small_arch_pcs) * 4
-        elif self.arch_middle_purlin_small_arch == '2':
-            no_arch_middle_purlin_small_arch = int(self.arch_middle_purlin_small_arch_pcs) * (self.no_of_spans * 2)
-        elif self.arch_middle_purlin_small_arch == '3':
-            no_arch_middle_purlin_small_arch = int(self.arch_middle_purlin_small_arch_pcs) * (self.no_of_bays * 2)
-        elif self.arch_middle_purlin_small_arch == '4':
-            no_arch_middle_purlin_small_arch = int(self.arch_middle_purlin_small_arch_pcs) * ((self.no_of_spans * 2) + (self.no_of_bays * 2) - 4)
-        elif self.arch_middle_purlin_small_arch == '5':
-            no_arch_middle_purlin_small_arch = int(self.arch_middle_purlin_small_arch_pcs) * (self.no_of_spans * self.no_of_bays)
-
-        no_arch_middle_purlin_big_arch = 0
-        if self.arch_middle_purlin_big_arch == '0':
-            no_arch_middle_purlin_big_arch = 0
-        elif self.arch_middle_purlin_big_arch == '1':
-            no_arch_middle_purlin_big_arch = int(self.arch_middle_purlin_big_arch_pcs) * 4
-        elif self.arch_middle_purlin_big_arch == '2':
-            no_arch_middle_purlin_big_arch = int(self.arch_middle_purlin_big_arch_pcs) * (self.no_of_spans * 2)
-        elif self.arch_middle_purlin_big_arch == '3':
-            no_arch_middle_purlin_big_arch = int(self.arch_middle_purlin_big_arch_pcs) * (self.no_of_bays * 2)
-        elif self.arch_middle_purlin_big_arch == '4':
-            no_arch_middle_purlin_big_arch = int(self.arch_middle_purlin_big_arch_pcs) * ((self.no_of_spans * 2) + (self.no_of_bays * 2) - 4)
-        elif self.arch_middle_purlin_big_arch == '5':
-            no_arch_middle_purlin_big_arch = int(self.arch_middle_purlin_big_arch_pcs) * (self.no_of_spans * self.no_of_bays)
-
-        # Create Arch Middle Purlin components (add after existing purlin components)
-        if no_arch_middle_purlin_big_arch > 0:
-            component_vals.append(self._create_component_val(
-                'truss', 'Arch Middle Purlin Big Arch', 
-                no_arch_middle_purlin_big_arch, 
-                self.bay_width
-            ))
-
-        if no_arch_middle_purlin_small_arch > 0:
-            component_vals.append(self._create_component_val(
-                'truss', 'Arch Middle Purlin Small Arch', 
-                no_arch_middle_purlin_small_arch, 
-                self.bay_width
-            ))
-        
-        # Create Arch components
-        if arch_big > 0:
-            component_vals.append(self._create_component_val(
-                'truss', 'Big Arch', 
-                arch_big, 
-                self.big_arch_length
-            ))
-        
-        if arch_small > 0:
-            component_vals.append(self._create_component_val(
-                'truss', 'Small Arch', 
-                arch_small, 
-                self.small_arch_length
-            ))
-        
-        # Create Bottom Chord components
-        if self.is_bottom_chord:
-            if bottom_chord_af_normal > 0:
-                length_af_normal = self.span_width / (1 + int(self.no_column_big_frame))
-                component_vals.append(self._create_component_val(
-                    'truss', 'Bottom Chord Anchor Frame Singular', 
-                    bottom_chord_af_normal, 
-                    length_af_normal
-                ))
-            
-            if bottom_chord_af_male > 0:
-                component_vals.append(self._create_component_val(
-                    'truss', 'Bottom Chord Anchor Frame Male', 
-                    bottom_chord_af_male, 
-                    self.span_width / 2
-                ))
-            
-            if bottom_chord_af_female > 0:
-                component_vals.append(self._create_component_val(
-                    'truss', 'Bottom Chord Anchor Frame Female', 
-                    bottom_chord_af_female, 
-                    self.span_width / 2
-                ))
-            
-            if bottom_chord_il_normal > 0:
-                component_vals.append(self._create_component_val(
-                    'truss', 'Bottom Chord Inner Line Singular', 
-                    bottom_chord_il_normal, 
-                    self.span_width
-                ))
-            
-            if bottom_chord_il_male > 0:
-                component_vals.append(self._create_component_val(
-                    'truss', 'Bottom Chord Inner Line Male', 
-                    bottom_chord_il_male, 
-                    self.span_width / 2
-                ))
-            
-            if bottom_chord_il_female > 0:
-                component_vals.append(self._create_component_val(
-                    'truss', 'Bottom Chord Inner Line Female', 
-                    bottom_chord_il_female, 
-                    self.span_width / 2
-                ))
-            
-            # V Support component - MERGED with AF option
-            if no_v_support_bottom_chord_total > 0:
-                v_support_length = self._get_length_master_value(self.length_v_support_bottom_chord_frame, 1.5)
-                component_vals.append(self._create_component_val(
-                    'truss', 'V Support Bottom Chord', 
-                    no_v_support_bottom_chord_total, 
-                    v_support_length,
-                    self.length_v_support_bottom_chord_frame
-                ))
-                _logger.info(f"V Support: {no_v_support_bottom_chord_total} total "
-                           f"(Normal: {no_v_support_for_normal}, "
-                           f"AF: {no_v_support_for_af}, AF Included: {self.v_support_for_af})")
-            
-            # Keep existing Arch Support Straight Middle
-            if arch_support_staraight_middle > 0:
-                component_vals.append(self._create_component_val(
-                    'truss', 'Arch Support Straight Middle', 
-                    arch_support_staraight_middle, 
-                    self.top_ridge_height - self.column_height
-                ))
-        
-        # Arch Support components based on selection
-        if arch_support_big > 0:
-            arch_support_big_length = self._get_length_master_value(self.length_arch_support_big, 2.0)
-            component_vals.append(self._create_component_val(
-                'truss', 'Arch Support Big (Big Arch)', 
-                arch_support_big, 
-                arch_support_big_length,
-                self.length_arch_support_big
-            ))
-        
-        if arch_support_big_small > 0:
-            arch_support_big_small_length = self._get_length_master_value(self.length_arch_support_big_small, 2.0)
-            component_vals.append(self._create_component_val(
-                'truss', 'Arch Support Big (Small Arch)', 
-                arch_support_big_small, 
-                arch_support_big_small_length,
-                self.length_arch_support_big_small
-            ))
-        
-        if arch_support_small_big_arch > 0:
-            arch_support_small_big_length = self._get_length_master_value(self.length_arch_support_small_big_arch, 1.5)
-            component_vals.append(self._create_component_val(
-                'truss', 'Arch Support Small for Big Arch', 
-                arch_support_small_big_arch, 
-                arch_support_small_big_length,
-                self.length_arch_support_small_big_arch
-            ))
-        
-        if arch_support_small_small_arch > 0:
-            arch_support_small_small_length = self._get_length_master_value(self.length_arch_support_small_small_arch, 1.5)
-            component_vals.append(self._create_component_val(
-                'truss', 'Arch Support Small for Small Arch', 
-                arch_support_small_small_arch, 
-                arch_support_small_small_length,
-                self.length_arch_support_small_small_arch
-            ))
-        
-        # Vent Support components
-        if vent_big_arch_support > 0:
-            vent_big_length = self._get_length_master_value(self.length_vent_big_arch_support, 2.0)
-            component_vals.append(self._create_component_val(
-                'truss', 'Vent Support for Big Arch', 
-                vent_big_arch_support, 
-                vent_big_length,
-                self.length_vent_big_arch_support
-            ))
-        
-        if vent_small_arch_support > 0:
-            vent_small_length = self._get_length_master_value(self.length_vent_small_arch_support, 1.5)
-            component_vals.append(self._create_component_val(
-                'truss', 'Vent Support for Small Arch', 
-                vent_small_arch_support, 
-                vent_small_length,
-                self.length_vent_small_arch_support
-            ))
-        
-        # Purlin components
-        if big_arch_purlin > 0:
-            component_vals.append(self._create_component_val(
-                'truss', 'Big Arch Purlin', 
-                big_arch_purlin, 
-                self.bay_width
-            ))
-        
-        if small_arch_purlin > 0:
-            component_vals.append(self._create_component_val(
-                'truss', 'Small Arch Purlin', 
-                small_arch_purlin, 
-                self.bay_width
-            ))
-        
-        if gable_purlin > 0:
-            component_vals.append(self._create_component_val(
-                'truss', 'Gable Purlin', 
-                gable_purlin, 
-                self.bay_width
-            ))
-        
-      
-        # Create all truss component lines
-        for val in component_vals:
-            try:
-                self.env['component.line'].create(val)
-                _logger.info(f"Created truss component: {val['name']} - Nos: {val['nos']} - Length: {val['length']}")
-            except Exception as e:
-                _logger.error(f"Error creating truss component {val.get('name', 'Unknown')}: {e}")
\ No newline at end of file
+        return super()._get_engine_calculators() + [truss_engine.calculate]
+    
+    def _get_engine_params(self):
+        """Extend engine parameters with truss configuration"""
+        params = super()._get_engine_params()
+        params.update(self._get_engine_values(truss_engine.PARAM_FIELDS))
+        params['length_masters'].update(self._get_engine_length_masters(truss_engine.LENGTH_MASTER_FIELDS))
+        return params
@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+"""ASC section calculator for the green2_base engine (no ORM access)"""
+from math import sqrt
+
+from odoo.addons.green2_base.engine import component, master_length
+
+PARAM_FIELDS = (
+    'is_side_coridoors', 'width_front_span_coridoor', 'width_back_span_coridoor',
+    'width_front_bay_coridoor', 'width_back_bay_coridoor', 'support_hockeys',
+)
+
+LENGTH_MASTER_FIELDS = ('length_support_hockeys',)
+
+# Fields needed by hockey_counts on top of the corridor widths
+HOCKEY_FIELDS = PARAM_FIELDS + ('bay_length', 'span_length', 'span_width', 'bay_width', 'no_column_big_frame')
+
+
+def hockey_counts(p):
+    """Return hockeys per corridor as (front_span, back_span, front_bay, back_bay)"""
+    span_hockeys = 0
+    if p['width_front_span_coridoor'] > 0 or p['width_back_span_coridoor'] > 0:
+        span_hockeys = ((p['bay_length'] / p['span_width']) * (int(p['no_column_big_frame']) + 1)) + 1
+    bay_hockeys = 0
+    if p['width_front_bay_coridoor'] > 0 or p['width_back_bay_coridoor'] > 0:
+        bay_hockeys = (p['span_length'] / p['bay_width']) + 1
+
+    return (
+        span_hockeys if p['width_front_span_coridoor'] > 0 else 0,
+        span_hockeys if p['width_back_span_coridoor'] > 0 else 0,
+        bay_hockeys if p['width_front_bay_coridoor'] > 0 else 0,
+        bay_hockeys if p['width_back_bay_coridoor'] > 0 else 0,
+    )
+
+
+def total_hockeys(p):
+    """Total hockeys over all corridors, 0 when ASC is disabled"""
+    if not p['is_side_coridoors']:
+        return 0
+    return int(sum(hockey_counts(p)))
+
+
+def calculate(p):
+    """Calculate ASC-specific components"""
+    if not p['is_side_coridoors']:
+        return []
+
+    specs = []
+    counts = hockey_counts(p)
+    no_total_hockeys = sum(counts)
+
+    # ASC Support components
+    if p['support_hockeys'] > 0 and no_total_hockeys > 0:
+        length, master_id = master_length(p, 'length_support_hockeys', 1.5)
+        specs.append(component('asc', 'ASC Pipe Support',
+                               p['support_hockeys'] * int(no_total_hockeys), length, master_id))
+
+    # ASC Pipe components
+    for count, name, width_field in zip(counts, (
+            'Front Span ASC Pipes', 'Back Span ASC Pipes', 'Front Bay ASC Pipes', 'Back Bay ASC Pipes'), (
+            'width_front_span_coridoor', 'width_back_span_coridoor',
+            'width_front_bay_coridoor', 'width_back_bay_coridoor')):
+        if count > 0:
+            pipe_length = 1 + sqrt(p[width_field] ** 2 + p['column_height'] ** 2)
+            specs.append(component('asc', name, int(count), pipe_length))
+
+    return specs
@@ -1,7 +1,8 @@
 from odoo import models, fields, api
-from math import sqrt
 import logging
 
+from .. import engine as asc_engine
+
 _logger = logging.getLogger(__name__)
 
 class GreenMasterASC(models.Model):
@@ -46,117 +47,20 @@ class GreenMasterASC(models.Model):
             record.arch_height = record.top_ridge_height - record.column_height
             record.gutter_length = record.span_length
     
-    def _calculate_all_components(self):
+    def _get_engine_calculators(self):
         """Extend calculation to add ASC components"""
-        super()._calculate_all_components()
-        if self.is_side_coridoors:
-            self._calculate_asc_components()
+        return super()._get_engine_calculators() + [asc_engine.calculate]
     
-    def _calculate_asc_components(self):
-        """Calculate ASC-specific components"""
-        component_vals = []
-        
-        # Calculate hockey counts
-        no_asc = 0
-        if self.width_front_span_coridoor > 0:
-            no_asc += 1
-        if self.width_back_span_coridoor > 0:
-            no_asc += 1
-        if self.width_front_bay_coridoor > 0:
-            no_asc += 1
-        if self.width_back_bay_coridoor > 0:
-            no_asc += 1
-        
-        no_front_span_coridoor_hockeys = 0
-        if self.width_front_span_coridoor > 0:
-            no_front_span_coridoor_hockeys = ((self.bay_length / self.span_width) * (int(self.no_column_big_frame) + 1)) + 1
-        
-        no_back_span_coridoor_hockeys = 0
-        if self.width_back_span_coridoor > 0:
-            no_back_span_coridoor_hockeys = ((self.bay_length / self.span_width) * (int(self.no_column_big_frame) + 1)) + 1
-        
-        no_front_bay_coridoor_hockeys = 0
-        if self.width_front_bay_coridoor > 0:
-            no_front_bay_coridoor_hockeys = (self.span_length / self.bay_width) + 1
-        
-        no_back_bay_coridoor_hockeys = 0
-        if self.width_back_bay_coridoor > 0:
-            no_back_bay_coridoor_hockeys = (self.span_length / self.bay_width) + 1
-        
-        no_total_hockeys = (no_front_span_coridoor_hockeys + no_back_span_coridoor_hockeys + 
-                           no_front_bay_coridoor_hockeys + no_back_bay_coridoor_hockeys)
-        
-        # Create ASC Support components
-        if self.support_hockeys > 0 and no_total_hockeys > 0:
-            support_length = self._get_length_master_value(self.length_support_hockeys, 1.5)
-            component_vals.append(self._create_component_val(
-                'asc', 'ASC Pipe Support', 
-                self.support_hockeys * int(no_total_hockeys), 
-                support_length, 
-                self.length_support_hockeys
-            ))
-        
-        # Create ASC Pipe components
-        if no_front_span_coridoor_hockeys > 0:
-            length_front_span = 1 + sqrt(self.width_front_span_coridoor ** 2 + self.column_height ** 2)
-            component_vals.append(self._create_component_val(
-                'asc', 'Front Span ASC Pipes', 
-                int(no_front_span_coridoor_hockeys), 
-                length_front_span
-            ))
-        
-        if no_back_span_coridoor_hockeys > 0:
-            length_back_span = 1 + sqrt(self.width_back_span_coridoor ** 2 + self.column_height ** 2)
-            component_vals.append(self._create_component_val(
-                'asc', 'Back Span ASC Pipes', 
-                int(no_back_span_coridoor_hockeys), 
-                length_back_span
-            ))
-        
-        if no_front_bay_coridoor_hockeys > 0:
-            length_front_bay = 1 + sqrt(self.width_front_bay_coridoor ** 2 + self.column_height ** 2)
-            component_vals.append(self._create_component_val(
-                'asc', 'Front Bay ASC Pipes', 
-                int(no_front_bay_coridoor_hockeys), 
-                length_front_bay
-            ))
-        
-        if no_back_bay_coridoor_hockeys > 0:
-            length_back_bay = 1 + sqrt(self.width_back_bay_coridoor ** 2 + self.column_height ** 2)
-            component_vals.append(self._create_component_val(
-                'asc', 'Back Bay ASC Pipes', 
-                int(no_back_bay_coridoor_hockeys), 
-                length_back_bay
-            ))
-        
-        # Create all ASC component lines
-        for val in component_vals:
-            try:
-                self.env['component.line'].create(val)
-                _logger.info(f"Created ASC component: {val['name']} - Nos: {val['nos']} - Length: {val['length']}")
-            except Exception as e:
-                _logger.error(f"Error creating ASC component {val.get('name', 'Unknown')}: {e}")
+    def _get_engine_params(self):
+        """Extend engine parameters with ASC configuration"""
+        params = super()._get_engine_params()
+        params.update(self._get_engine_values(asc_engine.PARAM_FIELDS))
+        params['length_masters'].update(self._get_engine_length_masters(asc_engine.LENGTH_MASTER_FIELDS))
+        return params
     
     def _calculate_total_hockeys(self):
         """Override side screen's hockey calculation with actual ASC values"""
-        if not self.is_side_coridoors:
-            return 0
-        
-        no_total_hockeys = 0
-        
-        if self.width_front_span_coridoor > 0:
-            no_total_hockeys += ((self.bay_length / self.span_width) * (int(self.no_column_big_frame) + 1)) + 1
-        
-        if self.width_back_span_coridoor > 0:
-            no_total_hockeys += ((self.bay_length / self.span_width) * (int(self.no_column_big_frame) + 1)) + 1
-        
-        if self.width_front_bay_coridoor > 0:
-            no_total_hockeys += (self.span_length / self.bay_width) + 1
-        
-        if self.width_back_bay_coridoor > 0:
-            no_total_hockeys += (self.span_length / self.bay_width) + 1
-        
-        return int(no_total_hockeys)
+        return asc_engine.total_hockeys(self._get_engine_values(asc_engine.HOCKEY_FIELDS))
     
     @api.constrains('total_span_length', 'width_front_bay_coridoor', 'width_back_bay_coridoor', 
                     'bay_width', 'total_bay_length', 'width_front_span_coridoor', 
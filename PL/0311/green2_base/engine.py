@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+"""
+Plain-data greenhouse calculation engine.
+
+Section calculators are pure functions that take a parameter dict (built by
+``green.master._get_engine_params``) and return a list of ``ComponentSpec``
+tuples. Nothing in here touches the ORM, so a configuration can be quoted or
+unit-tested without a database; the model layer only turns the final list
+into ``component.line`` values and creates them in one batch.
+"""
+from collections import namedtuple
+
+ComponentSpec = namedtuple('ComponentSpec', ['section', 'name', 'nos', 'length', 'length_master_id'])
+
+
+def component(section, name, nos, length, length_master_id=False):
+    """Build a component tuple, normalising nos the same way the ORM helper does"""
+    return ComponentSpec(section, name, int(nos), length, length_master_id or False)
+
+
+def master_length(params, field_name, default_value):
+    """Return (length, length_master_id) for a length master parameter.
+
+    Length masters are passed as ``params['length_masters'][field] = (id, value)``
+    and fall back to ``default_value`` when the field is not set.
+    """
+    master = params.get('length_masters', {}).get(field_name)
+    if master:
+        return master[1], master[0]
+    return default_value, False
+
+
+def run_calculators(params, calculators):
+    """Run every section calculator on the same parameters, in order"""
+    specs = []
+    for calculator in calculators:
+        specs.extend(calculator(params))
+    return specs
@@ -1,12 +1,50 @@
 from odoo import _, models, fields, api
 from odoo.exceptions import ValidationError
+from odoo.tools import float_compare
+from collections import defaultdict
 from math import ceil, sqrt, floor
 import logging
 
+from .. import engine
+
 _logger = logging.getLogger(__name__)
 
+PIPE_CATALOG_KEY = 'green2_base.pipe_catalog'
+LENGTH_CATALOG_KEY = 'green2_base.length_catalog'
+
+# component.line aggregates reported per section by green.master._get_section_totals
+SECTION_TOTAL_FIELDS = ('total_cost', 'total_weight', 'total_length')
+
+
+class GreenCatalogMixin(models.AbstractModel):
+    """Drop the transaction's pipe/length catalog whenever catalog records change"""
+    _name = 'green.catalog.mixin'
+    _description = 'Pipe and Length Catalog Cache Invalidation'
+    
+    def _invalidate_green_catalog(self):
+        self.env.cr.cache.pop(PIPE_CATALOG_KEY, None)
+        self.env.cr.cache.pop(LENGTH_CATALOG_KEY, None)
+    
+    @api.model_create_multi
+    def create(self, vals_list):
+        records = super().create(vals_list)
+        self._invalidate_green_catalog()
+        return records
+    
+    def write(self, vals):
+        result = super().write(vals)
+        self._invalidate_green_catalog()
+        return result
+    
+    def unlink(self):
+        result = super().unlink()
+        self._invalidate_green_catalog()
+        return result
+
+
 class LengthMaster(models.Model):
     _name = 'length.master'
+    _inherit = ['green.catalog.mixin']
     _description = 'Length Master for Component Configuration'
     _order = 'length_value asc'
     
@@ -54,6 +92,15 @@ class LengthMaster(models.Model):
             name = f"{record.length_value}m" if record.length_value else "0.0m"
             result.append((record.id, name))
         return result
+    
+    @api.model
+    def _get_length_catalog(self):
+        """All length masters as {id: length_value}, loaded once per transaction"""
+        cache = self.env.cr.cache
+        if LENGTH_CATALOG_KEY not in cache:
+            records = self.with_context(active_test=False).search_read([], ['length_value'])
+            cache[LENGTH_CATALOG_KEY] = {rec['id']: rec['length_value'] for rec in records}
+        return cache[LENGTH_CATALOG_KEY]
 
 class LengthFieldOption(models.Model):
     _name = 'length.field.option'
@@ -159,6 +206,7 @@ class ComponentLine(models.Model):
         
         result = super().write(vals)
         
+        length_catalog = self.env['length.master']._get_length_catalog()
         for record in self:
             if record.id in length_states:
                 state = length_states[record.id]
@@ -166,7 +214,7 @@ class ComponentLine(models.Model):
                     if record.length != record.custom_length:
                         super(ComponentLine, record).write({'length': record.custom_length})
                 elif record.use_length_master and record.length_master_id:
-                    expected_length = record.length_master_id.length_value
+                    expected_length = length_catalog.get(record.length_master_id.id, 0.0)
                     if record.length != expected_length:
                         super(ComponentLine, record).write({'length': expected_length})
         
@@ -275,20 +323,120 @@ class GreenMaster(models.Model):
                  'asc_component_ids.total_cost')
     def _compute_section_totals(self):
         """Compute section totals - extensible by other modules"""
+        section_totals = self._get_section_totals()
         for record in self:
-            record.total_frame_cost = sum(record.frame_component_ids.mapped('total_cost'))
-            record.total_truss_cost = sum(record.truss_component_ids.mapped('total_cost'))
-            record.total_side_screen_cost = sum(record.side_screen_component_ids.mapped('total_cost')) 
-            record.total_lower_cost = sum(record.lower_component_ids.mapped('total_cost'))
-            record.total_asc_cost = sum(record.asc_component_ids.mapped('total_cost'))
-            record.grand_total_cost = (record.total_frame_cost + record.total_truss_cost + 
-                                     record.total_side_screen_cost + record.total_lower_cost +
-                                     record.total_asc_cost)
+            record._apply_section_totals(section_totals[record.id])
+    
+    def _apply_section_totals(self, sections):
+        """Write the section cost fields from one project's ``_get_section_totals`` entry"""
+        self.ensure_one()
+        empty = dict.fromkeys(SECTION_TOTAL_FIELDS, 0.0)
+        self.total_frame_cost = sections.get('frame', empty)['total_cost']
+        self.total_truss_cost = sections.get('truss', empty)['total_cost']
+        self.total_side_screen_cost = sections.get('side_screen', empty)['total_cost']
+        self.total_lower_cost = sections.get('lower', empty)['total_cost']
+        self.total_asc_cost = sections.get('asc', empty)['total_cost']
+        self.grand_total_cost = (self.total_frame_cost + self.total_truss_cost + 
+                                 self.total_side_screen_cost + self.total_lower_cost +
+                                 self.total_asc_cost)
+    
+    def _get_component_line_fields(self):
+        """One2many fields holding this project's component lines - extended by section modules"""
+        return ('frame_component_ids', 'truss_component_ids', 'side_screen_component_ids',
+                'lower_component_ids', 'asc_component_ids')
+    
+    def _get_section_totals(self):
+        """Cost, weight and length per section for every project in ``self``.
+        
+        Returns ``{project_id: {section: {'total_cost', 'total_weight', 'total_length'}}}``.
+        Saved projects are aggregated with a single grouped query over component.line,
+        so list views and stored computes over many projects stay one round trip;
+        records being edited in a form (onchange) are summed from their lines in memory.
+        """
+        totals = {record.id: {} for record in self}
+        stored = self.filtered(lambda r: not isinstance(r.id, models.NewId))
+        if stored:
+            groups = self.env['component.line'].read_group(
+                [('green_master_id', 'in', stored.ids)],
+                [f'{fname}:sum' for fname in SECTION_TOTAL_FIELDS],
+                ['green_master_id', 'section'],
+                lazy=False,
+            )
+            for group in groups:
+                totals[group['green_master_id'][0]][group['section']] = {
+                    fname: group[fname] or 0.0 for fname in SECTION_TOTAL_FIELDS
+                }
+        
+        for record in self - stored:
+            sections = totals[record.id]
+            for field_name in record._get_component_line_fields():
+                for line in record[field_name]:
+                    section = sections.setdefault(line.section, dict.fromkeys(SECTION_TOTAL_FIELDS, 0.0))
+                    for fname in SECTION_TOTAL_FIELDS:
+                        section[fname] += line[fname]
+        return totals
 
     def _calculate_all_components(self):
-        """Base method for calculating components - to be extended by other modules"""
-        _logger.info("Base _calculate_all_components called - extend in other modules")
-        pass
+        """Run the section calculators and create all component lines in one batch"""
+        vals_list = []
+        for record in self:
+            vals_list.extend(record._get_calculated_component_vals())
+        
+        if vals_list:
+            self.env['component.line'].create(vals_list)
+        _logger.info(f"Created {len(vals_list)} calculated components")
+    
+    def _get_calculated_component_vals(self):
+        """component.line values for the current configuration, without writing anything"""
+        self.ensure_one()
+        specs = engine.run_calculators(self._get_engine_params(), self._get_engine_calculators())
+        return [self._component_spec_to_val(spec) for spec in specs]
+    
+    def _get_engine_calculators(self):
+        """Section calculators used by the engine - extended by section modules"""
+        return []
+    
+    def _get_engine_params(self):
+        """Plain-data snapshot of the project for the engine - extended by section modules"""
+        self.ensure_one()
+        params = self._get_engine_values((
+            'structure_type', 'span_length', 'bay_length', 'span_width', 'bay_width',
+            'no_of_bays', 'no_of_spans', 'gutter_slope', 'last_span_gutter',
+            'top_ridge_height', 'column_height', 'big_arch_length', 'small_arch_length',
+            'foundation_length', 'no_column_big_frame',
+        ))
+        params['length_masters'] = {}
+        return params
+    
+    def _get_engine_values(self, field_names):
+        """Read plain field values for the engine"""
+        return {name: self[name] for name in field_names}
+    
+    def _get_engine_length_masters(self, field_names):
+        """Read length master fields as (id, length_value) pairs for the engine"""
+        return {name: (self[name].id, self[name].length_value)
+                for name in field_names if self[name]}
+    
+    def _component_spec_to_val(self, spec):
+        """Convert an engine component tuple to component.line values"""
+        val = {
+            'green_master_id': self.id,
+            'section': spec.section,
+            'name': spec.name,
+            'required': True,
+            'nos': spec.nos,
+            'length': spec.length,
+            'is_calculated': True,
+            'description': f"Auto-calculated component for {spec.section} section",
+        }
+        
+        if spec.length_master_id:
+            val.update({
+                'length_master_id': spec.length_master_id,
+                'use_length_master': True,
+            })
+        
+        return val
     
     def _get_length_master_value(self, length_master_field, default_value):
         """Helper method to get length from master field"""
@@ -403,102 +551,84 @@ class GreenMaster(models.Model):
         normalized_name = name_mappings.get(clean_name, clean_name.replace(' ', '_'))
         return f"{section}|{normalized_name}"
 
-    def _save_component_selections_improved(self):
-        """Save all component selections for restoration after recalculation"""
-        saved_selections = {}
+    def _get_component_counts(self):
+        """Number of component lines per section"""
+        self.ensure_one()
+        groups = self.env['component.line'].read_group(
+            [('green_master_id', '=', self.id)], ['section'], ['section']
+        )
+        return {group['section']: group['section_count'] for group in groups}
+    
+    def _get_component_update_vals(self, line, val):
+        """Values to write on an existing line so it matches a recalculated one.
         
-        all_components = (self.asc_component_ids + self.frame_component_ids + 
-                         self.truss_component_ids + self.side_screen_component_ids + 
-                         self.lower_component_ids)
+        Pipe, length master, custom length and notes chosen by the user are kept;
+        only quantities (and the length when the user has not fixed it) change.
+        """
+        update_vals = {}
+        if line.nos != val['nos']:
+            update_vals['nos'] = val['nos']
         
-        for component in all_components:
-            component_key = self._generate_component_key(component.section, component.name)
-            
-            saved_selections[component_key] = {
-                'original_name': component.name,
-                'original_section': component.section,
-                'pipe_id': component.pipe_id.id if component.pipe_id else False,
-                'pipe_display_name': component.pipe_id.display_name if component.pipe_id else '',
-                'use_length_master': component.use_length_master,
-                'length_master_id': component.length_master_id.id if component.length_master_id else False,
-                'length_master_value': component.length_master_id.length_value if component.length_master_id else 0.0,
-                'custom_length': component.custom_length,
-                'required': component.required,
-                'notes': component.notes or '',
-                'description': component.description or '',
-                'section': component.section,
-            }
+        if val.get('length_master_id') and not line.length_master_id:
+            update_vals['length_master_id'] = val['length_master_id']
         
-        return saved_selections
-
-    def _restore_component_selections_improved(self, saved_selections):
-        """Restore component selections after recalculation"""
-        if not saved_selections:
-            return {
-                'restored_count': 0,
-                'failed_restorations': [],
-                'total_saved': 0,
-                'total_new_components': 0,
-                'section_migrations': []
-            }
+        length_fixed = ((not line.use_length_master and line.custom_length > 0) or
+                        (line.use_length_master and line.length_master_id))
+        if not length_fixed and float_compare(line.length, val['length'], precision_digits=6):
+            update_vals['length'] = val['length']
+        
+        return update_vals
+    
+    def _sync_calculated_components(self):
+        """Apply the recalculated component set as a diff against the existing lines.
         
-        all_new_components = (self.asc_component_ids + self.frame_component_ids + 
-                             self.truss_component_ids + self.side_screen_component_ids + 
-                             self.lower_component_ids)
+        Lines are matched with _generate_component_key, so matched lines keep
+        their record, pipe selection and settings. New lines are created in one
+        batch, changed lines are written grouped by identical values and lines
+        that are no longer calculated are unlinked in one call.
+        """
+        self.ensure_one()
+        ComponentLine = self.env['component.line']
         
-        restored_count = 0
-        failed_restorations = []
+        existing_by_key = {}
+        duplicate_ids = []
+        for line in ComponentLine.search([('green_master_id', '=', self.id)]):
+            key = self._generate_component_key(line.section, line.name)
+            if key in existing_by_key:
+                duplicate_ids.append(line.id)
+            else:
+                existing_by_key[key] = line
         
-        for component in all_new_components:
-            component_key = self._generate_component_key(component.section, component.name)
+        to_create = []
+        to_write = defaultdict(list)
+        kept_count = 0
+        for val in self._get_calculated_component_vals():
+            line = existing_by_key.pop(self._generate_component_key(val['section'], val['name']), None)
+            if not line:
+                to_create.append(val)
+                continue
             
-            if component_key in saved_selections:
-                selection_data = saved_selections[component_key]
-                
-                try:
-                    update_vals = self._build_component_update_values(selection_data)
-                    component.write(update_vals)
-                    restored_count += 1
-                    
-                except Exception as e:
-                    error_msg = f"Component: {component.name}, Error: {str(e)}"
-                    failed_restorations.append(error_msg)
+            kept_count += 1
+            update_vals = self._get_component_update_vals(line, val)
+            if update_vals:
+                to_write[tuple(sorted(update_vals.items()))].append(line.id)
+        
+        unlink_ids = duplicate_ids + [line.id for line in existing_by_key.values()]
+        if unlink_ids:
+            ComponentLine.browse(unlink_ids).unlink()
+        for update_items, line_ids in to_write.items():
+            ComponentLine.browse(line_ids).write(dict(update_items))
+        if to_create:
+            ComponentLine.create(to_create)
         
         return {
-            'restored_count': restored_count,
-            'failed_restorations': failed_restorations,
-            'total_saved': len(saved_selections),
-            'total_new_components': len(all_new_components),
-        }
-
-    def _build_component_update_values(self, selection_data):
-        """Build update values for component restoration"""
-        update_vals = {
-            'required': selection_data['required'],
-            'notes': selection_data['notes'],
-            'use_length_master': selection_data['use_length_master'],
-            'custom_length': selection_data['custom_length'],
+            'kept_count': kept_count,
+            'updated_count': sum(len(line_ids) for line_ids in to_write.values()),
+            'created_count': len(to_create),
+            'removed_count': len(unlink_ids),
         }
-        
-        if selection_data['description'] and not selection_data['description'].startswith('Auto-calculated'):
-            update_vals['description'] = selection_data['description']
-        
-        if selection_data['pipe_id']:
-            pipe_exists = self.env['pipe.management'].browse(selection_data['pipe_id']).exists()
-            if pipe_exists:
-                update_vals['pipe_id'] = selection_data['pipe_id']
-        
-        if selection_data['length_master_id']:
-            length_master_exists = self.env['length.master'].browse(selection_data['length_master_id']).exists()
-            if length_master_exists:
-                update_vals['length_master_id'] = selection_data['length_master_id']
-        
-        return update_vals
-        
-        
-
     
-    def _generate_recalculation_feedback(self, saved_selections, restoration_result, counts_before, counts_after):
+    def _generate_recalculation_feedback(self, sync_result, counts_before, counts_after):
         """Generate detailed feedback message after recalculation"""
         total_before = sum(counts_before.values())
         total_after = sum(counts_after.values())
@@ -511,7 +641,7 @@ class GreenMaster(models.Model):
             f"SECTION BREAKDOWN:",
         ]
         
-        for section in ['asc', 'frame', 'truss', 'side_screen', 'lower']:
+        for section, _label in self.env['component.line']._fields['section'].selection:
             section_name = section.upper().replace('_', ' ')
             before_count = counts_before.get(section, 0)
             after_count = counts_after.get(section, 0)
@@ -523,19 +653,13 @@ class GreenMaster(models.Model):
         message_parts.extend([
             f"",
             f"PIPE SELECTIONS:",
-            f"  • Saved: {len(saved_selections)} selections",
-            f"  • Restored: {restoration_result['restored_count']} selections",
+            f"  • Preserved: {sync_result['kept_count']} components",
+            f"  • Updated quantities/lengths: {sync_result['updated_count']} components",
+            f"  • Removed: {sync_result['removed_count']} components",
         ])
         
-        if restoration_result.get('failed_restorations'):
-            message_parts.extend([
-                f"  ⚠ Failed to restore: {len(restoration_result['failed_restorations'])} selections",
-                f"     (Check logs for details)"
-            ])
-        
-        new_components = restoration_result.get('total_new_components', 0) - restoration_result.get('restored_count', 0)
-        if new_components > 0:
-            message_parts.append(f"  ✨ New components: {new_components} (need pipe selection)")
+        if sync_result['created_count'] > 0:
+            message_parts.append(f"  ✨ New components: {sync_result['created_count']} (need pipe selection)")
         
         message_parts.extend([
             f"",
@@ -549,38 +673,17 @@ class GreenMaster(models.Model):
     def action_recalculate_smart(self):
         """Smart recalculation that preserves pipe selections and custom settings"""
         try:
-            # Save component selections before clearing
-            saved_selections = self._save_component_selections_improved()
+            component_counts_before = self._get_component_counts()
             
-            # Count components before
-            component_counts_before = {
-                'asc': len(self.asc_component_ids or []),
-                'frame': len(self.frame_component_ids or []),
-                'truss': len(self.truss_component_ids or []),
-                'side_screen': len(self.side_screen_component_ids or []),
-                'lower': len(self.lower_component_ids or []),
-            }
+            # Diff the recalculated lines against the existing ones
+            with self.env.cr.savepoint():
+                sync_result = self._sync_calculated_components()
             
-            # Clear and recalculate
-            self._clear_all_components()
-            self._calculate_all_components()
-            
-            # Restore selections
-            restoration_result = self._restore_component_selections_improved(saved_selections)
-            
-            # Count components after
-            component_counts_after = {
-                'asc': len(self.asc_component_ids or []),
-                'frame': len(self.frame_component_ids or []),
-                'truss': len(self.truss_component_ids or []),
-                'side_screen': len(self.side_screen_component_ids or []),
-                'lower': len(self.lower_component_ids or []),
-            }
+            component_counts_after = self._get_component_counts()
             
             # Generate feedback message
             feedback_message = self._generate_recalculation_feedback(
-                saved_selections, restoration_result, 
-                component_counts_before, component_counts_after
+                sync_result, component_counts_before, component_counts_after
             )
             
             return {
@@ -995,31 +1098,36 @@ Completion: {len(components_with_pipes)}/{len(all_components)} ({int(len(compone
             'Guard': {'size': 25, 'thickness': 1.5},
         }
         
+        Pipe = self.env['pipe.management']
+        rule_pipes = [
+            (pattern.lower(), Pipe._find_catalog_pipe(specs['size'], specs['thickness']))
+            for pattern, specs in assignment_rules.items()
+        ]
+        
         unassigned_components = self.env['component.line'].search([
             ('green_master_id', '=', self.id),
             ('pipe_id', '=', False)
         ])
         
-        assigned_count = 0
+        # Group components per pipe so each pipe is written once
+        component_ids_by_pipe = defaultdict(list)
         for component in unassigned_components:
-            for pattern, specs in assignment_rules.items():
-                if pattern.lower() in component.name.lower():
-                    matching_pipe = self.env['pipe.management'].search([
-                        ('pipe_size.size_in_mm', '=', specs['size']),
-                        ('wall_thickness.thickness_in_mm', '=', specs['thickness']),
-                    ], limit=1)
-                    
-                    if matching_pipe:
-                        component.pipe_id = matching_pipe.id
-                        assigned_count += 1
-                        break
+            component_name = component.name.lower()
+            for pattern, pipe_id in rule_pipes:
+                if pipe_id and pattern in component_name:
+                    component_ids_by_pipe[pipe_id].append(component.id)
+                    break
+        
+        for pipe_id, component_ids in component_ids_by_pipe.items():
+            self.env['component.line'].browse(component_ids).write({'pipe_id': pipe_id})
+        assigned_count = sum(len(component_ids) for component_ids in component_ids_by_pipe.values())
         
         return {
             'type': 'ir.actions.client',
             'tag': 'display_notification',
             'params': {
-                'title': 'Auto-Assignment Complete',
-                'message': f'Automatically assigned pipes to {assigned_count} components based on naming patterns.',
+                'title': _('Auto-Assignment Complete'),
+                'message': _('Automatically assigned pipes to %s components based on naming patterns.') % assigned_count,
                 'type': 'success' if assigned_count > 0 else 'info',
             }
         }
@@ -1027,23 +1135,27 @@ Completion: {len(components_with_pipes)}/{len(all_components)} ({int(len(compone
 # Pipe Management Models
 class PipeType(models.Model):
     _name = 'pipe.type'
+    _inherit = ['green.catalog.mixin']
     _description = 'Pipe Type'
     name = fields.Char(string='Pipe Type', required=True, tracking=True)
 
 class PipeSize(models.Model):
     _name = 'pipe.size'
+    _inherit = ['green.catalog.mixin']
     _description = 'Pipe Size'
     name = fields.Char(string='Pipe Size', required=True, tracking=True)
     size_in_mm = fields.Float(string='Size in mm', required=True, tracking=True)
 
 class PipeWallThickness(models.Model):
     _name = 'pipe.wall_thickness'
+    _inherit = ['green.catalog.mixin']
     _description = 'Pipe Wall Thickness'
     name = fields.Char(string='Wall Thickness', required=True, tracking=True)
     thickness_in_mm = fields.Float(string='Thickness in mm', required=True, tracking=True)
 
 class Pipe(models.Model):
     _name = 'pipe.management'
+    _inherit = ['green.catalog.mixin']
     _description = 'Pipe Management'
     
     name = fields.Many2one('pipe.type', string='Pipe Type', required=True, tracking=True)
@@ -1070,6 +1182,35 @@ class Pipe(models.Model):
             except Exception:
                 record.display_name = 'Unnamed Pipe'
     
+    @api.model
+    def _get_pipe_catalog(self):
+        """Pipe ids keyed by (type, size_in_mm, thickness_in_mm), loaded once per transaction.
+        
+        Also keeps the first pipe per (size, thickness) for lookups that ignore
+        the pipe type, matching search(..., limit=1) on the default order.
+        """
+        cache = self.env.cr.cache
+        if PIPE_CATALOG_KEY not in cache:
+            by_spec = {}
+            by_size = {}
+            for pipe in self.search([]):
+                size = round(pipe.pipe_size.size_in_mm, 3)
+                thickness = round(pipe.wall_thickness.thickness_in_mm, 3)
+                by_spec[(pipe.name.name, size, thickness)] = pipe.id
+                by_size.setdefault((size, thickness), pipe.id)
+            cache[PIPE_CATALOG_KEY] = {'by_spec': by_spec, 'by_size': by_size}
+        return cache[PIPE_CATALOG_KEY]
+    
+    @api.model
+    def _find_catalog_pipe(self, size_in_mm, thickness_in_mm, pipe_type=None):
+        """Pipe id for a size/thickness (and optionally type name), or False"""
+        catalog = self._get_pipe_catalog()
+        size = round(size_in_mm, 3)
+        thickness = round(thickness_in_mm, 3)
+        if pipe_type:
+            return catalog['by_spec'].get((pipe_type, size, thickness), False)
+        return catalog['by_size'].get((size, thickness), False)
+    
     _sql_constraints = [
         ('unique_pipe_combination', 
          'unique(name, pipe_size, wall_thickness)', 
@@ -251,51 +251,6 @@ class GreenMaster(models.Model):
             }
         }
     
-    def action_auto_assign_pipes_by_pattern(self):
-        """Smart auto-assignment based on component name patterns"""
-        # This method can be extended to implement intelligent pipe assignment
-        # based on component naming patterns or historical data
-        
-        assignment_rules = {
-            # Pattern matching for automatic assignment
-            'Column': {'size': 100, 'thickness': 3.0},  # Example rule
-            'Arch': {'size': 76, 'thickness': 2.0},
-            'Purlin': {'size': 50, 'thickness': 2.0},
-            'Support': {'size': 42, 'thickness': 2.0},
-            'Bracing': {'size': 33, 'thickness': 1.5},
-            'Guard': {'size': 25, 'thickness': 1.5},
-        }
-        
-        unassigned_components = self.env['component.line'].search([
-            ('green_master_id', '=', self.id),
-            ('pipe_id', '=', False)
-        ])
-        
-        assigned_count = 0
-        for component in unassigned_components:
-            for pattern, specs in assignment_rules.items():
-                if pattern.lower() in component.name.lower():
-                    # Try to find a matching pipe
-                    matching_pipe = self.env['pipe.management'].search([
-                        ('pipe_size.size_in_mm', '=', specs['size']),
-                        ('wall_thickness.thickness_in_mm', '=', specs['thickness']),
-                    ], limit=1)
-                    
-                    if matching_pipe:
-                        component.pipe_id = matching_pipe.id
-                        assigned_count += 1
-                        break
-        
-        return {
-            'type': 'ir.actions.client',
-            'tag': 'display_notification',
-            'params': {
-                'title': _('Auto-Assignment Complete'),
-                'message': _(f'Automatically assigned pipes to {assigned_count} components based on naming patterns.'),
-                'type': 'success' if assigned_count > 0 else 'info',
-            }
-        }
-    
     @api.model
     def get_unassigned_components_summary(self):
         """Get summary of unassigned components by section"""
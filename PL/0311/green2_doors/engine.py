@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+"""Door section calculator for the green2_base engine (no ORM access)"""
+from odoo.addons.green2_base.engine import component, master_length
+
+PARAM_FIELDS = (
+    'has_doors', 'standalone_doors_count', 'entry_chambers_count', 'chamber_depth',
+    'tractor_door_type', 'tractor_door_height', 'nos_tractor_doors',
+)
+
+LENGTH_MASTER_FIELDS = (
+    'chamber_column_length', 'length_column_pipe', 'length_purlin_pipe',
+    'length_tractor_door_purlin', 'length_tractor_door_h_pipes',
+    'length_tractor_door_big_h_pipes', 'length_tractor_door_v_pipes',
+)
+
+
+def calculate(p):
+    """Calculate door components based on configuration"""
+    if not p['has_doors']:
+        return []
+
+    specs = []
+    bay_width = p['bay_width']
+
+    # Standalone doors (X)
+    if p['standalone_doors_count'] > 0:
+        length, master_id = master_length(p, 'length_column_pipe', 3.5)
+        specs.append(component('doors', 'Door Column Pipe', p['standalone_doors_count'], length, master_id))
+
+        length, master_id = master_length(p, 'length_purlin_pipe', bay_width)
+        specs.append(component('doors', 'Door Purlin Pipe', p['standalone_doors_count'], length, master_id))
+
+    # Entry chambers (Y)
+    chambers = p['entry_chambers_count']
+    if chambers > 0:
+        # Door Front Column: 3 pieces per chamber
+        length, master_id = master_length(p, 'chamber_column_length', 3.0)
+        specs.append(component('doors', 'Door Front Column', chambers * 3, length, master_id))
+
+        # Door Front Purlin: 1 piece x Bay Width per chamber
+        specs.append(component('doors', 'Door Front Purlin', chambers, bay_width))
+
+        # Door Side Purlin: 2 pieces x Chamber Depth per chamber
+        specs.append(component('doors', 'Door Side Purlin', chambers * 2, p['chamber_depth']))
+
+        # Door Bottom Purlin: 2 pieces x (Chamber Depth + 0.25) per chamber
+        specs.append(component('doors', 'Door Bottom Purlin', chambers * 2, p['chamber_depth'] + 0.25))
+
+    # Tractor doors
+    tractor_doors = p['nos_tractor_doors']
+    if p['tractor_door_type'] == 'vertical' and tractor_doors > 0:
+        parts = (
+            ('Tractor Door Purlin', 1, 'length_tractor_door_purlin', bay_width),
+            ('Tractor Door H Pipes', 2, 'length_tractor_door_h_pipes', bay_width / 2),
+            ('Tractor Door Big H Pipes', 2, 'length_tractor_door_big_h_pipes', bay_width),
+            ('Tractor Door V Pipes', 3, 'length_tractor_door_v_pipes', p['tractor_door_height']),
+        )
+    elif p['tractor_door_type'] == 'openable' and tractor_doors > 0:
+        parts = (
+            ('Tractor Door Purlin', 1, 'length_tractor_door_purlin', bay_width),
+            ('Tractor Door H Pipes', 6, 'length_tractor_door_h_pipes', bay_width / 2),
+            ('Tractor Door V Pipes', 4, 'length_tractor_door_v_pipes', p['tractor_door_height']),
+        )
+    else:
+        parts = ()
+
+    for name, pcs_per_door, field_name, default_length in parts:
+        length, master_id = master_length(p, field_name, default_length)
+        specs.append(component('doors', name, tractor_doors * pcs_per_door, length, master_id))
+
+    return specs
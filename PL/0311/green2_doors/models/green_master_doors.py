@@ -2,6 +2,8 @@ from odoo import models, fields, api
 from odoo.exceptions import ValidationError
 import logging
 
+from .. import engine as door_engine
+
 _logger = logging.getLogger(__name__)
 
 class GreenMasterDoors(models.Model):
@@ -106,35 +108,34 @@ class GreenMasterDoors(models.Model):
                                             help="Entry chambers only")
     
     total_door_cost = fields.Float('Total Door Cost', 
-                                  compute='_compute_door_totals', store=True, tracking=True)
+                                  compute='_compute_section_totals', store=True, tracking=True)
 
     # =============================================
     # COMPUTED METHODS
     # =============================================
-    @api.depends('standalone_doors_count', 'entry_chambers_count', 'door_component_ids.total_cost')
+    @api.depends('standalone_doors_count', 'entry_chambers_count')
     def _compute_door_totals(self):
         """Compute door totals using the formula: Door Components = X + Y, Chamber Components = Y"""
         for record in self:
             record.total_door_components = record.standalone_doors_count + record.entry_chambers_count
             record.total_chamber_components = record.entry_chambers_count
-            record.total_door_cost = sum(record.door_component_ids.mapped('total_cost'))
     
     @api.depends('door_component_ids.total_cost', 'asc_component_ids.total_cost', 
                  'frame_component_ids.total_cost', 'truss_component_ids.total_cost', 
                  'side_screen_component_ids.total_cost', 'lower_component_ids.total_cost')
     def _compute_section_totals(self):
-        """Override to include door costs in grand total"""
+        """Override to recompute on door line changes as well"""
         super()._compute_section_totals()
-        for record in self:
-            # Add door costs to the grand total
-            record.grand_total_cost = (
-                record.total_asc_cost + 
-                record.total_frame_cost + 
-                record.total_truss_cost + 
-                record.total_side_screen_cost + 
-                record.total_lower_cost + 
-                record.total_door_cost
-            )
+    
+    def _apply_section_totals(self, sections):
+        """Override to include door costs in grand total"""
+        super()._apply_section_totals(sections)
+        self.total_door_cost = sections.get('doors', {}).get('total_cost', 0.0)
+        # Add door costs to the grand total
+        self.grand_total_cost += self.total_door_cost
+    
+    def _get_component_line_fields(self):
+        return super()._get_component_line_fields() + ('door_component_ids',)
     
     # =============================================
     # ONCHANGE METHODS
@@ -169,169 +170,16 @@ class GreenMasterDoors(models.Model):
     # =============================================
     # CORE CALCULATION METHODS
     # =============================================
-    def _calculate_all_components(self):
+    def _get_engine_calculators(self):
         """Extend base calculation to add door components"""
-        super()._calculate_all_components()
-        if self.has_doors:
-            self._calculate_door_components()
-
-    def _calculate_door_components(self):
-        """Calculate door components based on configuration"""
-        if not self.has_doors:
-            return
-        
-        # Clear existing door components first (defensive programming)
-        # This ensures no duplicates even if _clear_all_components wasn't called
-        self.door_component_ids = [(5, 0, 0)]
-        
-        component_vals = []
-        
-        # =============================================
-        # STANDALONE DOORS (X) CALCULATIONS
-        # =============================================
-        if self.standalone_doors_count > 0:
-            # Door Column Pipe
-            column_pipe_length = self._get_length_master_value(self.length_column_pipe, 3.5)
-            component_vals.append(self._create_component_val(
-                'doors', 'Door Column Pipe', 
-                self.standalone_doors_count, 
-                column_pipe_length, 
-                self.length_column_pipe
-            ))
-            
-            # Door Purlin Pipe
-            purlin_pipe_length = self._get_length_master_value(self.length_purlin_pipe, self.bay_width)
-            component_vals.append(self._create_component_val(
-                'doors', 'Door Purlin Pipe', 
-                self.standalone_doors_count, 
-                purlin_pipe_length, 
-                self.length_purlin_pipe
-            ))
-        
-        # =============================================
-        # ENTRY CHAMBERS (Y) CALCULATIONS
-        # =============================================
-        if self.entry_chambers_count > 0:
-            # Get selected column length or default
-            selected_column_length = self.chamber_column_length.length_value if self.chamber_column_length else 3.0
-            
-            # Door Front Column: 3 pieces per chamber
-            component_vals.append(self._create_component_val(
-                'doors', 'Door Front Column', 
-                self.entry_chambers_count * 3,
-                selected_column_length, 
-                self.chamber_column_length
-            ))
-            
-            # Door Front Purlin: 1 piece × Bay Width per chamber
-            component_vals.append(self._create_component_val(
-                'doors', 'Door Front Purlin', 
-                self.entry_chambers_count, 
-                self.bay_width
-            ))
-            
-            # Door Side Purlin: 2 pieces × Chamber Depth per chamber
-            component_vals.append(self._create_component_val(
-                'doors', 'Door Side Purlin', 
-                self.entry_chambers_count * 2,
-                self.chamber_depth
-            ))
-            
-            # Door Bottom Purlin: 2 pieces × (Chamber Depth + 0.25) per chamber
-            component_vals.append(self._create_component_val(
-                'doors', 'Door Bottom Purlin', 
-                self.entry_chambers_count * 2,
-                self.chamber_depth + 0.25
-            ))
-        
-        # =============================================
-        # TRACTOR DOOR CALCULATIONS
-        # =============================================
-        if self.tractor_door_type != 'none' and self.nos_tractor_doors > 0:
-            
-            if self.tractor_door_type == 'vertical':
-                # VERTICAL TRACTOR DOOR COMPONENTS
-                
-                # Tractor Door Purlin
-                tractor_purlin_length = self._get_length_master_value(
-                    self.length_tractor_door_purlin, self.bay_width)
-                component_vals.append(self._create_component_val(
-                    'doors', 'Tractor Door Purlin', 
-                    self.nos_tractor_doors, 
-                    tractor_purlin_length,
-                    self.length_tractor_door_purlin
-                ))
-                
-                # Tractor Door H Pipes
-                tractor_h_pipes_length = self._get_length_master_value(
-                    self.length_tractor_door_h_pipes, self.bay_width / 2)
-                component_vals.append(self._create_component_val(
-                    'doors', 'Tractor Door H Pipes', 
-                    self.nos_tractor_doors * 2, 
-                    tractor_h_pipes_length,
-                    self.length_tractor_door_h_pipes
-                ))
-                
-                # Tractor Door Big H Pipes
-                tractor_big_h_pipes_length = self._get_length_master_value(
-                    self.length_tractor_door_big_h_pipes, self.bay_width)
-                component_vals.append(self._create_component_val(
-                    'doors', 'Tractor Door Big H Pipes', 
-                    self.nos_tractor_doors * 2, 
-                    tractor_big_h_pipes_length,
-                    self.length_tractor_door_big_h_pipes
-                ))
-                
-                # Tractor Door V Pipes
-                tractor_v_pipes_length = self._get_length_master_value(
-                    self.length_tractor_door_v_pipes, self.tractor_door_height)
-                component_vals.append(self._create_component_val(
-                    'doors', 'Tractor Door V Pipes', 
-                    self.nos_tractor_doors * 3, 
-                    tractor_v_pipes_length,
-                    self.length_tractor_door_v_pipes
-                ))
-                
-            elif self.tractor_door_type == 'openable':
-                # OPENABLE TRACTOR DOOR COMPONENTS
-                
-                # Tractor Door Purlin
-                tractor_purlin_length = self._get_length_master_value(
-                    self.length_tractor_door_purlin, self.bay_width)
-                component_vals.append(self._create_component_val(
-                    'doors', 'Tractor Door Purlin', 
-                    self.nos_tractor_doors, 
-                    tractor_purlin_length,
-                    self.length_tractor_door_purlin
-                ))
-                
-                # Tractor Door H Pipes: 6 pieces for openable
-                tractor_h_pipes_length = self._get_length_master_value(
-                    self.length_tractor_door_h_pipes, self.bay_width / 2)
-                component_vals.append(self._create_component_val(
-                    'doors', 'Tractor Door H Pipes', 
-                    self.nos_tractor_doors * 6, 
-                    tractor_h_pipes_length,
-                    self.length_tractor_door_h_pipes
-                ))
-                
-                # Tractor Door V Pipes: 4 pieces for openable
-                tractor_v_pipes_length = self._get_length_master_value(
-                    self.length_tractor_door_v_pipes, self.tractor_door_height)
-                component_vals.append(self._create_component_val(
-                    'doors', 'Tractor Door V Pipes', 
-                    self.nos_tractor_doors * 4, 
-                    tractor_v_pipes_length,
-                    self.length_tractor_door_v_pipes
-                ))
-        
-        # Create all door component lines
-        for val in component_vals:
-            try:
-                self.env['component.line'].create(val)
-                _logger.info(f"Created door component: {val['name']} - Nos: {val['nos']} - Length: {val['length']}")
-            except Exception as e:
-                _logger.error(f"Error creating door component {val.get('name', 'Unknown')}: {e}")
+        return super()._get_engine_calculators() + [door_engine.calculate]
+    
+    def _get_engine_params(self):
+        """Extend engine parameters with door configuration"""
+        params = super()._get_engine_params()
+        params.update(self._get_engine_values(door_engine.PARAM_FIELDS))
+        params['length_masters'].update(self._get_engine_length_masters(door_engine.LENGTH_MASTER_FIELDS))
+        return params
 
     # =============================================
     # EXTEND COMPONENT KEY GENERATION
@@ -53,71 +53,6 @@ class GreenMasterDoorsExtension(models.Model):
             })
             _logger.info("Cleared door components")
     
-    # ═══════════════════════════════════════════════════════════════
-    # EXTEND: Save Component Selections
-    # ═══════════════════════════════════════════════════════════════
-    def _save_component_selections_improved(self):
-        """Override to include door components in save"""
-        # Call parent to get base saved selections
-        saved_selections = super()._save_component_selections_improved()
-        
-        # Add door components if they exist
-        if hasattr(self, 'door_component_ids') and self.door_component_ids:
-            for component in self.door_component_ids:
-                component_key = self._generate_component_key(component.section, component.name)
-                
-                saved_selections[component_key] = {
-                    'original_name': component.name,
-                    'original_section': component.section,
-                    'pipe_id': component.pipe_id.id if component.pipe_id else False,
-                    'pipe_display_name': component.pipe_id.display_name if component.pipe_id else '',
-                    'use_length_master': component.use_length_master,
-                    'length_master_id': component.length_master_id.id if component.length_master_id else False,
-                    'length_master_value': component.length_master_id.length_value if component.length_master_id else 0.0,
-                    'custom_length': component.custom_length,
-                    'required': component.required,
-                    'notes': component.notes or '',
-                    'description': component.description or '',
-                    'section': component.section,
-                }
-            
-            _logger.info(f"Saved {len(self.door_component_ids)} door component selections")
-        
-        return saved_selections
-    
-    # ═══════════════════════════════════════════════════════════════
-    # EXTEND: Restore Component Selections
-    # ═══════════════════════════════════════════════════════════════
-    def _restore_component_selections_improved(self, saved_selections):
-        """Override to include door components in restore"""
-        # Call parent to restore base components
-        restoration_result = super()._restore_component_selections_improved(saved_selections)
-        
-        # Restore door components
-        if hasattr(self, 'door_component_ids') and self.door_component_ids:
-            door_restored_count = 0
-            
-            for component in self.door_component_ids:
-                component_key = self._generate_component_key(component.section, component.name)
-                
-                if component_key in saved_selections:
-                    selection_data = saved_selections[component_key]
-                    
-                    try:
-                        update_vals = self._build_component_update_values(selection_data)
-                        component.write(update_vals)
-                        door_restored_count += 1
-                        
-                    except Exception as e:
-                        error_msg = f"Door Component: {component.name}, Error: {str(e)}"
-                        restoration_result['failed_restorations'].append(error_msg)
-            
-            # Update restoration count
-            restoration_result['restored_count'] += door_restored_count
-            _logger.info(f"Restored {door_restored_count} door component selections")
-        
-        return restoration_result
-    
     # ═══════════════════════════════════════════════════════════════
     # EXTEND: Clear Pipe Selections
     # ═══════════════════════════════════════════════════════════════
@@ -133,23 +68,6 @@ class GreenMasterDoorsExtension(models.Model):
         # Then call parent to handle the rest and show notification
         return super().action_clear_pipe_selections()
     
-    # ═══════════════════════════════════════════════════════════════
-    # EXTEND: Component Count Methods (for statistics)
-    # ═══════════════════════════════════════════════════════════════
-    def _generate_recalculation_feedback(self, saved_selections, restoration_result, counts_before, counts_after):
-        """Override to include door counts in feedback"""
-        # Add door counts to the dictionaries
-        if hasattr(self, 'door_component_ids'):
-            if 'doors' not in counts_before:
-                counts_before['doors'] = 0
-            if 'doors' not in counts_after:
-                counts_after['doors'] = 0
-        
-        # Call parent with updated counts
-        return super()._generate_recalculation_feedback(
-            saved_selections, restoration_result, counts_before, counts_after
-        )
-    
     # ═══════════════════════════════════════════════════════════════
     # EXTEND: Component Collection for Various Operations
     # ═══════════════════════════════════════════════════════════════
@@ -22,6 +22,7 @@
         'security/ir.model.access.csv',
         'security/record_rules.xml',
         'data/mrp_bom_cost_calculator_data.xml',
+        'data/bom_cost_calculation_cron.xml',
         'wizard/product_selection_wizard_view.xml',
         'wizard/product_additional_cost_wizard_view.xml',
         'wizard/product_three_column_wizard_views.xml',
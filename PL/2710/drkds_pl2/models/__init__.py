@@ -1,3 +1,4 @@
 from . import bom_cost_calculator
 from . import bom_cost_calculator_product_line
-from . import report_log
\ No newline at end of file
+from . import report_log
+from . import bom_explosion_invalidation
\ No newline at end of file
@@ -1,14 +1,51 @@
 from odoo import models, fields, api, _
 from odoo.exceptions import UserError
+from odoo.tools.lru import LRU
+from collections import namedtuple
 import logging
+import time
 
 _logger = logging.getLogger(__name__)
 
+# One exploded BOM: batch totals for bom.product_qty, the cost lines as
+# (kind, level relative to this BOM, values) and the pre-calculated child
+# calculators it relied on as (product_id, (calculator_id, write_date)).
+BomExplosion = namedtuple('BomExplosion', ['material', 'operation', 'duration', 'lines', 'calculators', 'complete'])
+
+# Explosions shared by every calculation of this process; keys embed the
+# explosion generation, so any change simply stops matching old entries.
+_bom_explosion_cache = LRU(4096)
+
+# Insert-only log of the transactions that changed data a BOM explosion
+# reads; its newest id is the explosion generation. Rows are inserted by the
+# changing transaction, so a reader sees a generation when it sees the data
+# behind it, and concurrent writers never contend on a shared counter.
+EXPLOSION_LOG_TABLE = 'drkds_pl2_explosion_invalidation'
+EXPLOSION_CHANGED_KEY = 'drkds_pl2.explosion_changed'
+
+# Cron jobs sharing the background costing queue, each in its own worker
+COSTING_WORKER_CRONS = (
+    'drkds_pl2.ir_cron_bom_cost_calculation',
+    'drkds_pl2.ir_cron_bom_cost_calculation_2',
+    'drkds_pl2.ir_cron_bom_cost_calculation_3',
+)
+
+COST_LINE_LABELS = {
+    'raw': 'Raw Material',
+    'precalculated': 'Component with Pre-calculated Cost',
+    'subassembly': 'Component from BOM',
+}
+
 class BOMCostCalculator(models.Model):
     _name = 'mrp.bom.cost.calculator'
     _description = 'BOM Cost Calculator'
     _order = 'id desc'
 
+    # Product lines costed per committed chunk in background calculations
+    _costing_batch_size = 20
+    # Seconds a cron run may spend before handing over to the next run
+    _costing_time_limit = 60
+
     name = fields.Char('Reference', default='New', readonly=True)
     date = fields.Datetime('Calculation Date', default=fields.Datetime.now, required=True)
     
@@ -23,8 +60,12 @@ class BOMCostCalculator(models.Model):
     include_operations = fields.Boolean('Include Operations Cost', default=True)
     state = fields.Selection([
         ('draft', 'Draft'),
+        ('calculating', 'Calculating'),
         ('calculated', 'Calculated')
     ], string='Status', default='draft')
+    # Company of the user who queued a background calculation: product costs
+    # and BOMs are company dependent, the cron must cost in the same company
+    costing_company_id = fields.Many2one('res.company', 'Costing Company', readonly=True)
     
     total_material_cost = fields.Float('Total Material Cost', readonly=True)
     total_operation_cost = fields.Float('Total Operation Cost', readonly=True)
@@ -52,6 +93,11 @@ class BOMCostCalculator(models.Model):
     unit_cost = fields.Float('Cost Per Unit', compute='_compute_unit_cost', store=True)
     sequence = fields.Integer(string='Sequence', default=10)
 
+    # Progress of background calculations
+    costing_line_count = fields.Integer('Products', compute='_compute_costing_progress')
+    costing_done_count = fields.Integer('Products Costed', compute='_compute_costing_progress')
+    costing_progress = fields.Float('Progress (%)', compute='_compute_costing_progress')
+
 
     @api.depends('total_cost', 'bom_id')
     def _compute_unit_cost(self):
@@ -64,6 +110,25 @@ class BOMCostCalculator(models.Model):
                 record.unit_cost = record.total_cost
                 #record.freight_cost = record.total_cost
     
+    @api.depends('product_line_ids.state')
+    def _compute_costing_progress(self):
+        groups = self.env['mrp.bom.cost.calculator.product.line'].read_group(
+            [('calculator_id', 'in', self.ids)],
+            ['calculator_id'],
+            ['calculator_id', 'state'],
+            lazy=False,
+        )
+        counts = {}
+        for group in groups:
+            counts.setdefault(group['calculator_id'][0], {})[group['state']] = group['__count']
+        
+        for record in self:
+            record_counts = counts.get(record.id, {})
+            record.costing_line_count = sum(record_counts.values())
+            record.costing_done_count = record.costing_line_count - record_counts.get('queued', 0)
+            record.costing_progress = (record.costing_done_count * 100.0 / record.costing_line_count
+                                       if record.costing_line_count else 0.0)
+    
     @api.constrains('product_id', 'bom_id', 'is_multi_product')
     def _check_required_fields(self):
         for record in self:
@@ -188,180 +253,305 @@ class BOMCostCalculator(models.Model):
 
    
 
-    def _calculate_bom_cost(self, bom, processed_boms=None, create_lines=True, level=0, product=None):
+    def init(self):
+        super().init()
+        self.env.cr.execute(f"""
+            CREATE TABLE IF NOT EXISTS {EXPLOSION_LOG_TABLE} (id bigserial PRIMARY KEY)
+        """)
+
+    def _new_costing_run(self):
+        """State shared by every BOM explosion of one costing action"""
+        return {
+            'generation': self._get_explosion_generation(),
+            'memo': {},
+            'ancestors': set(),
+            'calculators': None,
+            'hits': 0,
+            'misses': 0,
+        }
+
+    @api.model
+    def _invalidate_explosions(self):
+        """Stop reusing cached BOM explosions once the transaction commits.
+
+        Called when a BOM, BOM line, operation, work center, UoM or product
+        cost changes. Pre-calculated child calculators are validated
+        separately per entry.
+        """
+        data = self.env.cr.precommit.data
+        if not data.get(EXPLOSION_CHANGED_KEY):
+            data[EXPLOSION_CHANGED_KEY] = True
+            self.env.cr.precommit.add(self._log_explosion_change)
+
+    def _log_explosion_change(self):
+        if self.env.cr.precommit.data.pop(EXPLOSION_CHANGED_KEY, False):
+            self.env.cr.execute(f"INSERT INTO {EXPLOSION_LOG_TABLE} DEFAULT VALUES")
+
+    def _get_explosion_generation(self):
+        """Current explosion generation, None while this transaction holds
+        uncommitted changes no other transaction may cache"""
+        if self.env.cr.precommit.data.get(EXPLOSION_CHANGED_KEY):
+            return None
+        self.env.cr.execute(f"SELECT max(id) FROM {EXPLOSION_LOG_TABLE}")
+        return self.env.cr.fetchone()[0] or 0
+
+    @api.model
+    def _gc_explosion_invalidations(self):
+        """Drop the log rows older than the newest one"""
+        self.env.cr.execute(f"DELETE FROM {EXPLOSION_LOG_TABLE} WHERE id < (SELECT max(id) FROM {EXPLOSION_LOG_TABLE})")
+        _logger.info(f"Removed {self.env.cr.rowcount} BOM explosion invalidation rows")
+
+    def _get_precalculated_calculator(self, product, run):
+        """Latest calculated calculator of ``product``, looked up once per run for all products"""
+        if run['calculators'] is None:
+            run['calculators'] = {}
+            calculators = self.search([('state', '=', 'calculated'), ('product_id', '!=', False)],
+                                      order='create_date desc')
+            for calculator in calculators:
+                run['calculators'].setdefault(calculator.product_id.id, calculator)
+        return run['calculators'].get(product.id, self.browse())
+
+    def _calculator_stamp(self, product, run):
+        calculator = self._get_precalculated_calculator(product, run)
+        return (calculator.id, calculator.write_date) if calculator else None
+
+    def _explode_bom(self, bom, product, run):
+        """Batch totals and cost lines of ``bom`` for ``product``.
+
+        Results are memoized for the run and kept in a process-wide LRU keyed by
+        (bom, product, company) plus the explosion generation, so a sub-assembly
+        used by many kits or products is exploded once. Returns None on a BOM cycle.
         """
-        Calculate BOM cost where:
+        key = (self.env.cr.dbname, run['generation'], bom.id, product.id,
+               self.env.company.id, self.include_operations)
+        shared = run['generation'] is not None
+        explosion = run['memo'].get(key)
+        if explosion is None and shared:
+            explosion = _bom_explosion_cache.get(key)
+            if explosion and any(self._calculator_stamp(self.env['product.product'].browse(product_id), run) != stamp
+                                 for product_id, stamp in explosion.calculators):
+                explosion = None
+            if explosion is not None:
+                run['memo'][key] = explosion
+        if explosion is not None:
+            run['hits'] += 1
+            return explosion
+
+        if bom.id in run['ancestors']:
+            return None
+        run['misses'] += 1
+        run['ancestors'].add(bom.id)
+        try:
+            explosion = self._compute_bom_explosion(bom, product, run)
+        finally:
+            run['ancestors'].discard(bom.id)
+
+        # Explosions cut short by a cycle depend on where they were reached from
+        if explosion.complete:
+            run['memo'][key] = explosion
+            if shared:
+                _bom_explosion_cache[key] = explosion
+        return explosion
+
+    def _compute_bom_explosion(self, bom, product, run):
+        """
+        Explode one BOM level where:
         - Material costs are only included for raw materials (no BOM)
         - Components from BOMs only consider quantity ratios
         - Handles unit costs from pre-calculated components
         """
-        if not bom:
-            return 0, 0, 0
-            
-        # Use provided product or fall back to the one on the record
-        product_to_use = product or self.product_id
-                
-        if processed_boms is None:
-            processed_boms = set()
-                
-        if bom.id in processed_boms:
-            return 0, 0, 0
-        processed_boms.add(bom.id)
-            
         material_total = 0
         operation_total = 0
         total_duration = 0
+        lines = []
+        calculators = {}
+        complete = True
 
         # Operation costs
         if self.include_operations:
             for operation in bom.operation_ids:
-                if operation._skip_operation_line(product_to_use):
+                if operation._skip_operation_line(product):
                     continue
-                        
+
                 duration_expected = (
-                    operation.time_cycle or 
-                    operation.time_cycle_manual or 
-                    operation.duration_expected or 
+                    operation.time_cycle or
+                    operation.time_cycle_manual or
+                    operation.duration_expected or
                     0.0
                 )
-                
+
                 total_duration += duration_expected
-                
-                cost_per_minute = operation._total_cost_per_hour() / 60
-                operation_cost = duration_expected * cost_per_minute
-                    
-                if create_lines:
-                    self.env['mrp.bom.cost.calculator.line'].create({
-                        'calculator_id': self.id,
-                        'name': f"{bom.product_tmpl_id.display_name} - {operation.workcenter_id.name} ({operation.name or 'Operation'})",
-                        'cost_type': 'operation',
-                        'operation_id': operation.id,
-                        'duration': duration_expected,
-                        'unit_cost': operation._total_cost_per_hour(),
-                        'cost': operation_cost,
-                        'bom_level': level,
-                        'bom_qty': bom.product_qty,
-                    })
+
+                cost_per_hour = operation._total_cost_per_hour()
+                operation_cost = duration_expected * cost_per_hour / 60
+
+                lines.append(('operation', 0, {
+                    'cost_type': 'operation',
+                    'operation_id': operation.id,
+                    'duration': duration_expected,
+                    'unit_cost': cost_per_hour,
+                    'cost': operation_cost,
+                    'bom_qty': bom.product_qty,
+                }))
 
                 operation_total += operation_cost
 
         # Material costs
-        for line in bom.bom_line_ids:
-            if line._skip_bom_line(product_to_use):
-                continue
+        bom_lines = bom.bom_line_ids.filtered(lambda l: not l._skip_bom_line(product))
+        child_boms = self.env['mrp.bom']._bom_find(
+            bom_lines.product_id,
+            company_id=bom.company_id.id,
+            picking_type=False
+        )
 
+        for line in bom_lines:
             line_qty = line.product_uom_id._compute_quantity(
                 line.product_qty, line.product_id.uom_id)
 
-            child_bom = self.env['mrp.bom']._bom_find(
-                products=line.product_id,
-                company_id=bom.company_id.id,
-                picking_type=False
-            ).get(line.product_id)
-
-            if child_bom:
-                # Look for an existing calculator with unit cost for this component
-                child_calculator = self.env['mrp.bom.cost.calculator'].search([
-                    ('product_id', '=', line.product_id.id),
-                    ('state', '=', 'calculated')
-                ], limit=1, order='create_date desc')
-                
-                # Check if we can use the existing calculator
-                if child_calculator:
-                    # Calculate unit cost based on BOM quantity if available
-                    if child_calculator.bom_id and child_calculator.bom_id.product_qty > 0:
-                        unit_cost = child_calculator.total_cost / child_calculator.bom_id.product_qty
-                    else:
-                        unit_cost = child_calculator.total_cost
-                    
-                    # Handle UoM conversions if needed
-                    if child_calculator.bom_id and child_calculator.bom_id.product_uom_id.id != line.product_uom_id.id:
-                        # Convert the unit cost to the line's UoM
-                        converted_cost = child_calculator.bom_id.product_uom_id._compute_price(
-                            unit_cost, line.product_uom_id)
-                        component_cost = converted_cost * line.product_qty
-                    else:
-                        component_cost = unit_cost * line_qty
-                        
-                    material_total += component_cost
-                    
-                    if create_lines:
-                        self.env['mrp.bom.cost.calculator.line'].create({
-                            'calculator_id': self.id,
-                            'name': f"{line.product_id.display_name} (Component with Pre-calculated Cost)",
-                            'cost_type': 'material',
-                            'product_id': line.product_id.id,
-                            'quantity': line_qty,
-                            'unit_cost': unit_cost,
-                            'cost': component_cost,
-                            'bom_level': level,
-                            'bom_qty': bom.product_qty,
-                        })
-                else:
-                    # For components with BOMs, we only pass through their costs 
-                    # without adding new material costs
-                    child_material, child_operation, child_duration = self._calculate_bom_cost(
-                        child_bom, 
-                        processed_boms.copy(),
-                        create_lines=True,
-                        level=level + 1,
-                        product=line.product_id
-                    )
-                    
-                    # Add child costs considering the quantity ratio
-                    # We need to ensure UoM compatibility
-                    if child_bom.product_uom_id.id != line.product_uom_id.id:
-                        # Convert child BOM quantity to line's UoM
-                        child_bom_qty_in_line_uom = child_bom.product_uom_id._compute_quantity(
-                            child_bom.product_qty, line.product_uom_id)
-                        qty_ratio = line.product_qty / (child_bom_qty_in_line_uom or 1.0)
-                    else:
-                        qty_ratio = line.product_qty / (child_bom.product_qty or 1.0)
-                    
-                    material_total += child_material * qty_ratio
-                    operation_total += child_operation * qty_ratio
-                    total_duration += child_duration * qty_ratio
-                    
-                    if create_lines:
-                        # Calculate unit cost based on BOM quantity
-                        unit_cost = child_material / (child_bom.product_qty or 1.0)
-                        
-                        # If UoMs differ, convert the unit cost
-                        if child_bom.product_uom_id.id != line.product_uom_id.id:
-                            unit_cost = child_bom.product_uom_id._compute_price(
-                                unit_cost, line.product_uom_id)
-                        
-                        self.env['mrp.bom.cost.calculator.line'].create({
-                            'calculator_id': self.id,
-                            'name': f"{line.product_id.display_name} (Component from BOM)",
-                            'cost_type': 'material',
-                            'product_id': line.product_id.id,
-                            'quantity': line_qty,
-                            'unit_cost': unit_cost,
-                            'cost': child_material * qty_ratio,
-                            'bom_level': level,
-                            'bom_qty': bom.product_qty,
-                        })
-                
-            else:
+            child_bom = child_boms.get(line.product_id)
+
+            if not child_bom:
                 # Only add material cost for raw materials (no BOM)
                 component_cost = line.product_id.standard_price * line_qty
                 material_total += component_cost
 
-                if create_lines:
-                    self.env['mrp.bom.cost.calculator.line'].create({
-                        'calculator_id': self.id,
-                        'name': f"{line.product_id.display_name} (Raw Material)",
-                        'cost_type': 'material',
-                        'product_id': line.product_id.id,
-                        'quantity': line_qty,
-                        'unit_cost': line.product_id.standard_price,
-                        'cost': component_cost,
-                        'bom_level': level,
-                        'bom_qty': bom.product_qty,
-                    })
-
-        return material_total, operation_total, total_duration
+                lines.append(('raw', 0, {
+                    'cost_type': 'material',
+                    'product_id': line.product_id.id,
+                    'quantity': line_qty,
+                    'unit_cost': line.product_id.standard_price,
+                    'cost': component_cost,
+                    'bom_qty': bom.product_qty,
+                }))
+                continue
+
+            # Look for an existing calculator with unit cost for this component
+            child_calculator = self._get_precalculated_calculator(line.product_id, run)
+            calculators[line.product_id.id] = self._calculator_stamp(line.product_id, run)
+
+            if child_calculator:
+                # Calculate unit cost based on BOM quantity if available
+                if child_calculator.bom_id and child_calculator.bom_id.product_qty > 0:
+                    unit_cost = child_calculator.total_cost / child_calculator.bom_id.product_qty
+                else:
+                    unit_cost = child_calculator.total_cost
+
+                # Handle UoM conversions if needed
+                if child_calculator.bom_id and child_calculator.bom_id.product_uom_id.id != line.product_uom_id.id:
+                    # Convert the unit cost to the line's UoM
+                    converted_cost = child_calculator.bom_id.product_uom_id._compute_price(
+                        unit_cost, line.product_uom_id)
+                    component_cost = converted_cost * line.product_qty
+                else:
+                    component_cost = unit_cost * line_qty
+
+                material_total += component_cost
+
+                lines.append(('precalculated', 0, {
+                    'cost_type': 'material',
+                    'product_id': line.product_id.id,
+                    'quantity': line_qty,
+                    'unit_cost': unit_cost,
+                    'cost': component_cost,
+                    'bom_qty': bom.product_qty,
+                }))
+                continue
+
+            # For components with BOMs, we only pass through their costs
+            # without adding new material costs
+            child = self._explode_bom(child_bom, line.product_id, run)
+            if child is None:
+                child = BomExplosion(0, 0, 0, (), (), False)
+            complete = complete and child.complete
+            calculators.update(child.calculators)
+
+            # Add child costs considering the quantity ratio
+            # We need to ensure UoM compatibility
+            if child_bom.product_uom_id.id != line.product_uom_id.id:
+                # Convert child BOM quantity to line's UoM
+                child_bom_qty_in_line_uom = child_bom.product_uom_id._compute_quantity(
+                    child_bom.product_qty, line.product_uom_id)
+                qty_ratio = line.product_qty / (child_bom_qty_in_line_uom or 1.0)
+            else:
+                qty_ratio = line.product_qty / (child_bom.product_qty or 1.0)
+
+            material_total += child.material * qty_ratio
+            operation_total += child.operation * qty_ratio
+            total_duration += child.duration * qty_ratio
+
+            # Calculate unit cost based on BOM quantity
+            unit_cost = child.material / (child_bom.product_qty or 1.0)
+
+            # If UoMs differ, convert the unit cost
+            if child_bom.product_uom_id.id != line.product_uom_id.id:
+                unit_cost = child_bom.product_uom_id._compute_price(
+                    unit_cost, line.product_uom_id)
+
+            lines.extend((kind, relative_level + 1, vals) for kind, relative_level, vals in child.lines)
+            lines.append(('subassembly', 0, {
+                'cost_type': 'material',
+                'product_id': line.product_id.id,
+                'quantity': line_qty,
+                'unit_cost': unit_cost,
+                'cost': child.material * qty_ratio,
+                'bom_qty': bom.product_qty,
+            }))
+
+        return BomExplosion(material_total, operation_total, total_duration,
+                            tuple(lines), tuple(calculators.items()), complete)
+
+    def _get_explosion_line_vals(self, explosion, level, create_lines):
+        """Cost line values of an explosion placed at ``level``.
+
+        Without ``create_lines`` the BOM's own lines are skipped but its
+        sub-assemblies still report theirs, as the recursive version did.
+        """
+        entries = [entry for entry in explosion.lines if create_lines or entry[1] > 0]
+        products = self.env['product.product'].browse(
+            {vals['product_id'] for kind, relative_level, vals in entries if kind != 'operation'})
+        product_names = dict(zip(products.ids, products.mapped('display_name')))
+        operations = self.env['mrp.routing.workcenter'].browse(
+            {vals['operation_id'] for kind, relative_level, vals in entries if kind == 'operation'})
+        operation_names = {
+            operation.id: f"{operation.bom_id.product_tmpl_id.display_name} - {operation.workcenter_id.name} ({operation.name or 'Operation'})"
+            for operation in operations
+        }
+
+        vals_list = []
+        for kind, relative_level, vals in entries:
+            if kind == 'operation':
+                name = operation_names[vals['operation_id']]
+            else:
+                name = f"{product_names[vals['product_id']]} ({COST_LINE_LABELS[kind]})"
+            vals_list.append(dict(vals, calculator_id=self.id, name=name, bom_level=level + relative_level))
+        return vals_list
+
+    def _calculate_bom_cost(self, bom, create_lines=True, level=0, product=None, run=None, line_vals=None):
+        """Batch material, operation and duration totals of ``bom``.
+        
+        Cost line values are appended to ``line_vals`` for the caller to create
+        in one go; without it the lines are created right away.
+        """
+        if not bom:
+            return 0, 0, 0
+
+        # Use provided product or fall back to the one on the record
+        product_to_use = product or self.product_id
+        if run is None:
+            run = self._new_costing_run()
+
+        explosion = self._explode_bom(bom, product_to_use, run)
+        if explosion is None:
+            return 0, 0, 0
+
+        vals_list = self._get_explosion_line_vals(explosion, level, create_lines)
+        if line_vals is not None:
+            line_vals.extend(vals_list)
+        elif vals_list:
+            self.env['mrp.bom.cost.calculator.line'].create(vals_list)
+        _logger.info(f"BOM {bom.display_name}: {run['misses']} explosions computed, {run['hits']} reused")
+        return explosion.material, explosion.operation, explosion.duration
+
         
     def action_calculate_cost(self):
         """Calculate cost for single product mode"""
@@ -370,7 +560,10 @@ class BOMCostCalculator(models.Model):
             raise UserError(_('Please select a BOM first.'))
                 
         self.cost_details_ids.unlink()
-        material_cost, operation_cost, total_duration = self._calculate_bom_cost(self.bom_id, level=0, product=None)
+        line_vals = []
+        material_cost, operation_cost, total_duration = self._calculate_bom_cost(
+            self.bom_id, level=0, product=None, line_vals=line_vals)
+        self.env['mrp.bom.cost.calculator.line'].create(line_vals)
             
         self.total_material_cost = material_cost
         self.total_operation_cost = operation_cost
@@ -435,185 +628,243 @@ class BOMCostCalculator(models.Model):
         """Calculate costs for all selected products"""
         self.ensure_one()
         
-        import logging
-        _logger = logging.getLogger(__name__)
+        if not self.product_line_ids:
+            raise UserError(_('Please select at least one product.'))
+        
+        # Sub-assemblies shared between the products are exploded once
+        run = self._new_costing_run()
+        # Cost lines of all products, created together at the end
+        line_vals = []
+        for line in self.product_line_ids:
+            line_vals.extend(self._calculate_product_line(line, run))
+        self.env['mrp.bom.cost.calculator.line'].create(line_vals)
+        
+        self._aggregate_product_lines()
+        return True
+
+    def action_calculate_all_costs_background(self):
+        """Queue the product lines for the costing cron, which works through them in chunks"""
+        self.ensure_one()
         
         if not self.product_line_ids:
             raise UserError(_('Please select at least one product.'))
         
-        # Initialize totals for the main calculator
-        total_material_cost = 0.0
-        total_operation_cost = 0.0
-        total_jobwork_cost = 0.0
-        total_freight_cost = 0.0
-        total_packing_cost = 0.0
-        total_cushion = 0.0
-        total_gross_profit = 0.0
-        total_other_cost = 0.0  
-        total_operation_cost_manual = 0.0
+        self.product_line_ids.write({'state': 'queued', 'error': False})
+        self.write({'state': 'calculating', 'costing_company_id': self.env.company.id})
+        self._trigger_costing_workers()
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'display_notification',
+            'params': {
+                'title': _('Calculation Scheduled'),
+                'message': _('The products will be costed in the background. Reload to follow the progress.'),
+                'type': 'info',
+            }
+        }
+
+    def _calculate_product_line(self, line, run):
+        """Cost one product line, update its product's price levels and return its cost line values"""
+        _logger.info(f"Processing product: {line.product_id.name} (ID: {line.product_id.id})")
+        product = line.product_id
+        
+        # Get additional costs from product
+        jobwork_cost = product.total_jobwork_cost or 0.0
+        freight_cost = product.total_freight_cost or 0.0
+        packing_cost = product.total_packing_cost or 0.0
+        cushion_value = product.cushion or 0.0
+        gross_profit = product.gross_profit_add or 0.0
+        total_operation_cost_manual = product.total_opertation_cost_manual or 0.0
         
-        for line in self.product_line_ids:
-            _logger.info(f"Processing product: {line.product_id.name} (ID: {line.product_id.id})")
+        per_unit_other_cost = (
+            jobwork_cost + 
+            freight_cost + 
+            packing_cost + 
+            cushion_value + 
+            gross_profit
+        )
+        
+        line_vals = []
+        if not line.is_manufacture or not line.bom_id:
+            _logger.info(f"Non-manufactured product or no BOM: {product.name}")
             
-            if not line.is_manufacture or not line.bom_id:
-                _logger.info(f"Non-manufactured product or no BOM: {line.product_id.name}")
-                
-                line.write({
-                    'state': 'calculated',
-                    'material_cost': line.product_id.standard_price,
-                })
-                
-                # Add to calculator totals
-                total_material_cost += line.product_id.standard_price
-                
-                # Get additional costs from product
-                jobwork_cost = line.product_id.total_jobwork_cost or 0.0
-                freight_cost = line.product_id.total_freight_cost or 0.0
-                packing_cost = line.product_id.total_packing_cost or 0.0
-                cushion_value = line.product_id.cushion or 0.0
-                gross_profit = line.product_id.gross_profit_add or 0.0
-                total_operation_cost_manual = line.product_id.total_opertation_cost_manual or 0.0
-                
-                # Log cost values for debugging
-                _logger.info(f"Cost values: material={line.product_id.standard_price}, jobwork={jobwork_cost}, "
-                             f"freight={freight_cost}, packing={packing_cost}, cushion={cushion_value}, "
-                             f"gross_profit={gross_profit}")
-                
-                other_cost = (
-                    jobwork_cost + 
-                    freight_cost + 
-                    packing_cost + 
-                    cushion_value + 
-                    gross_profit
-                )
-                
-                # Determine operation cost
-                if line.product_id.calculate_operation_cost:
-                    operation_cost = 0.0  # Typically 0 for non-manufactured products
-                else:
-                    operation_cost = total_operation_cost_manual
-                
-                line_total_cost = line.product_id.standard_price + operation_cost + other_cost
-                
-                # Calculate price levels 
-                _logger.info(f"Calculating price levels for {line.product_id.name}")
-                
-                level1price = line_total_cost + (line.product_id.level1Add or 0.0)
-                level2price = level1price + (line.product_id.level2Add or 0.0)
-                level3price = level2price + (line.product_id.level3Add or 0.0)
-                level4price = level3price + (line.product_id.level4Add or 0.0)
-                
-                _logger.info(f"Calculated prices: level1={level1price}, level2={level2price}, level3={level3price}, level4={level4price}")
-                
-                line.product_id.write({
-                    'level1price': level1price,
-                    'level2price': level2price,
-                    'level3price': level3price,
-                    'level4price': level4price,
-                })
-                
-                continue
+            line.write({
+                'state': 'calculated',
+                'material_cost': product.standard_price,
+                'error': False,
+            })
+            
+            # Determine operation cost
+            if product.calculate_operation_cost:
+                operation_cost = 0.0  # Typically 0 for non-manufactured products
+            else:
+                operation_cost = total_operation_cost_manual
             
-            # Temporarily store the current product_id
-            original_product_id = self.product_id
+            unit_cost = product.standard_price + operation_cost + per_unit_other_cost
+        else:
+            material_cost, calculated_operation_cost, total_duration = self._calculate_bom_cost(
+                line.bom_id, 
+                level=0,
+                create_lines=False,
+                product=product,
+                run=run,
+                line_vals=line_vals
+            )
             
-            # Set the product_id to the line's product for the calculation
-            self.product_id = line.product_id
+            # Determine operation cost based on the flag
+            if product.calculate_operation_cost:
+                operation_cost = calculated_operation_cost
+            else:
+                operation_cost = total_operation_cost_manual
             
-            try:
-                material_cost, calculated_operation_cost, total_duration = self._calculate_bom_cost(
-                    line.bom_id, 
-                    level=0,
-                    create_lines=False,
-                    product=line.product_id 
-                )
-                
-                # Get additional costs from product
-                jobwork_cost = line.product_id.total_jobwork_cost or 0.0
-                freight_cost = line.product_id.total_freight_cost or 0.0
-                packing_cost = line.product_id.total_packing_cost or 0.0
-                cushion_value = line.product_id.cushion or 0.0
-                gross_profit = line.product_id.gross_profit_add or 0.0
-                total_operation_cost_manual = line.product_id.total_opertation_cost_manual or 0.0
-                
-                # Determine operation cost based on the flag
-                if line.product_id.calculate_operation_cost:
-                    operation_cost = calculated_operation_cost
-                else:
-                    operation_cost = total_operation_cost_manual
-                
-                # Calculate the per-unit other cost
-                per_unit_other_cost = (
-                    jobwork_cost + 
-                    freight_cost + 
-                    packing_cost + 
-                    cushion_value + 
-                    gross_profit
-                )
-                
-                # Scale by BOM quantity
-                bom_qty = line.bom_id.product_qty or 1.0
-                other_cost = per_unit_other_cost * bom_qty
-                    
-                # Update product line
-                line.write({
-                    'material_cost': material_cost,
-                    'operation_cost': operation_cost,
-                    'jobwork_cost': jobwork_cost * bom_qty,
-                    'freight_cost': freight_cost * bom_qty,
-                    'packing_cost': packing_cost * bom_qty,
-                    'cushion': cushion_value * bom_qty,
-                    'gross_profit_add': gross_profit * bom_qty,
-                    'other_cost': other_cost,
-                    'state': 'calculated'
-                })
+            # Scale by BOM quantity
+            bom_qty = line.bom_id.product_qty or 1.0
+            other_cost = per_unit_other_cost * bom_qty
                 
-                # Add to calculator totals
-                total_material_cost += material_cost
-                total_operation_cost += operation_cost
-                total_other_cost += other_cost
-                
-                # Calculate line total cost
-                line_total_cost = material_cost + operation_cost + other_cost
-                
-                # Calculate and update price levels in product master
-                _logger.info(f"Calculating price levels for manufactured product {line.product_id.name}")
-                
-                level1price = (line_total_cost / bom_qty) + (line.product_id.level1Add or 0.0)
-                level2price = level1price + (line.product_id.level2Add or 0.0)
-                level3price = level2price + (line.product_id.level3Add or 0.0)
-                level4price = level3price + (line.product_id.level4Add or 0.0)
-                
-                _logger.info(f"Calculated prices: level1={level1price}, level2={level2price}, level3={level3price}, level4={level4price}")
-                
-                line.product_id.write({
-                    'level1price': level1price,
-                    'level2price': level2price,
-                    'level3price': level3price,
-                    'level4price': level4price,
-                })
-                
-            finally:
-                # Restore the original product_id
-                self.product_id = original_product_id
+            # Update product line
+            line.write({
+                'material_cost': material_cost,
+                'operation_cost': operation_cost,
+                'jobwork_cost': jobwork_cost * bom_qty,
+                'freight_cost': freight_cost * bom_qty,
+                'packing_cost': packing_cost * bom_qty,
+                'cushion': cushion_value * bom_qty,
+                'gross_profit_add': gross_profit * bom_qty,
+                'other_cost': other_cost,
+                'state': 'calculated',
+                'error': False,
+            })
+            
+            unit_cost = (material_cost + operation_cost + other_cost) / bom_qty
+        
+        # Calculate and update price levels in product master
+        level1price = unit_cost + (product.level1Add or 0.0)
+        level2price = level1price + (product.level2Add or 0.0)
+        level3price = level2price + (product.level3Add or 0.0)
+        level4price = level3price + (product.level4Add or 0.0)
         
-        # Calculate total cost for the entire calculator
-        line_total_cost = total_material_cost + total_operation_cost + total_other_cost
+        _logger.info(f"Calculated prices: level1={level1price}, level2={level2price}, level3={level3price}, level4={level4price}")
+        
+        product.write({
+            'level1price': level1price,
+            'level2price': level2price,
+            'level3price': level3price,
+            'level4price': level4price,
+        })
+        return line_vals
+
+    def _aggregate_product_lines(self):
+        """Total the calculated product lines into the calculator"""
+        self.ensure_one()
+        lines = self.product_line_ids.filtered(lambda l: l.state == 'calculated')
+        # Operation and other costs of purchased products are not part of the totals
+        manufactured = lines.filtered(lambda l: l.is_manufacture and l.bom_id)
+        total_material_cost = sum(lines.mapped('material_cost'))
+        total_operation_cost = sum(manufactured.mapped('operation_cost'))
+        total_other_cost = sum(manufactured.mapped('other_cost'))
         
         self.write({
             'total_material_cost': total_material_cost,
             'total_operation_cost': total_operation_cost,
-            'total_jobwork_cost': sum(line.jobwork_cost for line in self.product_line_ids),
-            'total_freight_cost': sum(line.freight_cost for line in self.product_line_ids),
-            'total_packing_cost': sum(line.packing_cost for line in self.product_line_ids),
-            'cushion': sum(line.cushion for line in self.product_line_ids),
-            'gross_profit_add': sum(line.gross_profit_add for line in self.product_line_ids),
+            'total_jobwork_cost': sum(lines.mapped('jobwork_cost')),
+            'total_freight_cost': sum(lines.mapped('freight_cost')),
+            'total_packing_cost': sum(lines.mapped('packing_cost')),
+            'cushion': sum(lines.mapped('cushion')),
+            'gross_profit_add': sum(lines.mapped('gross_profit_add')),
             'other_cost': total_other_cost,
-            'total_cost': line_total_cost,
+            'total_cost': total_material_cost + total_operation_cost + total_other_cost,
             'state': 'calculated'
         })
-        
-        return True
+
+    @api.model
+    def _cron_calculate_queued_lines(self):
+        """Cost queued product lines in committed chunks until the time budget is used"""
+        deadline = time.monotonic() + self._costing_time_limit
+        self._finish_calculations()
+        while True:
+            lines = self._claim_queued_lines()
+            if not lines:
+                return
+            for calculator in lines.calculator_id:
+                chunk = lines.filtered(lambda l: l.calculator_id == calculator)
+                calculator = calculator.with_company(calculator.costing_company_id)
+                calculator._calculate_queued_chunk(chunk.with_env(calculator.env))
+            self._finish_calculations()
+            self._commit_costing_progress()
+            if time.monotonic() > deadline:
+                # Out of time: continue in fresh cron runs instead of hitting the worker limit
+                self._trigger_costing_workers()
+                return
+
+    @api.model
+    def _trigger_costing_workers(self):
+        """Start every costing cron, which then claim chunks of the queue in parallel"""
+        for xmlid in COSTING_WORKER_CRONS:
+            cron = self.env.ref(xmlid, raise_if_not_found=False)
+            if cron:
+                cron._trigger()
+
+    @api.model
+    def _claim_queued_lines(self):
+        """Lock the next chunk of queued product lines.
+
+        Rows locked by another worker are skipped, so several cron jobs can
+        share the queue without costing a product twice.
+        """
+        ProductLine = self.env['mrp.bom.cost.calculator.product.line']
+        ProductLine.flush_model(['state'])
+        self.env.cr.execute("""
+            SELECT id FROM mrp_bom_cost_calculator_product_line
+             WHERE state = 'queued'
+             ORDER BY calculator_id, id
+             LIMIT %s
+               FOR UPDATE SKIP LOCKED
+        """, [self._costing_batch_size])
+        return ProductLine.browse([row[0] for row in self.env.cr.fetchall()])
+
+    def _calculate_queued_chunk(self, lines):
+        """Cost a chunk of this calculator's lines, each in its own savepoint"""
+        self.ensure_one()
+        # Explosions are still shared across chunks through the process-wide cache
+        run = self._new_costing_run()
+        line_vals = []
+        for line in lines:
+            try:
+                with self.env.cr.savepoint():
+                    vals_list = self._calculate_product_line(line, run)
+            except Exception as e:
+                _logger.warning(f"Background costing failed for {line.product_id.display_name}: {e}")
+                line.write({'state': 'draft', 'error': str(e)})
+                continue
+            line_vals.extend(vals_list)
+        self.env['mrp.bom.cost.calculator.line'].create(line_vals)
+
+    @api.model
+    def _finish_calculations(self):
+        """Total every background calculation that has no queued line left.
+
+        Calculations another worker is totalling are skipped, it finishes them.
+        """
+        calculators = self.search([('state', '=', 'calculating')])
+        if not calculators:
+            return
+        self.env.cr.execute("""
+            SELECT id FROM mrp_bom_cost_calculator
+             WHERE id IN %s
+               FOR UPDATE SKIP LOCKED
+        """, [tuple(calculators.ids)])
+        calculators = self.browse([row[0] for row in self.env.cr.fetchall()])
+        queued = self.env['mrp.bom.cost.calculator.product.line'].read_group(
+            [('calculator_id', 'in', calculators.ids), ('state', '=', 'queued')],
+            ['calculator_id'], ['calculator_id'],
+        )
+        pending_ids = {group['calculator_id'][0] for group in queued}
+        for calculator in calculators.filtered(lambda c: c.id not in pending_ids):
+            calculator._aggregate_product_lines()
+
+    def _commit_costing_progress(self):
+        """Commit finished chunks so the form shows partial results and a killed worker only loses one chunk"""
+        if not self.env.registry.in_test_mode():
+            self.env.cr.commit()
 
     def action_apply_all_costs(self):
         """Apply calculated costs to all products"""
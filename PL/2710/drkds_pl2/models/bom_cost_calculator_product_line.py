@@ -46,9 +46,11 @@ class BOMCostCalculatorProductLine(models.Model):
     
     state = fields.Selection([
         ('draft', 'Draft'),
+        ('queued', 'Queued'),
         ('calculated', 'Calculated'),
         ('applied', 'Applied')
     ], string='Status', default='draft')
+    error = fields.Text('Calculation Error', readonly=True)
     
     @api.depends('total_cost', 'bom_id')
     def _compute_unit_cost(self):
@@ -0,0 +1,58 @@
+from odoo import models, api
+
+# Fields of the products read by BOM explosions
+EXPLOSION_PRODUCT_FIELDS = {'standard_price', 'uom_id', 'product_tmpl_id'}
+
+
+class ExplosionInvalidationMixin(models.AbstractModel):
+    """Invalidate cached BOM explosions when a record changes"""
+    _name = 'drkds.pl2.explosion.invalidation.mixin'
+    _description = 'BOM Explosion Invalidation'
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        self.env['mrp.bom.cost.calculator']._invalidate_explosions()
+        return super().create(vals_list)
+
+    def write(self, vals):
+        self.env['mrp.bom.cost.calculator']._invalidate_explosions()
+        return super().write(vals)
+
+    def unlink(self):
+        self.env['mrp.bom.cost.calculator']._invalidate_explosions()
+        return super().unlink()
+
+
+class MrpBom(models.Model):
+    _name = 'mrp.bom'
+    _inherit = ['mrp.bom', 'drkds.pl2.explosion.invalidation.mixin']
+
+
+class MrpBomLine(models.Model):
+    _name = 'mrp.bom.line'
+    _inherit = ['mrp.bom.line', 'drkds.pl2.explosion.invalidation.mixin']
+
+
+class MrpRoutingWorkcenter(models.Model):
+    _name = 'mrp.routing.workcenter'
+    _inherit = ['mrp.routing.workcenter', 'drkds.pl2.explosion.invalidation.mixin']
+
+
+class MrpWorkcenter(models.Model):
+    _name = 'mrp.workcenter'
+    _inherit = ['mrp.workcenter', 'drkds.pl2.explosion.invalidation.mixin']
+
+
+class UomUom(models.Model):
+    _name = 'uom.uom'
+    _inherit = ['uom.uom', 'drkds.pl2.explosion.invalidation.mixin']
+
+
+class ProductProduct(models.Model):
+    _inherit = 'product.product'
+
+    def write(self, vals):
+        # Calculations write their prices on products, which explosions do not read
+        if EXPLOSION_PRODUCT_FIELDS.intersection(vals):
+            self.env['mrp.bom.cost.calculator']._invalidate_explosions()
+        return super().write(vals)
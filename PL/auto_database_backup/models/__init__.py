@@ -20,3 +20,4 @@
 #
 ###############################################################################
 from . import db_backup_configure
+from . import db_backup_snapshot
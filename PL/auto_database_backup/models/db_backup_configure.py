@@ -19,24 +19,33 @@
 #    If not, see <http://www.gnu.org/licenses/>.
 #
 ###############################################################################
+import contextlib
 import errno
 import ftplib
 import json
 import logging
 import os
+import re
 import requests
 import shutil
 import subprocess
+import tarfile
 import tempfile
+import threading
+import time
+import zipfile
 import odoo
-from datetime import timedelta
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
 from requests.auth import HTTPBasicAuth
 from werkzeug import urls
 from odoo import api, fields, models, _
 from odoo.exceptions import UserError, ValidationError
-from odoo.tools import find_pg_tool, exec_pg_environ
+from odoo.tools import find_pg_tool, exec_pg_environ, split_every
 from odoo.http import request
 from odoo.service import db
+from .db_backup_snapshot import FILESTORE_INDEX, FilestorePlan
 
 _logger = logging.getLogger(__name__)
 ONEDRIVE_SCOPE = ['offline_access openid Files.ReadWrite.All']
@@ -44,6 +53,100 @@ MICROSOFT_GRAPH_END_POINT = "https://graph.microsoft.com"
 GOOGLE_AUTH_ENDPOINT = 'https://accounts.google.com/o/oauth2/auth'
 GOOGLE_TOKEN_ENDPOINT = 'https://accounts.google.com/o/oauth2/token'
 GOOGLE_API_BASE_URL = 'https://www.googleapis.com'
+# Bytes read from pg_dump and written to the destination at a time
+BACKUP_CHUNK_SIZE = 1024 * 1024
+# Uploads of one shared dump running at the same time
+BACKUP_UPLOAD_WORKERS = 4
+# Suffix of backups being uploaded, renamed once complete; retention
+# ignores these names
+PARTIAL_BACKUP_SUFFIX = '.part'
+# Configuration values uploads and retention read outside the cron's thread
+UPLOAD_FIELDS = [
+    'db_name', 'backup_destination', 'backup_filename', 'backup_path',
+    'days_to_remove', 'retention_policy', 'keep_daily', 'keep_weekly',
+    'keep_monthly', 'ftp_host', 'ftp_port', 'ftp_user', 'ftp_password',
+    'ftp_path', 'sftp_host', 'sftp_port', 'sftp_user', 'sftp_password',
+    'sftp_path', 'gdrive_access_token', 'google_drive_folder_key',
+    'dropbox_client_key', 'dropbox_client_secret', 'dropbox_refresh_token',
+    'dropbox_folder', 'onedrive_access_token', 'onedrive_folder_key',
+    'domain', 'next_cloud_user_name', 'next_cloud_password',
+    'nextcloud_folder_key', 'aws_access_key', 'aws_secret_access_key',
+    'bucket_file_name', 'aws_folder_name',
+]
+# Compression method, level (0 for the method's default) and pg_dump jobs
+DumpOptions = namedtuple('DumpOptions', ['compression', 'level', 'jobs'])
+DEFAULT_DUMP_OPTIONS = DumpOptions('gzip', 0, 1)
+# Date part of the backup file names written by _schedule_auto_backup
+BACKUP_TIME_FORMAT = '%Y-%m-%d_%H-%M-%S'
+# Periods of the daily, weekly and monthly retention, by policy field
+RETENTION_PERIODS = (
+    ('keep_daily', lambda date: date.date()),
+    ('keep_weekly', lambda date: date.isocalendar()[:2]),
+    ('keep_monthly', lambda date: (date.year, date.month)),
+)
+
+
+class DumpPipeReader:
+    """Read end of the pipe fed by a dump thread. Reaching the end of the
+    data raises the dump's error, if any, so an upload never completes
+    with a truncated backup."""
+
+    def __init__(self, pipe, thread, errors):
+        self._pipe = pipe
+        self._thread = thread
+        self._errors = errors
+
+    def read(self, size=-1):
+        data = self._pipe.read(size)
+        if not data or size is None or size < 0:
+            self._thread.join()
+            if self._errors:
+                raise self._errors[0]
+        return data
+
+    def __getattr__(self, name):
+        return getattr(self._pipe, name)
+
+
+def parse_backup_names(names, db_name):
+    """Map the names among `names` that are backups of `db_name` to their
+    backup time. Other files are ignored, so retention never touches
+    them."""
+    pattern = re.compile(r'^%s_(\d{4}-\d{2}-\d{2}_\d{2}-\d{2}-\d{2})\.'
+                         r'(zip|dump|tar)$' % re.escape(db_name))
+    backups = {}
+    for name in names:
+        match = pattern.match(name)
+        if match:
+            backups[name] = datetime.strptime(match.group(1),
+                                              BACKUP_TIME_FORMAT)
+    return backups
+
+
+def select_expired_backups(backups, policy, now):
+    """Return the names of `backups`, mapping names to backup times, that
+    the retention `policy` removes at `now`. `policy` holds the retention
+    fields of a configuration and `chains`, the archives each incremental
+    backup builds on. The newest backup and the chains of the backups
+    kept are never removed."""
+    names = sorted(backups, key=backups.get, reverse=True)
+    kept = set(names[:1])
+    if policy['retention_policy'] == 'gfs':
+        for field_name, period in RETENTION_PERIODS:
+            periods = set()
+            for name in names:
+                if len(periods) >= policy[field_name]:
+                    break
+                key = period(backups[name])
+                if key not in periods:
+                    periods.add(key)
+                    kept.add(name)
+    else:
+        kept.update(name for name in names if (
+            now - backups[name]).days < policy['days_to_remove'])
+    for name in list(kept):
+        kept.update(policy['chains'].get(name, ()))
+    return [name for name in names if name not in kept]
 
 
 class DbBackupConfigure(models.Model):
@@ -60,9 +163,25 @@ class DbBackupConfigure(models.Model):
                              help='Master password')
     backup_format = fields.Selection([
         ('zip', 'Zip'),
-        ('dump', 'Dump')
+        ('dump', 'Dump'),
+        ('tar', 'Directory (Tar)'),
     ], string='Backup Format', default='zip', required=True,
-        help='Format of the backup')
+        help='Format of the backup. Directory backups are dumped by parallel '
+             'jobs and archived as tar, without the filestore.')
+    dump_compression = fields.Selection([
+        ('gzip', 'Gzip'),
+        ('zstd', 'Zstandard'),
+        ('none', 'None'),
+    ], string='Compression', default='gzip', required=True,
+        help='Compression of the backup. Zstandard needs the pg_dump of '
+             'PostgreSQL 16 or later and the Dump or Directory format.')
+    compression_level = fields.Integer(
+        string='Compression Level',
+        help='Compression level, 0 for the default level of the method')
+    dump_jobs = fields.Integer(
+        string='Parallel Jobs', default=1,
+        help='Tables dumped in parallel in the Directory format, each job '
+             'uses a database connection')
     backup_destination = fields.Selection([
         ('local', 'Local Storage'),
         ('google_drive', 'Google Drive'),
@@ -114,6 +233,18 @@ class DbBackupConfigure(models.Model):
     days_to_remove = fields.Integer(string='Remove After',
                                     help='Automatically delete stored backups'
                                          ' after this specified number of days')
+    retention_policy = fields.Selection([
+        ('age', 'By Age'),
+        ('gfs', 'Daily, Weekly and Monthly'),
+    ], string='Retention', default='age', required=True,
+        help='Remove backups older than a number of days, or keep the newest '
+             'backup of the last days, weeks and months')
+    keep_daily = fields.Integer(string='Daily Backups', default=7,
+                                help='Days whose newest backup is kept')
+    keep_weekly = fields.Integer(string='Weekly Backups', default=4,
+                                 help='Weeks whose newest backup is kept')
+    keep_monthly = fields.Integer(string='Monthly Backups', default=12,
+                                  help='Months whose newest backup is kept')
     google_drive_folder_key = fields.Char(string='Drive Folder ID',
                                           help='Folder id of the drive')
     notify_user = fields.Boolean(string='Notify User',
@@ -194,6 +325,20 @@ class DbBackupConfigure(models.Model):
     bucket_file_name = fields.Char(string='Bucket Name',
                                    help="Field used to store the name of an"
                                         " Amazon S3 bucket.")
+    filestore_mode = fields.Selection([
+        ('full', 'Full'),
+        ('incremental', 'Incremental'),
+    ], string='Filestore Backup', default='full', required=True,
+        help='Incremental zip backups only contain the attachments that were '
+             'not uploaded to this destination since the last full snapshot. '
+             'Restoring one needs the archives of its whole chain.')
+    full_backup_interval = fields.Integer(
+        string='Full Snapshot Every', default=7,
+        help='Days between two full filestore snapshots in incremental mode')
+    snapshot_ids = fields.One2many('db.backup.snapshot', 'config_id',
+                                   string='Snapshots',
+                                   help='Zip backups taken in incremental '
+                                        'mode')
     aws_folder_name = fields.Char(string='File Name',
                                   help="field used to store the name of a"
                                        " folder in an Amazon S3 bucket.")
@@ -580,6 +725,31 @@ class DbBackupConfigure(models.Model):
             }
         }
 
+    @api.constrains('backup_format', 'dump_compression', 'compression_level',
+                    'dump_jobs')
+    def _check_dump_options(self):
+        """Compression and jobs must be supported by the backup format"""
+        for rec in self:
+            if rec.backup_format == 'zip' and rec.dump_compression == 'zstd':
+                raise ValidationError(
+                    _('Zip backups cannot be compressed with Zstandard.'))
+            max_level = 22 if rec.dump_compression == 'zstd' else 9
+            if not 0 <= rec.compression_level <= max_level:
+                raise ValidationError(
+                    _('The compression level must be between 0 and %s.',
+                      max_level))
+            if rec.dump_jobs < 1:
+                raise ValidationError(
+                    _('At least one parallel job is needed.'))
+
+    @api.constrains('filestore_mode', 'full_backup_interval')
+    def _check_full_backup_interval(self):
+        """Incremental backups need a full snapshot to build on"""
+        for rec in self.filtered(lambda r: r.filestore_mode == 'incremental'):
+            if rec.full_backup_interval < 1:
+                raise ValidationError(
+                    _('Full snapshots must be taken at least every day.'))
+
     @api.onchange('backup_destination')
     def _onchange_back_up_local(self):
         """
@@ -594,462 +764,702 @@ class DbBackupConfigure(models.Model):
     def _schedule_auto_backup(self):
         """Function for generating and storing backup.
            Database backup for all the active records in backup configuration
-           model will be created."""
-        records = self.search([])
-        mail_template_success = self.env.ref(
-            'auto_database_backup.mail_template_data_db_backup_successful')
-        mail_template_failed = self.env.ref(
-            'auto_database_backup.mail_template_data_db_backup_failed')
-        for rec in records:
-            backup_time = fields.datetime.utcnow().strftime(
-                "%Y-%m-%d_%H-%M-%S")
-            backup_filename = "%s_%s.%s" % (
+           model will be created. Configurations backing up the same database
+           with the same options share one dump, which is uploaded to all of
+           their destinations in parallel."""
+        started = time.monotonic()
+        backup_time = fields.datetime.utcnow().strftime(BACKUP_TIME_FORMAT)
+        groups = {}
+        for rec in self.search([]):
+            rec.backup_filename = "%s_%s.%s" % (
                 rec.db_name, backup_time, rec.backup_format)
-            rec.backup_filename = backup_filename
-            # Local backup
-            if rec.backup_destination == 'local':
-                try:
-                    if not os.path.isdir(rec.backup_path):
-                        os.makedirs(rec.backup_path)
-                    backup_file = os.path.join(rec.backup_path,
-                                               backup_filename)
-                    f = open(backup_file, "wb")
-                    self.dump_data(rec.db_name, f, rec.backup_format)
-                    f.close()
-                    # Remove older backups
-                    if rec.auto_remove:
-                        for filename in os.listdir(rec.backup_path):
-                            file = os.path.join(rec.backup_path, filename)
-                            create_time = fields.datetime.fromtimestamp(
-                                os.path.getctime(file))
-                            backup_duration = fields.datetime.utcnow() - create_time
-                            if backup_duration.days >= rec.days_to_remove:
-                                os.remove(file)
-                    if rec.notify_user:
-                        mail_template_success.send_mail(rec.id,
-                                                        force_send=True)
-                except Exception as e:
-                    rec.generated_exception = e
-                    _logger.info('FTP Exception: %s', e)
-                    if rec.notify_user:
-                        mail_template_failed.send_mail(rec.id, force_send=True)
-            # FTP backup
-            elif rec.backup_destination == 'ftp':
-                try:
-                    ftp_server = ftplib.FTP()
-                    ftp_server.connect(rec.ftp_host, int(rec.ftp_port))
-                    ftp_server.login(rec.ftp_user, rec.ftp_password)
-                    ftp_server.encoding = "utf-8"
-                    temp = tempfile.NamedTemporaryFile(
-                        suffix='.%s' % rec.backup_format)
-                    try:
-                        ftp_server.cwd(rec.ftp_path)
-                    except ftplib.error_perm:
-                        ftp_server.mkd(rec.ftp_path)
-                        ftp_server.cwd(rec.ftp_path)
-                    with open(temp.name, "wb+") as tmp:
-                        self.dump_data(rec.db_name, tmp,
-                                                rec.backup_format)
-                    ftp_server.storbinary('STOR %s' % backup_filename,
-                                          open(temp.name, "rb"))
-                    if rec.auto_remove:
-                        files = ftp_server.nlst()
-                        for file in files:
-                            create_time = fields.datetime.strptime(
-                                ftp_server.sendcmd('MDTM ' + file)[4:],
-                                "%Y%m%d%H%M%S")
-                            diff_days = (
-                                    fields.datetime.now() - create_time).days
-                            if diff_days >= rec.days_to_remove:
-                                ftp_server.delete(file)
-                    ftp_server.quit()
-                    if rec.notify_user:
-                        mail_template_success.send_mail(rec.id,
-                                                        force_send=True)
-                except Exception as e:
-                    rec.generated_exception = e
-                    _logger.info('FTP Exception: %s', e)
-                    if rec.notify_user:
-                        mail_template_failed.send_mail(rec.id, force_send=True)
-            # SFTP backup
-            elif rec.backup_destination == 'sftp':
-                client = paramiko.SSHClient()
-                client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-                try:
-                    client.connect(hostname=rec.sftp_host,
-                                   username=rec.sftp_user,
-                                   password=rec.sftp_password,
-                                   port=rec.sftp_port)
-                    sftp = client.open_sftp()
-                    temp = tempfile.NamedTemporaryFile(
-                        suffix='.%s' % rec.backup_format)
-                    with open(temp.name, "wb+") as tmp:
-                        self.dump_data(rec.db_name, tmp, rec.backup_format)
-                    try:
-                        sftp.chdir(rec.sftp_path)
-                    except IOError as e:
-                        if e.errno == errno.ENOENT:
-                            sftp.mkdir(rec.sftp_path)
-                            sftp.chdir(rec.sftp_path)
-                    sftp.put(temp.name, backup_filename)
-                    if rec.auto_remove:
-                        files = sftp.listdir()
-                        expired = list(filter(
-                            lambda fl: (fields.datetime.now()
-                                        - fields.datetime.fromtimestamp(
-                                        sftp.stat(fl).st_mtime)).days >=
-                                       rec.days_to_remove, files))
-                        for file in expired:
-                            sftp.unlink(file)
-                    sftp.close()
-                    if rec.notify_user:
-                        mail_template_success.send_mail(rec.id,
-                                                        force_send=True)
-                except Exception as e:
-                    rec.generated_exception = e
-                    _logger.info('SFTP Exception: %s', e)
-                    if rec.notify_user:
-                        mail_template_failed.send_mail(rec.id, force_send=True)
-                finally:
-                    client.close()
-            # Google Drive backup
-            elif rec.backup_destination == 'google_drive':
-                try:
-                    if rec.gdrive_token_validity <= fields.Datetime.now():
-                        rec.generate_gdrive_refresh_token()
-                    temp = tempfile.NamedTemporaryFile(
-                        suffix='.%s' % rec.backup_format)
-                    with open(temp.name, "wb+") as tmp:
-                        self.dump_data(rec.db_name, tmp,
-                                                rec.backup_format)
-                    try:
-                        headers = {
-                            "Authorization": "Bearer %s" % rec.gdrive_access_token}
-                        para = {
-                            "name": backup_filename,
-                            "parents": [rec.google_drive_folder_key],
-                        }
-                        files = {
-                            'data': ('metadata', json.dumps(para),
-                                     'application/json; charset=UTF-8'),
-                            'file': open(temp.name, "rb")
-                        }
-                        requests.post(
-                            "https://www.googleapis.com/upload/drive/v3/files?uploadType=multipart",
-                            headers=headers,
-                            files=files
-                        )
-                        if rec.auto_remove:
-                            query = "parents = '%s'" % rec.google_drive_folder_key
-                            files_req = requests.get(
-                                "https://www.googleapis.com/drive/v3/files?q=%s" % query,
-                                headers=headers)
-                            files = files_req.json()['files']
-                            for file in files:
-                                file_date_req = requests.get(
-                                    "https://www.googleapis.com/drive/v3/files/%s?fields=createdTime" %
-                                    file['id'], headers=headers)
-                                create_time = file_date_req.json()[
-                                                  'createdTime'][
-                                              :19].replace('T', ' ')
-                                diff_days = (
-                                        fields.datetime.now() - fields.datetime.strptime(
-                                    create_time, '%Y-%m-%d %H:%M:%S')).days
-                                if diff_days >= rec.days_to_remove:
-                                    requests.delete(
-                                        "https://www.googleapis.com/drive/v3/files/%s" %
-                                        file['id'], headers=headers)
-                        if rec.notify_user:
-                            mail_template_success.send_mail(rec.id,
-                                                            force_send=True)
-                    except Exception as e:
-
-                        rec.generated_exception = e
-                        _logger.info('Google Drive Exception: %s', e)
-                        if rec.notify_user:
-                            mail_template_failed.send_mail(rec.id,
-                                                           force_send=True)
-                except Exception:
-                    if rec.notify_user:
-                        mail_template_failed.send_mail(rec.id, force_send=True)
-                        raise ValidationError(
-                            'Please check the credentials before activation')
-                    else:
-                        raise ValidationError('Please check connection')
-            # Dropbox backup
-            elif rec.backup_destination == 'dropbox':
-                temp = tempfile.NamedTemporaryFile(
-                    suffix='.%s' % rec.backup_format)
-                with open(temp.name, "wb+") as tmp:
-                    self.dump_data(rec.db_name, tmp,
-                                            rec.backup_format)
-                try:
-                    dbx = dropbox.Dropbox(
-                        app_key=rec.dropbox_client_key,
-                        app_secret=rec.dropbox_client_secret,
-                        oauth2_refresh_token=rec.dropbox_refresh_token)
-                    dropbox_destination = (rec.dropbox_folder + '/' +
-                                           backup_filename)
-                    dbx.files_upload(temp.read(), dropbox_destination)
-                    if rec.auto_remove:
-                        files = dbx.files_list_folder(rec.dropbox_folder)
-                        file_entries = files.entries
-                        expired_files = list(filter(
-                            lambda fl: (fields.datetime.now() -
-                                        fl.client_modified).days >=
-                                       rec.days_to_remove,
-                            file_entries))
-                        for file in expired_files:
-                            dbx.files_delete_v2(file.path_display)
-                    if rec.notify_user:
-                        mail_template_success.send_mail(rec.id,
-                                                        force_send=True)
-                except Exception as error:
-                    rec.generated_exception = error
-                    _logger.info('Dropbox Exception: %s', error)
-                    if rec.notify_user:
-                        mail_template_failed.send_mail(rec.id, force_send=True)
-            # Onedrive Backup
-            elif rec.backup_destination == 'onedrive':
-                if rec.onedrive_token_validity <= fields.Datetime.now():
-                    rec.generate_onedrive_refresh_token()
-                temp = tempfile.NamedTemporaryFile(
-                    suffix='.%s' % rec.backup_format)
-                with open(temp.name, "wb+") as tmp:
-                    self.dump_data(rec.db_name, tmp, rec.backup_format)
-                headers = {
-                    'Authorization': 'Bearer %s' % rec.onedrive_access_token,
-                    'Content-Type': 'application/json'}
-                upload_session_url = MICROSOFT_GRAPH_END_POINT + "/v1.0/me/drive/items/%s:/%s:/createUploadSession" % (
-                    rec.onedrive_folder_key, backup_filename)
-                try:
-                    upload_session = requests.post(upload_session_url,
-                                                   headers=headers)
-                    upload_url = upload_session.json().get('uploadUrl')
-                    requests.put(upload_url, data=temp.read())
-                    if rec.auto_remove:
-                        list_url = MICROSOFT_GRAPH_END_POINT + "/v1.0/me/drive/items/%s/children" % rec.onedrive_folder_key
-                        response = requests.get(list_url, headers=headers)
-                        files = response.json().get('value')
-                        for file in files:
-                            create_time = file['createdDateTime'][:19].replace(
-                                'T',
-                                ' ')
-                            diff_days = (
-                                    fields.datetime.now() - fields.datetime.strptime(
-                                create_time, '%Y-%m-%d %H:%M:%S')).days
-                            if diff_days >= rec.days_to_remove:
-                                delete_url = MICROSOFT_GRAPH_END_POINT + "/v1.0/me/drive/items/%s" % \
-                                             file['id']
-                                requests.delete(delete_url, headers=headers)
-                    if rec.notify_user:
-                        mail_template_success.send_mail(rec.id,
-                                                        force_send=True)
-                except Exception as error:
-                    rec.generated_exception = error
-                    _logger.info('Onedrive Exception: %s', error)
-                    if rec.notify_user:
-                        mail_template_failed.send_mail(rec.id, force_send=True)
-            # NextCloud Backup
-            elif rec.backup_destination == 'next_cloud':
-                try:
-                    if rec.domain and rec.next_cloud_password and \
-                            rec.next_cloud_user_name:
-                        try:
-                            # Connect to NextCloud using the provided username
-                            # and password
-                            ncx = NextCloud(rec.domain,
-                                            auth=HTTPBasicAuth(
-                                                rec.next_cloud_user_name,
-                                                rec.next_cloud_password))
-                            # Connect to NextCloud again to perform additional
-                            # operations
-                            nc = nextcloud_client.Client(rec.domain)
-                            nc.login(rec.next_cloud_user_name,
-                                     rec.next_cloud_password)
-                            # Get the folder name from the NextCloud folder ID
-                            folder_name = rec.nextcloud_folder_key
-                            # If auto_remove is enabled, remove backup files
-                            # older than specified days
-                            if rec.auto_remove:
-                                folder_path = "/" + folder_name
-                                for item in nc.list(folder_path):
-                                    backup_file_name = item.path.split("/")[-1]
-                                    backup_date_str = \
-                                        backup_file_name.split("_")[2]
-                                    backup_date = fields.datetime.strptime(
-                                        backup_date_str, '%Y-%m-%d').date()
-                                    if (fields.date.today() - backup_date).days \
-                                            >= rec.days_to_remove:
-                                        nc.delete(item.path)
-                            # If notify_user is enabled, send a success email
-                            # notification
-                            if rec.notify_user:
-                                mail_template_success.send_mail(rec.id,
-                                                                force_send=True)
-                        except Exception as error:
-                            rec.generated_exception = error
-                            _logger.info('NextCloud Exception: %s', error)
-                            if rec.notify_user:
-                                # If an exception occurs, send a failed email
-                                # notification
-                                mail_template_failed.send_mail(rec.id,
-                                                               force_send=True)
-                        # Get the list of folders in the root directory of NextCloud
-                        data = ncx.list_folders('/').__dict__
-                        folders = [
-                            [file_name['href'].split('/')[-2],
-                             file_name['file_id']]
-                            for file_name in data['data'] if
-                            file_name['href'].endswith('/')]
-                        # If the folder name is not found in the list of folders,
-                        # create the folder
-                        if folder_name not in [file[0] for file in folders]:
-                            nc.mkdir(folder_name)
-                            # Dump the database to a temporary file
-                            temp = tempfile.NamedTemporaryFile(
-                                suffix='.%s' % rec.backup_format)
-                            with open(temp.name, "wb+") as tmp:
-                                self.dump_data(rec.db_name, tmp,
-                                                        rec.backup_format)
-                            backup_file_path = temp.name
-                            remote_file_path = f"/{folder_name}/{rec.db_name}_" \
-                                               f"{backup_time}.{rec.backup_format}"
-                            nc.put_file(remote_file_path, backup_file_path)
-                        else:
-                            # Dump the database to a temporary file
-                            temp = tempfile.NamedTemporaryFile(
-                                suffix='.%s' % rec.backup_format)
-                            with open(temp.name, "wb+") as tmp:
-                                self.dump_data(rec.db_name, tmp,
-                                                        rec.backup_format)
-                            backup_file_path = temp.name
-                            remote_file_path = f"/{folder_name}/{rec.db_name}_" \
-                                               f"{backup_time}.{rec.backup_format}"
-                            nc.put_file(remote_file_path, backup_file_path)
-                except Exception:
-                    raise ValidationError('Please check connection')
-            # Amazon S3 Backup
-            elif rec.backup_destination == 'amazon_s3':
-                if rec.aws_access_key and rec.aws_secret_access_key:
-                    try:
-                        # Create a boto3 client for Amazon S3 with provided
-                        # access key id and secret access key
-                        bo3 = boto3.client(
-                            's3',
-                            aws_access_key_id=rec.aws_access_key,
-                            aws_secret_access_key=rec.aws_secret_access_key)
-                        # If auto_remove is enabled, remove the backups that
-                        # are older than specified days from the S3 bucket
-                        if rec.auto_remove:
-                            folder_path = rec.aws_folder_name
-                            response = bo3.list_objects(
-                                Bucket=rec.bucket_file_name,
-                                Prefix=folder_path)
-                            today = fields.date.today()
-                            for file in response['Contents']:
-                                file_path = file['Key']
-                                last_modified = file['LastModified']
-                                date = last_modified.date()
-                                age_in_days = (today - date).days
-                                if age_in_days >= rec.days_to_remove:
-                                    bo3.delete_object(
-                                        Bucket=rec.bucket_file_name,
-                                        Key=file_path)
-                        # Create a boto3 resource for Amazon S3 with provided
-                        # access key id and secret access key
-                        s3 = boto3.resource(
-                            's3',
-                            aws_access_key_id=rec.aws_access_key,
-                            aws_secret_access_key=rec.aws_secret_access_key)
-                        # Create a folder in the specified bucket, if it
-                        # doesn't already exist
-                        s3.Object(rec.bucket_file_name,
-                                  rec.aws_folder_name + '/').put()
-                        bucket = s3.Bucket(rec.bucket_file_name)
-                        # Get all the prefixes in the bucket
-                        prefixes = set()
-                        for obj in bucket.objects.all():
-                            key = obj.key
-                            if key.endswith('/'):
-                                prefix = key[:-1]  # Remove the trailing slash
-                                prefixes.add(prefix)
-                        # If the specified folder is present in the bucket,
-                        # take a backup of the database and upload it to the
-                        #   S3 bucket
-                        if rec.aws_folder_name in prefixes:
-                            temp = tempfile.NamedTemporaryFile(
-                                suffix='.%s' % rec.backup_format)
-                            with open(temp.name, "wb+") as tmp:
-                                self.dump_data(rec.db_name, tmp,
-                                                        rec.backup_format)
-                            backup_file_path = temp.name
-                            remote_file_path = f"{rec.aws_folder_name}/{rec.db_name}_" \
-                                               f"{backup_time}.{rec.backup_format}"
-                            s3.Object(rec.bucket_file_name,
-                                      remote_file_path).upload_file(
-                                backup_file_path)
-                            # If notify_user is enabled, send an email to the
-                            # user notifying them about the successful backup
-                            if rec.notify_user:
-                                mail_template_success.send_mail(rec.id,
-                                                                force_send=True)
-                    except Exception as error:
-                        # If any error occurs, set the 'generated_exception'
-                        # field to the error message and log the error
-                        rec.generated_exception = error
-                        _logger.info('Amazon S3 Exception: %s', error)
-                        # If notify_user is enabled, email the user
-                        # notifying them about the failed backup
-                        if rec.notify_user:
-                            mail_template_failed.send_mail(rec.id, force_send=True)
-
-    def dump_data(self, db_name, stream, backup_format):
+            filestore_plan = rec._prepare_filestore_plan()
+            # Incremental zip backups carry a filestore of their own
+            key = rec.id if filestore_plan else (
+                rec.db_name, rec.backup_format, rec._get_dump_options())
+            groups.setdefault(key, []).append((rec, filestore_plan))
+        for group in groups.values():
+            self._backup_group(group)
+        _logger.info('Database backups of %s configurations done in %.1fs',
+                     sum(len(group) for group in groups.values()),
+                     time.monotonic() - started)
+
+    def _backup_group(self, group):
+        """Dump once the database of `group`, a list of (configuration,
+        filestore plan) pairs sharing the same dump, and upload it to the
+        destination of each configuration concurrently. A single upload
+        reads the dump while it is produced; several uploads read it from
+        one temporary file."""
+        rec, filestore_plan = group[0]
+        targets = {}
+        for config, plan in group:
+            try:
+                targets[config] = config._get_upload_target()
+            except Exception as error:
+                config._notify_backup(plan, error)
+        if not targets:
+            return
+        started = time.monotonic()
+        errors = {}
+        try:
+            if len(targets) == 1:
+                with rec._open_dump_stream(rec.db_name, rec.backup_format,
+                                           filestore_plan) as dump:
+                    errors = self._run_uploads(
+                        targets, lambda: contextlib.nullcontext(dump))
+            else:
+                with tempfile.NamedTemporaryFile(
+                        suffix='.%s' % rec.backup_format) as temp:
+                    rec.dump_data(rec.db_name, temp, rec.backup_format)
+                    temp.flush()
+                    _logger.info('Backup %s: dumped %s bytes in %.1fs',
+                                 rec.backup_filename, temp.tell(),
+                                 time.monotonic() - started)
+                    errors = self._run_uploads(
+                        targets, lambda: open(temp.name, 'rb'))
+        except Exception as error:
+            # A failed upload stops the dump: report the upload's own error
+            errors = {config: errors.get(config) or error
+                      for config in targets}
+        _logger.info('Backup %s: %s destinations done in %.1fs',
+                     rec.backup_filename, len(targets),
+                     time.monotonic() - started)
+        for config, plan in group:
+            if config in errors:
+                config._notify_backup(plan, errors[config])
+
+    def _run_uploads(self, targets, open_source):
+        """Upload the backup to each destination of `targets`, mapping
+        configurations to the values of _get_upload_target(), from a pool of
+        BACKUP_UPLOAD_WORKERS threads. `open_source` returns a context
+        manager giving the readable backup. Returns the error of each
+        configuration, None on success."""
+
+        def upload(upload_method, target):
+            started = time.monotonic()
+            with open_source() as source:
+                upload_method(target, source)
+            _logger.info('Backup %s: uploaded to %s in %.1fs',
+                         target['backup_filename'],
+                         target['backup_destination'],
+                         time.monotonic() - started)
+
+        with ThreadPoolExecutor(
+                max_workers=min(len(targets), BACKUP_UPLOAD_WORKERS),
+                thread_name_prefix='db_backup_upload') as executor:
+            futures = {
+                config: executor.submit(
+                    upload, getattr(config, '_upload_to_%s' %
+                                    target['backup_destination']), target)
+                for config, target in targets.items()
+            }
+        return {config: future.exception()
+                for config, future in futures.items()}
+
+    def _get_upload_target(self):
+        """Return the values the upload of this configuration needs,
+        refreshing expired tokens first, so that the upload itself can run
+        in a worker thread without the ORM."""
+        self.ensure_one()
+        if self.backup_destination == 'google_drive' and \
+                self.gdrive_token_validity <= fields.Datetime.now():
+            self.generate_gdrive_refresh_token()
+        elif self.backup_destination == 'onedrive' and \
+                self.onedrive_token_validity <= fields.Datetime.now():
+            self.generate_onedrive_refresh_token()
+        return self.read(UPLOAD_FIELDS)[0]
+
+    def _notify_backup(self, filestore_plan, error=None):
+        """Record the outcome of this configuration's backup and mail it to
+        the user if asked to."""
+        self.ensure_one()
+        if error:
+            self.generated_exception = error
+            _logger.info('%s backup exception: %s',
+                         self.backup_destination, error)
+            template = 'auto_database_backup.mail_template_data_db_backup_failed'
+        else:
+            self._record_backup_snapshot(filestore_plan)
+            template = 'auto_database_backup.mail_template_data_db_backup_successful'
+        if self.notify_user:
+            self.env.ref(template).send_mail(self.id, force_send=True)
+
+    def _upload_to_local(self, target, source):
+        """Store the backup in the local backup path"""
+        if not os.path.isdir(target['backup_path']):
+            os.makedirs(target['backup_path'])
+        backup_file = os.path.join(target['backup_path'],
+                                   target['backup_filename'])
+        partial_file = backup_file + PARTIAL_BACKUP_SUFFIX
+        try:
+            with open(partial_file, "wb") as f:
+                shutil.copyfileobj(source, f, BACKUP_CHUNK_SIZE)
+            os.replace(partial_file, backup_file)
+        except Exception:
+            with contextlib.suppress(OSError):
+                os.remove(partial_file)
+            raise
+
+    def _upload_to_ftp(self, target, source):
+        """Upload the backup to the FTP server"""
+        ftp_server = ftplib.FTP()
+        ftp_server.connect(target['ftp_host'], int(target['ftp_port']))
+        ftp_server.login(target['ftp_user'], target['ftp_password'])
+        ftp_server.encoding = "utf-8"
+        try:
+            ftp_server.cwd(target['ftp_path'])
+        except ftplib.error_perm:
+            ftp_server.mkd(target['ftp_path'])
+            ftp_server.cwd(target['ftp_path'])
+        partial_name = target['backup_filename'] + PARTIAL_BACKUP_SUFFIX
+        try:
+            ftp_server.storbinary('STOR %s' % partial_name, source,
+                                  BACKUP_CHUNK_SIZE)
+            ftp_server.rename(partial_name, target['backup_filename'])
+        except Exception:
+            with contextlib.suppress(ftplib.all_errors):
+                ftp_server.delete(partial_name)
+            ftp_server.close()
+            raise
+        ftp_server.quit()
+
+    def _upload_to_sftp(self, target, source):
+        """Upload the backup to the SFTP server"""
+        client = paramiko.SSHClient()
+        client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+        try:
+            client.connect(hostname=target['sftp_host'],
+                           username=target['sftp_user'],
+                           password=target['sftp_password'],
+                           port=target['sftp_port'])
+            sftp = client.open_sftp()
+            try:
+                sftp.chdir(target['sftp_path'])
+            except IOError as e:
+                if e.errno == errno.ENOENT:
+                    sftp.mkdir(target['sftp_path'])
+                    sftp.chdir(target['sftp_path'])
+            partial_name = target['backup_filename'] + PARTIAL_BACKUP_SUFFIX
+            try:
+                sftp.putfo(source, partial_name)
+                sftp.posix_rename(partial_name, target['backup_filename'])
+            except Exception:
+                with contextlib.suppress(IOError):
+                    sftp.remove(partial_name)
+                raise
+            sftp.close()
+        finally:
+            client.close()
+
+    def _upload_to_google_drive(self, target, source):
+        """Upload the backup to the Google Drive folder"""
+        headers = {
+            "Authorization": "Bearer %s" % target['gdrive_access_token']}
+        para = {
+            "name": target['backup_filename'],
+            "parents": [target['google_drive_folder_key']],
+        }
+        files = {
+            'data': ('metadata', json.dumps(para),
+                     'application/json; charset=UTF-8'),
+            'file': source
+        }
+        requests.post(
+            "https://www.googleapis.com/upload/drive/v3/files?uploadType=multipart",
+            headers=headers,
+            files=files
+        )
+
+    def _upload_to_dropbox(self, target, source):
+        """Upload the backup to the Dropbox folder"""
+        dbx = dropbox.Dropbox(
+            app_key=target['dropbox_client_key'],
+            app_secret=target['dropbox_client_secret'],
+            oauth2_refresh_token=target['dropbox_refresh_token'])
+        dropbox_destination = (target['dropbox_folder'] + '/' +
+                               target['backup_filename'])
+        dbx.files_upload(source.read(), dropbox_destination)
+
+    def _upload_to_onedrive(self, target, source):
+        """Upload the backup to the Onedrive folder"""
+        headers = {
+            'Authorization': 'Bearer %s' % target['onedrive_access_token'],
+            'Content-Type': 'application/json'}
+        upload_session_url = MICROSOFT_GRAPH_END_POINT + "/v1.0/me/drive/items/%s:/%s:/createUploadSession" % (
+            target['onedrive_folder_key'], target['backup_filename'])
+        upload_session = requests.post(upload_session_url, headers=headers)
+        upload_url = upload_session.json().get('uploadUrl')
+        requests.put(upload_url, data=source.read())
+
+    def _upload_to_next_cloud(self, target, source):
+        """Upload the backup to the NextCloud folder"""
+        if not (target['domain'] and target['next_cloud_password'] and
+                target['next_cloud_user_name']):
+            raise UserError('Please check connection')
+        # Connect to NextCloud using the provided username and password
+        ncx = NextCloud(target['domain'],
+                        auth=HTTPBasicAuth(target['next_cloud_user_name'],
+                                           target['next_cloud_password']))
+        # Connect to NextCloud again to perform additional operations
+        nc = nextcloud_client.Client(target['domain'])
+        nc.login(target['next_cloud_user_name'],
+                 target['next_cloud_password'])
+        folder_name = target['nextcloud_folder_key']
+        # Get the list of folders in the root directory of NextCloud
+        data = ncx.list_folders('/').__dict__
+        folders = [
+            [file_name['href'].split('/')[-2], file_name['file_id']]
+            for file_name in data['data'] if
+            file_name['href'].endswith('/')]
+        # If the folder name is not found in the list of folders, create
+        # the folder
+        if folder_name not in [file[0] for file in folders]:
+            nc.mkdir(folder_name)
+        # WebDAV servers do not all accept chunked transfer encoding:
+        # spool the backup so that it is sent with its length. Nextcloud
+        # only shows a file once its PUT is complete.
+        remote_file_path = "/%s/%s" % (folder_name, target['backup_filename'])
+        with tempfile.TemporaryFile() as spool:
+            shutil.copyfileobj(source, spool, BACKUP_CHUNK_SIZE)
+            spool.seek(0)
+            nc.put_file_contents(remote_file_path, spool)
+
+    def _upload_to_amazon_s3(self, target, source):
+        """Upload the backup to the Amazon S3 bucket"""
+        if not (target['aws_access_key'] and
+                target['aws_secret_access_key']):
+            raise UserError('Please check connection')
+        # Create a boto3 client for Amazon S3 with provided access key id
+        # and secret access key
+        bo3 = boto3.client(
+            's3',
+            aws_access_key_id=target['aws_access_key'],
+            aws_secret_access_key=target['aws_secret_access_key'])
+        # Create the folder in the bucket, if it doesn't already exist
+        bo3.put_object(Bucket=target['bucket_file_name'],
+                       Key=target['aws_folder_name'] + '/')
+        # upload_fileobj sends a multipart upload part by part as the backup
+        # is read, and aborts it if reading fails: the object only exists
+        # once every part is sent
+        remote_file_path = "%s/%s" % (target['aws_folder_name'],
+                                      target['backup_filename'])
+        try:
+            bo3.upload_fileobj(source, target['bucket_file_name'],
+                               remote_file_path)
+        except Exception:
+            with contextlib.suppress(Exception):
+                bo3.delete_object(Bucket=target['bucket_file_name'],
+                                  Key=remote_file_path)
+            raise
+
+    @api.model
+    def _cron_apply_retention(self):
+        """Remove the expired backups of every configuration removing old
+        backups. Each destination is listed once and cleaned in its own
+        thread, apart from the backup cron so uploads never wait on it."""
+        started = time.monotonic()
+        now = fields.Datetime.now()
+        targets = {}
+        for rec in self.search([('auto_remove', '=', True)]):
+            try:
+                targets[rec] = dict(rec._get_upload_target(),
+                                    chains=rec._get_snapshot_chains())
+            except Exception as error:
+                _logger.warning('Retention of %s failed: %s', rec.name, error)
+        if not targets:
+            return
+
+        def apply_retention(retention_method, target):
+            def select(names):
+                return select_expired_backups(
+                    parse_backup_names(names, target['db_name']), target, now)
+
+            started_at = time.monotonic()
+            expired = retention_method(target, select)
+            _logger.info('Retention: removed %s backups from %s in %.1fs',
+                         len(expired), target['backup_destination'],
+                         time.monotonic() - started_at)
+            return expired
+
+        with ThreadPoolExecutor(
+                max_workers=min(len(targets), BACKUP_UPLOAD_WORKERS),
+                thread_name_prefix='db_backup_retention') as executor:
+            futures = {
+                rec: executor.submit(
+                    apply_retention, getattr(rec, '_apply_retention_to_%s' %
+                                             target['backup_destination']),
+                    target)
+                for rec, target in targets.items()
+            }
+        for rec, future in futures.items():
+            if future.exception():
+                _logger.warning('Retention of %s failed: %s', rec.name,
+                                future.exception())
+                continue
+            # Removed archives can no longer be restored
+            expired = set(future.result())
+            rec.snapshot_ids.filtered(lambda s: s.name in expired).unlink()
+        _logger.info('Retention of %s configurations done in %.1fs',
+                     len(targets), time.monotonic() - started)
+
+    def _get_snapshot_chains(self):
+        """Map the archive of each snapshot to the archives it needs"""
+        self.ensure_one()
+        chains = {}
+        members = {}
+        for snapshot in self.snapshot_ids.sorted(
+                lambda s: (s.backup_date, s.id)):
+            chain = members.setdefault(
+                (snapshot.full_snapshot_id or snapshot).id, [])
+            chain.append(snapshot.name)
+            chains[snapshot.name] = list(chain)
+        return chains
+
+    def _apply_retention_to_local(self, target, select):
+        """Remove expired backups from the local backup path"""
+        if not os.path.isdir(target['backup_path']):
+            return []
+        expired = select(os.listdir(target['backup_path']))
+        for name in expired:
+            os.remove(os.path.join(target['backup_path'], name))
+        return expired
+
+    def _apply_retention_to_ftp(self, target, select):
+        """Remove expired backups from the FTP server in one session"""
+        ftp_server = ftplib.FTP()
+        ftp_server.connect(target['ftp_host'], int(target['ftp_port']))
+        ftp_server.login(target['ftp_user'], target['ftp_password'])
+        ftp_server.encoding = "utf-8"
+        try:
+            ftp_server.cwd(target['ftp_path'])
+            expired = select(
+                [os.path.basename(name) for name in ftp_server.nlst()])
+            for name in expired:
+                ftp_server.delete(name)
+        finally:
+            ftp_server.close()
+        return expired
+
+    def _apply_retention_to_sftp(self, target, select):
+        """Remove expired backups from the SFTP server in one session"""
+        client = paramiko.SSHClient()
+        client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+        try:
+            client.connect(hostname=target['sftp_host'],
+                           username=target['sftp_user'],
+                           password=target['sftp_password'],
+                           port=target['sftp_port'])
+            sftp = client.open_sftp()
+            sftp.chdir(target['sftp_path'])
+            expired = select(sftp.listdir())
+            for name in expired:
+                sftp.unlink(name)
+            sftp.close()
+        finally:
+            client.close()
+        return expired
+
+    def _apply_retention_to_google_drive(self, target, select):
+        """Remove expired backups from the Google Drive folder"""
+        headers = {
+            "Authorization": "Bearer %s" % target['gdrive_access_token']}
+        params = {
+            'q': "'%s' in parents and trashed = false" %
+                 target['google_drive_folder_key'],
+            'fields': 'nextPageToken, files(id, name)',
+            'pageSize': 1000,
+        }
+        files = {}
+        while True:
+            response = requests.get(
+                "https://www.googleapis.com/drive/v3/files", headers=headers,
+                params=params)
+            response.raise_for_status()
+            data = response.json()
+            files.update((file['name'], file['id']) for file in data['files'])
+            if not data.get('nextPageToken'):
+                break
+            params['pageToken'] = data['nextPageToken']
+        expired = select(files)
+        for name in expired:
+            requests.delete(
+                "https://www.googleapis.com/drive/v3/files/%s" % files[name],
+                headers=headers)
+        return expired
+
+    def _apply_retention_to_dropbox(self, target, select):
+        """Remove expired backups from the Dropbox folder in batches"""
+        dbx = dropbox.Dropbox(
+            app_key=target['dropbox_client_key'],
+            app_secret=target['dropbox_client_secret'],
+            oauth2_refresh_token=target['dropbox_refresh_token'])
+        result = dbx.files_list_folder(target['dropbox_folder'])
+        entries = list(result.entries)
+        while result.has_more:
+            result = dbx.files_list_folder_continue(result.cursor)
+            entries += result.entries
+        paths = {entry.name: entry.path_display for entry in entries}
+        expired = select(paths)
+        for names in split_every(1000, expired):
+            dbx.files_delete_batch(
+                [dropbox.files.DeleteArg(paths[name]) for name in names])
+        return expired
+
+    def _apply_retention_to_onedrive(self, target, select):
+        """Remove expired backups from the Onedrive folder in batches"""
+        headers = {
+            'Authorization': 'Bearer %s' % target['onedrive_access_token'],
+            'Content-Type': 'application/json'}
+        url = MICROSOFT_GRAPH_END_POINT + "/v1.0/me/drive/items/%s/children?$select=id,name" % target['onedrive_folder_key']
+        items = {}
+        while url:
+            response = requests.get(url, headers=headers)
+            response.raise_for_status()
+            data = response.json()
+            items.update((item['name'], item['id'])
+                         for item in data.get('value', []))
+            url = data.get('@odata.nextLink')
+        expired = select(items)
+        # Microsoft Graph runs up to 20 requests per batch
+        for names in split_every(20, expired):
+            requests.post(MICROSOFT_GRAPH_END_POINT + "/v1.0/$batch",
+                          headers=headers, json={'requests': [{
+                              'id': str(index),
+                              'method': 'DELETE',
+                              'url': '/me/drive/items/%s' % items[name],
+                          } for index, name in enumerate(names)]})
+        return expired
+
+    def _apply_retention_to_next_cloud(self, target, select):
+        """Remove expired backups from the NextCloud folder"""
+        nc = nextcloud_client.Client(target['domain'])
+        nc.login(target['next_cloud_user_name'],
+                 target['next_cloud_password'])
+        paths = {item.path.rstrip('/').split('/')[-1]: item.path
+                 for item in nc.list('/' + target['nextcloud_folder_key'])}
+        expired = select(paths)
+        for name in expired:
+            nc.delete(paths[name])
+        return expired
+
+    def _apply_retention_to_amazon_s3(self, target, select):
+        """Remove expired backups from the Amazon S3 folder in batches"""
+        bo3 = boto3.client(
+            's3',
+            aws_access_key_id=target['aws_access_key'],
+            aws_secret_access_key=target['aws_secret_access_key'])
+        keys = {}
+        for page in bo3.get_paginator('list_objects_v2').paginate(
+                Bucket=target['bucket_file_name'],
+                Prefix=target['aws_folder_name'] + '/'):
+            for obj in page.get('Contents', []):
+                keys[obj['Key'].rsplit('/', 1)[-1]] = obj['Key']
+        expired = select(keys)
+        # delete_objects takes up to 1000 keys
+        for names in split_every(1000, expired):
+            bo3.delete_objects(Bucket=target['bucket_file_name'], Delete={
+                'Objects': [{'Key': keys[name]} for name in names],
+                'Quiet': True,
+            })
+        return expired
+
+    def _prepare_filestore_plan(self):
+        """Return the FilestorePlan of this configuration's next backup, or
+        None when the filestore is backed up in full."""
+        self.ensure_one()
+        if self.backup_format != 'zip' or \
+                self.filestore_mode != 'incremental':
+            return None
+        full_snapshot = self.env['db.backup.snapshot'].search([
+            ('config_id', '=', self.id), ('snapshot_type', '=', 'full')],
+            order='backup_date desc, id desc', limit=1)
+        if not full_snapshot or full_snapshot.backup_date + timedelta(
+                days=self.full_backup_interval) <= fields.Datetime.now():
+            return FilestorePlan()
+        self.env.cr.execute(
+            "SELECT path FROM db_backup_blob WHERE config_id = %s", [self.id])
+        return FilestorePlan(
+            full_snapshot=full_snapshot,
+            known={path for path, in self.env.cr.fetchall()},
+            chain=self.snapshot_ids[:1]._get_chain().mapped('name'))
+
+    def _record_backup_snapshot(self, filestore_plan):
+        """Remember the attachments uploaded by a successful incremental
+        backup. A full snapshot starts a new chain and forgets the
+        attachments of the previous one."""
+        self.ensure_one()
+        if not filestore_plan:
+            return
+        blobs = self.env['db.backup.blob']
+        if not filestore_plan.full_snapshot:
+            blobs.search([('config_id', '=', self.id)]).unlink()
+        snapshot = self.env['db.backup.snapshot'].create({
+            'config_id': self.id,
+            'name': self.backup_filename,
+            'backup_date': fields.Datetime.now(),
+            'snapshot_type': 'incremental' if filestore_plan.full_snapshot
+            else 'full',
+            'full_snapshot_id': filestore_plan.full_snapshot and
+            filestore_plan.full_snapshot.id,
+            'file_count': len(filestore_plan.files),
+            'added_count': len(filestore_plan.added),
+        })
+        blobs.create([{
+            'config_id': self.id,
+            'snapshot_id': snapshot.id,
+            'path': path,
+        } for path in filestore_plan.added])
+
+    def dump_data(self, db_name, stream, backup_format, filestore_plan=None):
         """Dump database `db` into file-like object `stream` if stream is None
         return a file object with the dump. """
+        self._check_backup_user()
+        options = self._get_dump_options()
+        if stream:
+            self._stream_dump(db_name, stream, backup_format, filestore_plan,
+                              options)
+        else:
+            t = tempfile.TemporaryFile()
+            self._stream_dump(db_name, t, backup_format, filestore_plan,
+                              options)
+            t.seek(0)
+            return t
+
+    @contextlib.contextmanager
+    def _open_dump_stream(self, db_name, backup_format, filestore_plan=None):
+        """Yield a readable pipe fed with the dump of `db_name` by a
+        background thread, so uploads send the backup while it is being
+        produced instead of staging it in a temporary file. Uploads write
+        to a temporary name and rename it once the pipe ends without a
+        dump error."""
+        self._check_backup_user()
+        options = self._get_dump_options()
+        read_fd, write_fd = os.pipe()
+        errors = []
+
+        def produce():
+            try:
+                with open(write_fd, 'wb') as writer:
+                    self._stream_dump(db_name, writer, backup_format,
+                                      filestore_plan, options)
+            except Exception as e:
+                errors.append(e)
 
+        thread = threading.Thread(target=produce, name='db_backup_dump',
+                                  daemon=True)
+        thread.start()
+        with open(read_fd, 'rb') as reader:
+            try:
+                yield DumpPipeReader(reader, thread, errors)
+            finally:
+                # Closing the reader stops the dump if the upload gave up
+                reader.close()
+                thread.join()
+        if errors:
+            raise errors[0]
+
+    def _get_dump_options(self):
+        """DumpOptions of this configuration, the defaults on the model"""
+        if len(self) != 1:
+            return DEFAULT_DUMP_OPTIONS
+        return DumpOptions(self.dump_compression, self.compression_level,
+                           self.dump_jobs)
+
+    def _check_backup_user(self):
+        """Backups may only be taken by the backup cron's user"""
         cron_user_id = self.env.ref('auto_database_backup.ir_cron_auto_db_backup').user_id.id
         if cron_user_id != self.env.user.id:
             _logger.error(
                 'Unauthorized database operation. Backups should only be available from the cron job.')
             raise ValidationError("Unauthorized database operation. Backups should only be available from the cron job.")
 
+    def _stream_dump(self, db_name, stream, backup_format,
+                     filestore_plan=None, options=DEFAULT_DUMP_OPTIONS):
+        """Write the dump of `db_name` to `stream` in chunks of
+        BACKUP_CHUNK_SIZE. The pg_dump output is never held in memory and
+        zip backups read the filestore in place instead of copying it. With
+        a `filestore_plan`, only the attachments it does not know yet are
+        added, along with an index of the whole filestore. `options` are the
+        DumpOptions of the backup. Does not use the ORM, so it can run
+        outside the cron's thread."""
         _logger.info('DUMP DB: %s format %s', db_name, backup_format)
         cmd = [find_pg_tool('pg_dump'), '--no-owner', db_name]
-        env = exec_pg_environ()
-        if backup_format == 'zip':
-            with tempfile.TemporaryDirectory() as dump_dir:
-                filestore = odoo.tools.config.filestore(db_name)
-                cmd.append('--file=' + os.path.join(dump_dir, 'dump.sql'))
-                subprocess.run(cmd, env=env, stdout=subprocess.DEVNULL,
-                               stderr=subprocess.STDOUT, check=True)
-                if os.path.exists(filestore):
-                    shutil.copytree(filestore,
-                                    os.path.join(dump_dir, 'filestore'))
-                with open(os.path.join(dump_dir, 'manifest.json'), 'w') as fh:
-                    db = odoo.sql_db.db_connect(db_name)
-                    with db.cursor() as cr:
-                        json.dump(self._dump_db_manifest(cr), fh, indent=4)
-                if stream:
-                    odoo.tools.osutil.zip_dir(dump_dir, stream,
-                                              include_dir=False,
-                                              fnct_sort=lambda
-                                                  file_name: file_name != 'dump.sql')
-                else:
-                    t = tempfile.TemporaryFile()
-                    odoo.tools.osutil.zip_dir(dump_dir, t, include_dir=False,
-                                              fnct_sort=lambda
-                                                  file_name: file_name != 'dump.sql')
-                    t.seek(0)
-                    return t
-        else:
-            cmd.append('--format=c')
-            process = subprocess.Popen(cmd, env=env, stdout=subprocess.PIPE)
-            stdout, _ = process.communicate()
-            if stream:
-                stream.write(stdout)
+        if backup_format == 'tar':
+            self._stream_directory_dump(cmd, db_name, stream, options)
+            return
+        if backup_format == 'dump':
+            cmd += ['--format=c'] + self._get_compress_args(options)
+        process = subprocess.Popen(cmd, env=exec_pg_environ(),
+                                   stdout=subprocess.PIPE)
+        try:
+            if backup_format == 'zip':
+                compression = zipfile.ZIP_STORED \
+                    if options.compression == 'none' else zipfile.ZIP_DEFLATED
+                with zipfile.ZipFile(stream, 'w', compression,
+                                     allowZip64=True,
+                                     compresslevel=options.level or None) as zf:
+                    with zf.open('dump.sql', 'w', force_zip64=True) as dump:
+                        self._copy_dump_output(process, cmd, dump)
+                    db_conn = odoo.sql_db.db_connect(db_name)
+                    with db_conn.cursor() as cr:
+                        zf.writestr('manifest.json', json.dumps(
+                            self._dump_db_manifest(cr), indent=4))
+                    filestore = odoo.tools.config.filestore(db_name)
+                    for root, dirs, files in os.walk(filestore):
+                        dirs.sort()
+                        for file_name in sorted(files):
+                            path = os.path.join(root, file_name)
+                            rel_path = os.path.relpath(path, filestore)
+                            if filestore_plan:
+                                filestore_plan.files.append(rel_path)
+                                if rel_path in filestore_plan.known:
+                                    continue
+                                filestore_plan.added.append(rel_path)
+                            zf.write(path, os.path.join('filestore', rel_path))
+                    if filestore_plan:
+                        zf.writestr(FILESTORE_INDEX,
+                                    json.dumps(filestore_plan.index()))
             else:
-                return stdout
+                self._copy_dump_output(process, cmd, stream)
+        finally:
+            if process.poll() is None:
+                process.kill()
+            process.stdout.close()
+            process.wait()
+
+    def _stream_directory_dump(self, cmd, db_name, stream, options):
+        """Dump `db_name` in pg_dump's directory format with parallel jobs
+        and write the directory to `stream` as a tar archive. Its files are
+        already compressed by pg_dump."""
+        with tempfile.TemporaryDirectory() as dump_dir:
+            dump_path = os.path.join(dump_dir, db_name)
+            started = time.monotonic()
+            subprocess.run(cmd + [
+                '--format=d', '--jobs=%d' % options.jobs,
+                '--file=' + dump_path,
+            ] + self._get_compress_args(options), env=exec_pg_environ(),
+                check=True)
+            _logger.info('DUMP DB: %s dumped by %s jobs in %.1fs', db_name,
+                         options.jobs, time.monotonic() - started)
+            with tarfile.open(fileobj=stream, mode='w|',
+                              bufsize=BACKUP_CHUNK_SIZE) as tar:
+                tar.add(dump_path, arcname=db_name)
+
+    def _get_compress_args(self, options):
+        """pg_dump arguments compressing a custom or directory dump"""
+        if options.compression == 'none':
+            return ['--compress=0']
+        if options.compression == 'zstd':
+            return ['--compress=zstd' + (
+                ':%d' % options.level if options.level else '')]
+        return ['--compress=%d' % options.level] if options.level else []
+
+    def _copy_dump_output(self, process, cmd, stream):
+        """Copy the output of a running pg_dump `process` to `stream` and
+        fail when pg_dump did not complete."""
+        shutil.copyfileobj(process.stdout, stream, BACKUP_CHUNK_SIZE)
+        if process.wait():
+            raise subprocess.CalledProcessError(process.returncode, cmd)
 
     def _dump_db_manifest(self, cr):
         """ This function generates a manifest dictionary for database dump."""
@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+###############################################################################
+#
+#    Cybrosys Technologies Pvt. Ltd.
+#
+#    Copyright (C) 2023-TODAY Cybrosys Technologies(<https://www.cybrosys.com>)
+#    Author: Cybrosys Techno Solutions (odoo@cybrosys.com)
+#
+#    You can modify it under the terms of the GNU LESSER
+#    GENERAL PUBLIC LICENSE (LGPL v3), Version 3.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU LESSER GENERAL PUBLIC LICENSE (LGPL v3) for more details.
+#
+#    You should have received a copy of the GNU LESSER GENERAL PUBLIC LICENSE
+#    (LGPL v3) along with this program.
+#    If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+import json
+import os
+import shutil
+import zipfile
+from odoo import fields, models, _
+from odoo.exceptions import UserError
+
+# Archive member listing every filestore file present when an incremental
+# backup was taken, and the archives it builds on
+FILESTORE_INDEX = 'filestore_index.json'
+
+
+class FilestorePlan:
+    """Attachments an incremental zip backup must contain. `known` and
+    `chain` are read by the dump, which fills `files` and `added`."""
+
+    def __init__(self, full_snapshot=None, known=(), chain=()):
+        # Snapshot the backup builds on, None for a full snapshot
+        self.full_snapshot = full_snapshot
+        # Filestore paths already uploaded since that full snapshot
+        self.known = set(known)
+        # Archive names of the chain, oldest first
+        self.chain = list(chain)
+        self.files = []
+        self.added = []
+
+    def index(self):
+        """Content of the FILESTORE_INDEX member"""
+        return {
+            'full': not self.full_snapshot,
+            'chain': self.chain,
+            'files': self.files,
+        }
+
+
+def assemble_archive(archive_dir, archive_name, output):
+    """Write into `output` a regular Odoo backup zip holding the database
+    and the complete filestore of the incremental backup `archive_name`.
+
+    Attachments are taken from the archives of its chain, which must all be
+    in `archive_dir`. Returns the number of filestore files written.
+    """
+    with zipfile.ZipFile(os.path.join(archive_dir, archive_name)) as target:
+        index = json.loads(target.read(FILESTORE_INDEX))
+        missing = set(index['files'])
+        with zipfile.ZipFile(output, 'w', zipfile.ZIP_DEFLATED,
+                             allowZip64=True) as zf:
+            for name in ('dump.sql', 'manifest.json'):
+                _copy_member(target, target.getinfo(name), zf)
+            # Newest archives first, each attachment is taken once
+            for name in [archive_name] + index['chain'][::-1]:
+                with zipfile.ZipFile(os.path.join(archive_dir, name)) as src:
+                    for info in src.infolist():
+                        rel_path = info.filename[len('filestore/'):]
+                        if info.filename.startswith('filestore/') and \
+                                rel_path in missing:
+                            _copy_member(src, info, zf)
+                            missing.discard(rel_path)
+                if not missing:
+                    break
+    if missing:
+        raise UserError(_('%(count)s attachments of %(name)s were not found '
+                          'in the archives of its chain.',
+                          count=len(missing), name=archive_name))
+    return len(index['files'])
+
+
+def _copy_member(src, info, zf):
+    """Copy member `info` of zip `src` into `zf` without loading it"""
+    with src.open(info) as source, \
+            zf.open(info.filename, 'w', force_zip64=True) as dest:
+        shutil.copyfileobj(source, dest)
+
+
+class DbBackupSnapshot(models.Model):
+    """Zip backup taken in incremental filestore mode. A full snapshot holds
+    the whole filestore; each incremental one only the attachments added
+    since the previous snapshot of its chain."""
+    _name = 'db.backup.snapshot'
+    _description = 'Database Backup Snapshot'
+    _order = 'backup_date desc, id desc'
+
+    config_id = fields.Many2one('db.backup.configure', string='Backup',
+                                required=True, ondelete='cascade', index=True,
+                                help='Backup configuration of the snapshot')
+    name = fields.Char(string='Archive', required=True,
+                       help='File name of the backup archive')
+    backup_date = fields.Datetime(string='Backup Date', required=True,
+                                  help='Date of the backup')
+    snapshot_type = fields.Selection([
+        ('full', 'Full'),
+        ('incremental', 'Incremental'),
+    ], string='Type', required=True, help='Type of the snapshot')
+    full_snapshot_id = fields.Many2one('db.backup.snapshot',
+                                       string='Full Snapshot',
+                                       ondelete='cascade', index=True,
+                                       help='Full snapshot the incremental '
+                                            'backup builds on')
+    file_count = fields.Integer(string='Attachments',
+                                help='Attachments in the filestore at backup '
+                                     'time')
+    added_count = fields.Integer(string='Uploaded',
+                                 help='Attachments stored in this archive')
+
+    def _get_chain(self):
+        """Snapshots needed to restore this one, oldest first"""
+        self.ensure_one()
+        full_snapshot = self.full_snapshot_id or self
+        return full_snapshot | self.search([
+            ('full_snapshot_id', '=', full_snapshot.id),
+            ('backup_date', '<=', self.backup_date),
+        ], order='backup_date, id')
+
+    def action_build_archive(self):
+        """Build a regular Odoo backup of a local incremental snapshot, next
+        to its archives, that can be restored from the database manager."""
+        self.ensure_one()
+        chain = self._get_chain()
+        if self.config_id.backup_destination != 'local':
+            raise UserError(_(
+                'Restorable archives can only be built for local backups. '
+                'Restoring %(name)s needs the archives %(archives)s.',
+                name=self.name, archives=', '.join(chain.mapped('name'))))
+        backup_path = self.config_id.backup_path
+        output = os.path.join(backup_path, '%s_restore.zip' %
+                              os.path.splitext(self.name)[0])
+        with open(output, 'wb') as stream:
+            file_count = assemble_archive(backup_path, self.name, stream)
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'display_notification',
+            'params': {
+                'type': 'success',
+                'title': _('Archive Built'),
+                'message': _('%(output)s holds the database and its %(count)s '
+                             'attachments.', output=output, count=file_count),
+                'sticky': True,
+            }
+        }
+
+
+class DbBackupBlob(models.Model):
+    """Filestore attachment already uploaded to a backup destination since
+    its last full snapshot"""
+    _name = 'db.backup.blob'
+    _description = 'Database Backup Filestore Blob'
+
+    config_id = fields.Many2one('db.backup.configure', string='Backup',
+                                required=True, ondelete='cascade', index=True,
+                                help='Backup configuration of the blob')
+    snapshot_id = fields.Many2one('db.backup.snapshot', string='Snapshot',
+                                  required=True, ondelete='cascade',
+                                  help='Snapshot whose archive holds the '
+                                       'blob')
+    path = fields.Char(string='Path', required=True,
+                       help='Path of the attachment in the filestore')
+
+    _sql_constraints = [
+        ('config_path_uniq', 'unique (config_id, path)',
+         'A blob is uploaded once per backup configuration.'),
+    ]
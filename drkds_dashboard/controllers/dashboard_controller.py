@@ -2,6 +2,8 @@ from odoo import http
 from odoo.http import request
 import json
 
+from ..models.dashboard_template import DEFAULT_RESPONSE_WAIT
+
 class DrkdsDashboardController(http.Controller):
     @http.route('/drkds_dashboard/get_metrics', type='json', auth='user', methods=['POST'])
     def get_dashboard_metrics(self, **params):
@@ -11,6 +13,8 @@ class DrkdsDashboardController(http.Controller):
         try:
             template_id = params.get('template_id')
             additional_domain = params.get('domain', [])
+            # Seconds to wait for slow metrics, the rest arrive on the bus
+            wait = params.get('wait', DEFAULT_RESPONSE_WAIT)
             
             if not template_id:
                 return {
@@ -28,7 +32,7 @@ class DrkdsDashboardController(http.Controller):
                 }
             
             # Generate dashboard configuration
-            dashboard_config = template.generate_dashboard_data(additional_domain)
+            dashboard_config = template.generate_dashboard_data(additional_domain, wait)
             
             return {
                 'success': True,
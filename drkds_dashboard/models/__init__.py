@@ -1,3 +1,4 @@
+from . import dashboard_cache
 from . import dashboard_metric
 from . import dashboard_filter
 from . import dashboard_template
@@ -0,0 +1,103 @@
+from odoo import models, fields, api
+from collections import OrderedDict
+import copy
+import logging
+import threading
+
+_logger = logging.getLogger(__name__)
+
+
+class MetricResultCache:
+    """Per-process LRU cache of metric results.
+
+    Keys carry everything the result depends on, including the time bucket
+    and the change generation of the metric's model, so stale entries are
+    never read again and simply age out of the LRU.
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return (True, value) for a cached key, (False, None) otherwise"""
+        with self._lock:
+            if key not in self._entries:
+                return False, None
+            self._entries.move_to_end(key)
+            value = self._entries[key]
+        return True, copy.deepcopy(value)
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = copy.deepcopy(value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+metric_result_cache = MetricResultCache(4096)
+
+
+class DrkdsDashboardInvalidation(models.Model):
+    """Insert-only log of transactions that changed a model read by metrics.
+
+    The newest id per model is its change generation. Inserting instead of
+    updating a counter keeps concurrent writers from conflicting.
+    """
+    _name = 'drkds.dashboard.invalidation'
+    _description = 'Dashboard Metric Invalidation'
+    _log_access = False
+
+    model_name = fields.Char(string='Model', required=True, index=True)
+
+    @api.model
+    def _notify_change(self, model_name):
+        """Log a change of ``model_name`` once, when the transaction commits"""
+        changed = self.env.cr.precommit.data.setdefault('drkds_dashboard.changed_models', set())
+        if not changed:
+            self.env.cr.precommit.add(self._flush_changes)
+        changed.add(model_name)
+
+    @api.model
+    def _has_pending_change(self, model_name):
+        return model_name in self.env.cr.precommit.data.get('drkds_dashboard.changed_models', ())
+
+    def _flush_changes(self):
+        changed = self.env.cr.precommit.data.pop('drkds_dashboard.changed_models', set())
+        if changed:
+            self.env.cr.execute(
+                "INSERT INTO drkds_dashboard_invalidation (model_name) SELECT unnest(%s)",
+                [sorted(changed)],
+            )
+
+    @api.model
+    def _get_generations(self, model_names):
+        """Current change generation of each of ``model_names``"""
+        generations = {}
+        for model_name in set(model_names):
+            # One index lookup per model instead of aggregating the whole log
+            self.env.cr.execute(
+                "SELECT max(id) FROM drkds_dashboard_invalidation WHERE model_name = %s",
+                [model_name],
+            )
+            generations[model_name] = self.env.cr.fetchone()[0] or 0
+        return generations
+
+    @api.model
+    def _gc_invalidations(self):
+        """Drop log rows older than the newest one of their model"""
+        self.env.cr.execute("""
+            DELETE FROM drkds_dashboard_invalidation log
+             USING (SELECT model_name, max(id) AS id
+                      FROM drkds_dashboard_invalidation
+                  GROUP BY model_name) newest
+             WHERE log.model_name = newest.model_name
+               AND log.id < newest.id
+        """)
+        _logger.info(f"Removed {self.env.cr.rowcount} dashboard invalidation rows")
@@ -3,11 +3,43 @@ from odoo.exceptions import ValidationError
 import re
 import logging
 from odoo.tools.safe_eval import safe_eval
+from .dashboard_cache import metric_result_cache
 import time
 import datetime
 
 _logger = logging.getLogger(__name__)
 
+CHANGE_METHODS = ('create', 'write', '_write', 'unlink')
+
+
+def _patch_model_changes(Model):
+    """Make ``Model`` log its changes so cached metric results are dropped"""
+    if getattr(Model.__dict__.get('unlink'), 'drkds_dashboard_patch', False):
+        return
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        self.env['drkds.dashboard.invalidation']._notify_change(self._name)
+        return create.origin(self, vals_list)
+
+    def write(self, vals):
+        self.env['drkds.dashboard.invalidation']._notify_change(self._name)
+        return write.origin(self, vals)
+
+    # Stored computed fields are flushed through _write without write()
+    def _write(self, vals):
+        self.env['drkds.dashboard.invalidation']._notify_change(self._name)
+        return _write.origin(self, vals)
+
+    def unlink(self):
+        self.env['drkds.dashboard.invalidation']._notify_change(self._name)
+        return unlink.origin(self)
+
+    for method in (create, write, _write, unlink):
+        method.origin = getattr(Model, method.__name__)
+        method.drkds_dashboard_patch = True
+        setattr(Model, method.__name__, method)
+
 class DrkdsDashboardMetric(models.Model):
     _name = 'drkds.dashboard.metric'
     _description = 'Dashboard Metrics'
@@ -20,11 +52,34 @@ class DrkdsDashboardMetric(models.Model):
         ('count', 'Record Count'),
         ('sum', 'Sum of Field'),
         ('avg', 'Average of Field'),
+        ('min', 'Minimum of Field'),
+        ('max', 'Maximum of Field'),
+        ('count_distinct', 'Distinct Values of Field'),
         ('custom', 'Custom Calculation')
     ], string='Metric Type', default='count', required=True)
     
     field_name = fields.Char(string='Field to Aggregate')
+    groupby_field = fields.Char(
+        string='Group By Field',
+        help="Field splitting the metric into a series, e.g. date_order, partner_id or user_id"
+    )
+    date_granularity = fields.Selection([
+        ('day', 'Day'),
+        ('week', 'Week'),
+        ('month', 'Month'),
+        ('quarter', 'Quarter'),
+        ('year', 'Year')
+    ], string='Date Bucket', default='month',
+        help="Bucket size when grouping by a date field")
     python_code = fields.Text(string='Custom Calculation')
+    cache_ttl = fields.Integer(
+        string='Cache Lifetime (s)', default=60,
+        help="Seconds a result is reused for the same domain and access scope, 0 disables caching"
+    )
+    timeout = fields.Integer(
+        string='Time Budget (s)', default=30,
+        help="Seconds the metric's queries may run when evaluated for a dashboard, 0 for no limit"
+    )
     
     description = fields.Text(string='Description')
     active = fields.Boolean(default=True)
@@ -34,7 +89,38 @@ class DrkdsDashboardMetric(models.Model):
         # Add validation logic
         if 'technical_name' not in vals:
             vals['technical_name'] = self._generate_technical_name(vals['name'])
-        return super().create(vals)
+        metric = super().create(vals)
+        metric._update_registry()
+        return metric
+
+    def write(self, vals):
+        res = super().write(vals)
+        if 'model_name' in vals:
+            self._update_registry()
+        return res
+
+    def _register_hook(self):
+        # Track changes of every model a metric reads
+        super()._register_hook()
+        metrics = self.with_context(active_test=False).search([])
+        for model_name in set(metrics.mapped('model_name')):
+            Model = self.env.registry.get(model_name)
+            if Model is not None:
+                _patch_model_changes(Model)
+
+    def _unregister_hook(self):
+        super()._unregister_hook()
+        for Model in self.env.registry.values():
+            for name in CHANGE_METHODS:
+                if getattr(Model.__dict__.get(name), 'drkds_dashboard_patch', False):
+                    delattr(Model, name)
+
+    def _update_registry(self):
+        # Patch newly read models here and in the other workers
+        if self.env.registry.ready and not self.env.context.get('import_file'):
+            self._unregister_hook()
+            self._register_hook()
+            self.env.registry.registry_invalidated = True
 
     def _generate_technical_name(self, name):
         # Generate unique technical name
@@ -46,48 +132,142 @@ class DrkdsDashboardMetric(models.Model):
             counter += 1
         return technical_name
 
-    def calculate_metric(self, domain=None):
+    @api.constrains('metric_type', 'field_name', 'groupby_field')
+    def _validate_aggregate_fields(self):
+        for metric in self:
+            if metric.metric_type not in ('count', 'custom') and not metric.field_name:
+                raise ValidationError(f"Metric {metric.name} needs a field to aggregate")
+            if metric.groupby_field and metric.metric_type == 'custom':
+                raise ValidationError("Custom metrics cannot be grouped")
+
+    def _get_aggregate_spec(self, model):
+        # read_group aggregate of the metric, None when the field is not stored
+        if self.metric_type == 'count':
+            return '__count'
+        field = model._fields[self.field_name]
+        if not field.store:
+            return None
+        return f"{self.field_name}:{self.metric_type}"
+
+    def _get_groupby_spec(self, model):
+        if not self.groupby_field:
+            return None
+        if model._fields[self.groupby_field].type in ('date', 'datetime'):
+            return f"{self.groupby_field}:{self.date_granularity or 'month'}"
+        return self.groupby_field
+
+    def _aggregate(self, model, domain):
+        """Compute a count/sum/avg/min/max/count_distinct metric in SQL.
+
+        Returns the value, or a list of {'key', 'value'} points when the
+        metric is grouped.
+        """
+        aggregate = self._get_aggregate_spec(model)
+        groupby = self._get_groupby_spec(model)
+        if aggregate is None:
+            if groupby:
+                raise ValidationError(f"Field {self.field_name} is not stored and cannot be grouped")
+            return self._aggregate_records(model.search(domain))
+
+        if not groupby:
+            [[value]] = model._read_group(domain, [], [aggregate])
+            return value or 0
+
+        return [
+            {'key': self._format_group_key(key), 'value': value or 0}
+            for key, value in model._read_group(domain, [groupby], [aggregate], order=groupby)
+        ]
+
+    def _aggregate_records(self, records):
+        # Fallback for non-stored fields, which only exist in Python
+        values = records.mapped(self.field_name)
+        if self.metric_type == 'count_distinct':
+            return len(set(values))
+        if not values:
+            return 0
+        if self.metric_type == 'sum':
+            return sum(values)
+        if self.metric_type == 'avg':
+            return sum(values) / len(values)
+        return min(values) if self.metric_type == 'min' else max(values)
+
+    @staticmethod
+    def _format_group_key(key):
+        if isinstance(key, models.BaseModel):
+            return key.display_name or False
+        if isinstance(key, (datetime.date, datetime.datetime)):
+            return key.isoformat()
+        return key
+
+    def _get_cache_key(self, domain, generation):
+        # Everything the result depends on: the metric, the filters, the
+        # records the user may read and the time bucket of the lifetime
+        rule_domain = self.env['ir.rule']._compute_domain(self.model_name, 'read')
+        return (
+            self.env.cr.dbname, self.id, str(self.write_date), repr(domain),
+            self.env.su, repr(rule_domain), tuple(self.env.companies.ids), self.env.lang,
+            self.env.uid if self.metric_type == 'custom' else None,
+            int(time.time() // self.cache_ttl), generation,
+        )
+
+    def get_metric_value(self, domain=None):
+        """Metric value, reusing results cached for ``cache_ttl`` seconds.
+
+        Unlike calculate_metric, errors are raised so they are never cached.
+        """
+        self.ensure_one()
+        # Cached values are shared by users: check the model access the
+        # computation would, the record rules are part of the key
+        self.env[self.model_name].check_access_rights('read')
+        invalidation = self.env['drkds.dashboard.invalidation']
+        # Uncommitted changes are only visible to this transaction
+        if not self.cache_ttl or invalidation._has_pending_change(self.model_name):
+            return self._compute_metric(domain)
+
+        generation = invalidation._get_generations([self.model_name])[self.model_name]
+        key = self._get_cache_key(domain, generation)
+        found, value = metric_result_cache.get(key)
+        if not found:
+            value = self._compute_metric(domain)
+            metric_result_cache.set(key, value)
+        return value
+
+    def _compute_metric(self, domain=None):
         # Metric calculation logic with improved security
+        model = self.env[self.model_name]
+        search_domain = domain or []
+
+        if self.metric_type != 'custom':
+            return self._aggregate(model, search_domain)
+
+        elif self.python_code:
+            # Create safe execution context
+            localdict = {
+                'env': self.env,
+                'model': model,
+                'domain': search_domain,
+                'user': self.env.user,
+                'time': time,
+                'datetime': datetime,
+                'sum': sum,
+                'len': len,
+                'result': None
+            }
+
+            # Execute code safely
+            safe_eval(
+                "result = " + self.python_code,
+                localdict,
+                mode='exec',
+                nocopy=True
+            )
+            return localdict.get('result', 0)
+        return 0
+
+    def calculate_metric(self, domain=None):
         self.ensure_one()
         try:
-            model = self.env[self.model_name]
-            search_domain = domain or []
-            
-            if self.metric_type == 'count':
-                return model.search_count(search_domain)
-            
-            elif self.metric_type == 'sum':
-                records = model.search(search_domain)
-                return sum(records.mapped(self.field_name)) if records else 0
-            
-            elif self.metric_type == 'avg':
-                records = model.search(search_domain)
-                values = records.mapped(self.field_name)
-                return sum(values) / len(values) if values else 0
-            
-            elif self.metric_type == 'custom' and self.python_code:
-                # Create safe execution context
-                localdict = {
-                    'env': self.env,
-                    'model': model,
-                    'domain': search_domain,
-                    'user': self.env.user,
-                    'time': time,
-                    'datetime': datetime,
-                    'sum': sum,
-                    'len': len,
-                    'result': None
-                }
-                
-                # Execute code safely
-                safe_eval(
-                    "result = " + self.python_code,
-                    localdict,
-                    mode='exec',
-                    nocopy=True
-                )
-                return localdict.get('result', 0)
-            return 0
+            return self._compute_metric(domain)
         except Exception as e:
             _logger.error(f"Error calculating metric {self.name}: {str(e)}")
             return 0
@@ -1,10 +1,72 @@
 from odoo import models, fields, api
 from odoo.exceptions import ValidationError
+from concurrent.futures import Future, ThreadPoolExecutor, wait as wait_futures
+import functools
 import json
 import logging
+import time
+import uuid
 
 _logger = logging.getLogger(__name__)
 
+# Metrics a worker process evaluates at the same time, each on its own cursor
+METRIC_WORKERS = 4
+# Seconds get_metrics waits before answering with the metrics computed so far
+DEFAULT_RESPONSE_WAIT = 2.0
+
+_metric_executor = ThreadPoolExecutor(max_workers=METRIC_WORKERS, thread_name_prefix='drkds_dashboard')
+
+
+class InlineExecutor:
+    """Executor running each call right away in the calling thread.
+
+    Used in tests, whose cursors share the test transaction's connection.
+    """
+
+    def submit(self, fn, *args):
+        future = Future()
+        try:
+            future.set_result(fn(*args))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+
+_inline_executor = InlineExecutor()
+
+
+def _evaluate_metric(registry, uid, context, su, metric_id, domain):
+    """Evaluate a metric on a cursor of its own within its time budget.
+
+    Runs in a worker thread. Returns (value, elapsed milliseconds).
+    """
+    started = time.monotonic()
+    try:
+        with registry.cursor() as cr:
+            env = api.Environment(cr, uid, context, su=su)
+            metric = env['drkds.dashboard.metric'].browse(metric_id)
+            if metric.timeout:
+                cr.execute("SET LOCAL statement_timeout = %s", [metric.timeout * 1000])
+            value = metric.get_metric_value(domain)
+    except Exception as e:
+        _logger.error(f"Metric calculation error: {str(e)}")
+        value = {'error': str(e)}
+    return value, round((time.monotonic() - started) * 1000)
+
+
+def _notify_late_metric(registry, uid, token, technical_name, future):
+    # Deliver a metric finished after the response on the user's bus channel
+    value, elapsed = future.result()
+    with registry.cursor() as cr:
+        env = api.Environment(cr, uid, {})
+        env['bus.bus']._sendone(env.user.partner_id, 'drkds_dashboard/metric', {
+            'token': token,
+            'metric': technical_name,
+            'value': value,
+            'time_ms': elapsed,
+        })
+
+
 class DrkdsDashboardTemplate(models.Model):
     _name = 'drkds.dashboard.template'
     _description = 'Dashboard Templates'
@@ -62,9 +124,48 @@ class DrkdsDashboardTemplate(models.Model):
                 except Exception:
                     raise ValidationError("Invalid layout configuration JSON")
 
-    def generate_dashboard_configuration(self, additional_domain=None):
+    def _evaluate_metrics(self, additional_domain=None, wait=None, token=None):
+        """
+        Evaluate the metrics concurrently, each on its own cursor.
+
+        Returns {technical_name: (value, milliseconds)} for the metrics done
+        within ``wait`` seconds (all of them when None) and the technical
+        names of the others, sent on the bus with ``token`` once computed.
+        """
+        # Metrics are read on other cursors
+        self.env.flush_all()
+        registry = self.env.registry
+        executor = self._get_metric_executor()
+        futures = {
+            executor.submit(
+                _evaluate_metric, registry, self.env.uid, dict(self.env.context),
+                self.env.su, metric.id, additional_domain,
+            ): metric.technical_name
+            for metric in self.metric_ids
+        }
+        done, not_done = wait_futures(futures, timeout=wait)
+        for future in not_done:
+            future.add_done_callback(functools.partial(
+                _notify_late_metric, registry, self.env.uid, token, futures[future]
+            ))
+        # Keep the template's metric order
+        return (
+            {name: future.result() for future, name in futures.items() if future in done},
+            [name for future, name in futures.items() if future in not_done],
+        )
+
+    def _get_metric_executor(self):
+        # Test cursors cannot be used from other threads
+        if self.env.registry.in_test_mode():
+            return _inline_executor
+        return _metric_executor
+
+    def generate_dashboard_configuration(self, additional_domain=None, wait=None):
         """
         Generate comprehensive dashboard configuration
+
+        Metrics still running after ``wait`` seconds are listed in
+        ``pending`` and delivered on the bus under the configuration's token.
         """
         self.ensure_one()
         
@@ -73,20 +174,20 @@ class DrkdsDashboardTemplate(models.Model):
             dashboard_config = {
                 'name': self.name,
                 'description': self.description,
+                'token': uuid.uuid4().hex,
                 'metrics': {},
+                'timings': {},
+                'pending': [],
                 'filters': {},
                 'layout': json.loads(self.layout_configuration or '{}')
             }
             
             # Calculate metrics
-            for metric in self.metric_ids:
-                try:
-                    dashboard_config['metrics'][metric.technical_name] = metric.calculate_metric(additional_domain)
-                except Exception as e:
-                    _logger.error(f"Metric calculation error: {str(e)}")
-                    dashboard_config['metrics'][metric.technical_name] = {
-                        'error': str(e)
-                    }
+            results, pending = self._evaluate_metrics(additional_domain, wait, dashboard_config['token'])
+            for technical_name, (value, elapsed) in results.items():
+                dashboard_config['metrics'][technical_name] = value
+                dashboard_config['timings'][technical_name] = elapsed
+            dashboard_config['pending'] = pending
             
             # Apply filters
             applied_domain = []
@@ -106,11 +207,11 @@ class DrkdsDashboardTemplate(models.Model):
             _logger.error(f"Dashboard configuration generation error: {str(e)}")
             raise ValidationError(f"Error generating dashboard configuration: {str(e)}")
     
-    def generate_dashboard_data(self, additional_domain=None):
+    def generate_dashboard_data(self, additional_domain=None, wait=None):
         """
         Compatibility method for the controller
         """
-        return self.generate_dashboard_configuration(additional_domain)
+        return self.generate_dashboard_configuration(additional_domain, wait)
 
     def action_preview_template(self):
         """
@@ -2,7 +2,7 @@
 
 import { registry } from "@web/core/registry";
 import { useService } from "@web/core/utils/hooks";
-import { Component, useState, onWillStart, useRef } from "@odoo/owl";
+import { Component, useState, onWillStart, onWillUnmount, useRef } from "@odoo/owl";
 
 class DrkdsDashboard extends Component {
     setup() {
@@ -15,12 +15,20 @@ class DrkdsDashboard extends Component {
         this.orm = useService("orm");
         this.rpc = useService("rpc");
         this.action = useService("action");
+        this.busService = useService("bus_service");
         this.templateSelectorRef = useRef("templateSelector");
         this.metricsContainerRef = useRef("metricsContainer");
         
         onWillStart(async () => {
             await this.loadTemplates();
         });
+        
+        // Slow metrics are delivered on the bus after the first response
+        this.onMetricResult = this.onMetricResult.bind(this);
+        this.busService.subscribe("drkds_dashboard/metric", this.onMetricResult);
+        onWillUnmount(() => {
+            this.busService.unsubscribe("drkds_dashboard/metric", this.onMetricResult);
+        });
     }
     
     async loadTemplates() {
@@ -57,6 +65,16 @@ class DrkdsDashboard extends Component {
         }
     }
     
+    onMetricResult(payload) {
+        const data = this.state.dashboardData;
+        // Ignore metrics of an earlier load
+        if (payload.token !== data.token) return;
+        
+        data.metrics[payload.metric] = payload.value;
+        data.timings[payload.metric] = payload.time_ms;
+        data.pending = data.pending.filter((name) => name !== payload.metric);
+    }
+    
     async onTemplateChange(ev) {
         this.state.currentTemplateId = parseInt(ev.target.value);
         await this.loadDashboardData();
@@ -1,5 +1,30 @@
+import json
+from concurrent.futures import Future
+from unittest.mock import patch
+
 from odoo.tests.common import TransactionCase
 
+
+class LateExecutor:
+    """Executor leaving the metrics of ``late_ids`` running until run_late()"""
+
+    def __init__(self, late_ids):
+        self.late_ids = late_ids
+        self.late = []
+
+    def submit(self, fn, *args):
+        future = Future()
+        # _evaluate_metric(registry, uid, context, su, metric_id, domain)
+        if args[4] in self.late_ids:
+            self.late.append((future, fn, args))
+        else:
+            future.set_result(fn(*args))
+        return future
+
+    def run_late(self):
+        for future, fn, args in self.late:
+            future.set_result(fn(*args))
+
 class TestDrkdsDashboardMetrics(TransactionCase):
     def setUp(self):
         super().setUp()
@@ -29,4 +54,134 @@ class TestDrkdsDashboardMetrics(TransactionCase):
 
         # Calculation will depend on existing sale orders
         result = metric.calculate_metric()
-        self.assertIsNotNone(result)
\ No newline at end of file
+        self.assertIsNotNone(result)
+
+    def test_sql_aggregates(self):
+        # Aggregates are computed by read_group over the filtered records
+        belgium = self.env.ref('base.be')
+        france = self.env.ref('base.fr')
+        self.env['res.partner'].create([
+            {'name': 'Dashboard Aggregate A', 'color': 2, 'country_id': belgium.id},
+            {'name': 'Dashboard Aggregate B', 'color': 4, 'country_id': belgium.id},
+            {'name': 'Dashboard Aggregate C', 'color': 9, 'country_id': france.id},
+        ])
+        domain = [('name', 'like', 'Dashboard Aggregate')]
+        expected = {'count': 3, 'sum': 15, 'avg': 5, 'min': 2, 'max': 9}
+        for metric_type, value in expected.items():
+            metric = self.metric_model.create({
+                'name': f'Partner Color {metric_type}',
+                'model_name': 'res.partner',
+                'metric_type': metric_type,
+                'field_name': 'color',
+            })
+            self.assertEqual(metric.calculate_metric(domain), value, metric_type)
+
+        metric = self.metric_model.create({
+            'name': 'Partner Countries',
+            'model_name': 'res.partner',
+            'metric_type': 'count_distinct',
+            'field_name': 'country_id',
+        })
+        self.assertEqual(metric.calculate_metric(domain), 2)
+
+    def test_grouped_metric(self):
+        # A grouped metric returns one point per group
+        belgium = self.env.ref('base.be')
+        self.env['res.partner'].create([
+            {'name': 'Dashboard Series A', 'color': 2, 'country_id': belgium.id},
+            {'name': 'Dashboard Series B', 'color': 4, 'country_id': belgium.id},
+            {'name': 'Dashboard Series C', 'color': 9},
+        ])
+        metric = self.metric_model.create({
+            'name': 'Partner Color By Country',
+            'model_name': 'res.partner',
+            'metric_type': 'sum',
+            'field_name': 'color',
+            'groupby_field': 'country_id',
+        })
+        series = metric.calculate_metric([('name', 'like', 'Dashboard Series')])
+        self.assertEqual(
+            {point['key']: point['value'] for point in series},
+            {belgium.display_name: 6, False: 9},
+        )
+
+        metric.write({'groupby_field': 'create_date', 'date_granularity': 'year'})
+        series = metric.calculate_metric([('name', 'like', 'Dashboard Series')])
+        self.assertEqual(len(series), 1)
+        self.assertEqual(series[0]['value'], 15)
+
+    def test_metric_cache(self):
+        # Results are reused until the metric's model changes
+        metric = self.metric_model.create({
+            'name': 'Country Count',
+            'model_name': 'res.country',
+            'metric_type': 'count',
+            'cache_ttl': 3600,
+        })
+        domain = [('code', 'in', ['BE', 'FR', 'XX'])]
+        metric_class = type(metric)
+        with patch.object(metric_class, '_compute_metric', autospec=True,
+                          side_effect=metric_class._compute_metric) as calculate:
+            self.assertEqual(metric.get_metric_value(domain), 2)
+            self.assertEqual(metric.get_metric_value(domain), 2)
+            self.assertEqual(calculate.call_count, 1)
+
+            # A change in this transaction bypasses the cache
+            self.env['res.country'].create({'name': 'Dashboard Land', 'code': 'XX'})
+            self.assertEqual(metric.get_metric_value(domain), 3)
+            self.assertEqual(calculate.call_count, 2)
+
+    def test_dashboard_timings(self):
+        # Each metric reports its duration, failing ones their error
+        metrics = self.metric_model.create({
+            'name': 'Timed Countries',
+            'model_name': 'res.country',
+            'metric_type': 'count',
+        }) | self.metric_model.create({
+            'name': 'Broken Metric',
+            'model_name': 'res.country',
+            'metric_type': 'custom',
+            'python_code': '1 / 0',
+        })
+        template = self.env['drkds.dashboard.template'].create({
+            'name': 'Timed Dashboard',
+            'metric_ids': [(6, 0, metrics.ids)],
+        })
+        config = template.generate_dashboard_configuration([('code', 'in', ['BE', 'FR'])], wait=0)
+        self.assertEqual(config['metrics']['timed_countries'], 2)
+        self.assertIn('error', config['metrics']['broken_metric'])
+        self.assertEqual(set(config['timings']), {'timed_countries', 'broken_metric'})
+        self.assertEqual(config['pending'], [])
+
+    def test_late_metrics(self):
+        # Metrics still running when the wait is over are sent on the bus
+        quick = self.metric_model.create({
+            'name': 'Quick Countries',
+            'model_name': 'res.country',
+            'metric_type': 'count',
+        })
+        slow = self.metric_model.create({
+            'name': 'Slow Countries',
+            'model_name': 'res.country',
+            'metric_type': 'custom',
+            'python_code': 'len(model.search(domain))',
+        })
+        template = self.env['drkds.dashboard.template'].create({
+            'name': 'Late Dashboard',
+            'metric_ids': [(6, 0, (quick | slow).ids)],
+        })
+        executor = LateExecutor(slow.ids)
+        with patch.object(type(template), '_get_metric_executor', return_value=executor):
+            config = template.generate_dashboard_configuration([('code', 'in', ['BE', 'FR'])], wait=0)
+        self.assertEqual(config['metrics'], {'quick_countries': 2})
+        self.assertEqual(config['pending'], ['slow_countries'])
+
+        executor.run_late()
+        payloads = [
+            json.loads(bus.message)['payload']
+            for bus in self.env['bus.bus'].search([('message', 'like', config['token'])])
+        ]
+        self.assertEqual(len(payloads), 1)
+        self.assertEqual(payloads[0]['metric'], 'slow_countries')
+        self.assertEqual(payloads[0]['value'], 2)
+        self.assertIn('time_ms', payloads[0])
\ No newline at end of file
@@ -24,6 +24,7 @@ Key features:
     'data': [
         'security/ir.model.access.csv',
         'wizard/merge_pickings_view.xml',
+        'wizard/merge_proposal_view.xml',
         'views/stock_picking_view.xml',
     ],
     'installable': True,
@@ -1,4 +1,9 @@
 from odoo import models, fields, api
+from collections import namedtuple
+
+# Sale orders behind a set of pickings: the order ids of each picking, the
+# picking's own sale order, and (name, payment term id, incoterm id) per order
+TermIndex = namedtuple('TermIndex', ['picking_orders', 'picking_sale', 'orders'])
 
 
 class StockPicking(models.Model):
@@ -73,3 +78,62 @@ class StockPicking(models.Model):
                     has_mismatches = True
                     
             picking.has_term_mismatches = has_mismatches
+
+    @api.model
+    def _get_term_index(self, picking_ids):
+        """Read the sale orders and terms of the given pickings in one query.
+
+        A picking's orders are its own sale order or, when it has none, the
+        orders of its moves' sale lines.
+        """
+        index = TermIndex({picking_id: [] for picking_id in picking_ids}, {}, {})
+        if not picking_ids:
+            return index
+
+        self.flush_model(['sale_id'])
+        self.env['stock.move'].flush_model(['picking_id', 'sale_line_id'])
+        self.env['sale.order.line'].flush_model(['order_id'])
+        self.env['sale.order'].flush_model(['name', 'payment_term_id', 'incoterm'])
+        self.env.cr.execute("""
+            SELECT DISTINCT picking.id, picking.sale_id, so.id, so.name, so.payment_term_id, so.incoterm
+              FROM stock_picking picking
+         LEFT JOIN stock_move move ON picking.sale_id IS NULL AND move.picking_id = picking.id
+         LEFT JOIN sale_order_line sol ON sol.id = move.sale_line_id
+              JOIN sale_order so ON so.id = COALESCE(picking.sale_id, sol.order_id)
+             WHERE picking.id IN %s
+          ORDER BY picking.id, so.id
+        """, [tuple(picking_ids)])
+        for picking_id, sale_id, order_id, name, payment_term_id, incoterm_id in self.env.cr.fetchall():
+            index.picking_orders[picking_id].append(order_id)
+            if sale_id:
+                index.picking_sale[picking_id] = sale_id
+            index.orders[order_id] = (name, payment_term_id, incoterm_id)
+        return index
+
+    @api.model
+    def _find_mergeable_groups(self, domain=None):
+        """Propose merge batches among the open delivery orders.
+
+        Deliveries are grouped by what the merge wizard requires to match
+        (operation type, partner and locations), then split by payment term
+        and incoterm so that no batch needs a term decision. Returns the
+        batches of two or more pickings as recordsets.
+        """
+        domain = [
+            ('picking_type_code', '=', 'outgoing'),
+            ('state', 'not in', ('draft', 'done', 'cancel')),
+            ('partner_id', '!=', False),
+        ] + (domain or [])
+        groups = self._read_group(
+            domain, ['picking_type_id', 'partner_id', 'location_id', 'location_dest_id'], ['id:array_agg'])
+        candidates = [sorted(picking_ids) for *keys, picking_ids in groups if len(picking_ids) > 1]
+        index = self._get_term_index([picking_id for picking_ids in candidates for picking_id in picking_ids])
+
+        batches = []
+        for picking_ids in candidates:
+            by_terms = {}
+            for picking_id in picking_ids:
+                terms = frozenset(index.orders[order_id][1:] for order_id in index.picking_orders[picking_id])
+                by_terms.setdefault(terms, []).append(picking_id)
+            batches += [self.browse(batch) for batch in by_terms.values() if len(batch) > 1]
+        return batches
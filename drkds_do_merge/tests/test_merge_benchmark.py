@@ -0,0 +1,74 @@
+import logging
+import time
+
+from odoo.tests.common import TransactionCase, tagged
+
+_logger = logging.getLogger(__name__)
+
+
+@tagged('post_install', '-at_install', '-standard', 'do_merge_benchmark')
+class TestMergePickingsBenchmark(TransactionCase):
+    """Time and count the queries of merging N delivery orders of M lines each.
+
+    Left out of the standard run; start it with ``--test-tags do_merge_benchmark``.
+    """
+    picking_count = 30
+    line_count = 40
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.partner = cls.env['res.partner'].create({'name': 'Merge Benchmark Customer'})
+        cls.picking_type = cls.env.ref('stock.picking_type_out')
+        cls.location = cls.picking_type.default_location_src_id
+        cls.customer_location = cls.env.ref('stock.stock_location_customers')
+        cls.products = cls.env['product.product'].create([{
+            'name': 'Merge Benchmark Product %s' % index,
+            'type': 'product',
+        } for index in range(cls.line_count)])
+
+    def _create_pickings(self):
+        pickings = self.env['stock.picking'].create([{
+            'partner_id': self.partner.id,
+            'picking_type_id': self.picking_type.id,
+            'location_id': self.location.id,
+            'location_dest_id': self.customer_location.id,
+            'move_ids': [(0, 0, {
+                'name': product.name,
+                'product_id': product.id,
+                'product_uom_qty': 1.0,
+                'product_uom': product.uom_id.id,
+                'location_id': self.location.id,
+                'location_dest_id': self.customer_location.id,
+            }) for product in self.products],
+        } for index in range(self.picking_count)])
+        pickings.action_confirm()
+        return pickings
+
+    def _merge(self, move_method):
+        pickings = self._create_pickings()
+        wizard = self.env['stock.picking.merge.wizard'].create({
+            'picking_ids': [(6, 0, pickings.ids)],
+            'move_method': move_method,
+        })
+        self.env.flush_all()
+
+        queries = self.env.cr.sql_log_count
+        start = time.perf_counter()
+        action = wizard.action_merge_pickings()
+        self.env.flush_all()
+        elapsed = time.perf_counter() - start
+        _logger.info("Merged %s pickings x %s lines (%s): %.2fs, %s queries",
+                     self.picking_count, self.line_count, move_method,
+                     elapsed, self.env.cr.sql_log_count - queries)
+
+        merged = self.env['stock.picking'].browse(action['res_id'])
+        self.assertEqual(len(merged.move_ids), self.picking_count * self.line_count)
+        self.assertEqual(set(pickings.mapped('state')), {'cancel'})
+        self.assertEqual(pickings.merged_to_picking, merged)
+
+    def test_merge_copy(self):
+        self._merge('copy')
+
+    def test_merge_rehome(self):
+        self._merge('rehome')
@@ -1 +1,2 @@
 from . import merge_pickings
+from . import merge_proposal
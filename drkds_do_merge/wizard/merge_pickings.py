@@ -21,19 +21,25 @@ class MergePickings(models.TransientModel):
         ('existing', 'Merge into an existing delivery order')
     ], string='Merge Method', default='new', required=True)
     
-    has_term_warnings = fields.Boolean(string='Has Term Warnings', compute='_compute_has_term_warnings')
-    payment_term_warning = fields.Text(string='Payment Term Warnings', compute='_compute_term_warnings')
-    delivery_term_warning = fields.Text(string='Delivery Term Warnings', compute='_compute_term_warnings')
+    move_method = fields.Selection([
+        ('copy', 'Copy the operations and cancel the originals'),
+        ('rehome', 'Move the existing operations')
+    ], string='Operations', default='copy', required=True,
+        help='Moving keeps the existing stock moves and their reservations instead of creating copies.')
+    
+    has_term_warnings = fields.Boolean(string='Has Term Warnings', compute='_compute_term_info')
+    payment_term_warning = fields.Text(string='Payment Term Warnings', compute='_compute_term_info')
+    delivery_term_warning = fields.Text(string='Delivery Term Warnings', compute='_compute_term_info')
     
     # Fields for final terms selection
     final_payment_term_id = fields.Many2one('account.payment.term', string='Final Payment Term')
     final_incoterm_id = fields.Many2one('account.incoterms', string='Final Delivery Term')
-    has_payment_term_mismatch = fields.Boolean(string='Has Payment Term Mismatch', compute='_compute_term_mismatches')
-    has_incoterm_mismatch = fields.Boolean(string='Has Incoterm Mismatch', compute='_compute_term_mismatches')
+    has_payment_term_mismatch = fields.Boolean(string='Has Payment Term Mismatch', compute='_compute_term_info')
+    has_incoterm_mismatch = fields.Boolean(string='Has Incoterm Mismatch', compute='_compute_term_info')
     available_payment_terms = fields.Many2many('account.payment.term', string='Available Payment Terms', 
-                                            compute='_compute_available_terms')
+                                            compute='_compute_term_info')
     available_incoterms = fields.Many2many('account.incoterms', string='Available Incoterms',
-                                          compute='_compute_available_terms')
+                                          compute='_compute_term_info')
     
     @api.onchange('merge_method')
     def _onchange_merge_method(self):
@@ -51,115 +57,87 @@ class MergePickings(models.TransientModel):
                 self.dest_picking_id = self.picking_ids[0].id
 
     @api.depends('picking_ids')
-    def _compute_has_term_warnings(self):
-        for wizard in self:
-            wizard.has_term_warnings = False
-            if len(wizard.picking_ids) >= 2:
-                wizard._validate_compatible_pickings()
-                wizard.has_term_warnings = hasattr(wizard, 'term_warnings') and bool(wizard.term_warnings)
-    
-    @api.depends('has_term_warnings')
-    def _compute_term_warnings(self):
+    def _compute_term_info(self):
+        """Fill the term warnings, mismatch flags and available terms from one read of the sale orders"""
         for wizard in self:
-            wizard.payment_term_warning = ''
-            wizard.delivery_term_warning = ''
+            pickings = wizard.picking_ids._origin
+            index = self.env['stock.picking']._get_term_index(pickings.ids)
             
-            if hasattr(wizard, 'term_warnings') and wizard.term_warnings:
-                payment_warnings = []
-                delivery_warnings = []
-                
-                for warning in wizard.term_warnings:
-                    if 'payment terms' in warning:
-                        payment_warnings.append(warning)
-                    elif 'delivery terms' in warning:
-                        delivery_warnings.append(warning)
-                
-                wizard.payment_term_warning = '\n'.join(payment_warnings)
-                wizard.delivery_term_warning = '\n'.join(delivery_warnings)
-    
-    @api.depends('picking_ids')
-    def _compute_term_mismatches(self):
-        for wizard in self:
-            # Initialize
-            wizard.has_payment_term_mismatch = False
-            wizard.has_incoterm_mismatch = False
-            
-            if len(wizard.picking_ids) < 2:
-                continue
-                
             # Get unique sales orders
-            sale_orders = self.env['sale.order']
-            for picking in wizard.picking_ids:
-                if hasattr(picking, 'sale_id') and picking.sale_id:
-                    sale_orders |= picking.sale_id
-                else:
-                    # Check for sales orders through stock moves
-                    for move in picking.move_ids:
-                        if move.sale_line_id and move.sale_line_id.order_id:
-                            sale_orders |= move.sale_line_id.order_id
+            order_ids = list(dict.fromkeys(
+                order_id for picking in pickings for order_id in index.picking_orders[picking.id]))
+            payment_term_ids = [index.orders[order_id][1] for order_id in order_ids if index.orders[order_id][1]]
+            incoterm_ids = [index.orders[order_id][2] for order_id in order_ids if index.orders[order_id][2]]
             
-            # Check payment terms
-            payment_terms = sale_orders.mapped('payment_term_id')
-            wizard.has_payment_term_mismatch = len(payment_terms) > 1
+            # Get unique terms
+            payment_terms = self.env['account.payment.term'].browse(dict.fromkeys(payment_term_ids))
+            incoterms = self.env['account.incoterms'].browse(dict.fromkeys(incoterm_ids))
+            wizard.available_payment_terms = payment_terms
+            wizard.available_incoterms = incoterms
+            
+            payment_warnings, delivery_warnings = wizard._get_term_warnings(index)
+            wizard.has_term_warnings = bool(payment_warnings or delivery_warnings)
+            wizard.payment_term_warning = '\n'.join(payment_warnings)
+            wizard.delivery_term_warning = '\n'.join(delivery_warnings)
             
-            # Check incoterms
-            incoterms = sale_orders.mapped('incoterm')
-            wizard.has_incoterm_mismatch = len(incoterms) > 1
+            wizard.has_payment_term_mismatch = len(pickings) >= 2 and len(payment_terms) > 1
+            wizard.has_incoterm_mismatch = len(pickings) >= 2 and len(incoterms) > 1
             
             # Set default values for final terms if mismatches exist
+            dest_sale_id = index.picking_sale.get(wizard.dest_picking_id._origin.id)
             if wizard.has_payment_term_mismatch and not wizard.final_payment_term_id:
                 # Prefer term from destination picking if using existing method
-                if wizard.merge_method == 'existing' and wizard.dest_picking_id and wizard.dest_picking_id.sale_id:
-                    wizard.final_payment_term_id = wizard.dest_picking_id.sale_id.payment_term_id
+                if wizard.merge_method == 'existing' and dest_sale_id:
+                    wizard.final_payment_term_id = index.orders[dest_sale_id][1]
                 # Otherwise use the most common term
-                elif payment_terms:
-                    term_counts = {}
-                    for order in sale_orders:
-                        term = order.payment_term_id
-                        if term:
-                            term_counts[term.id] = term_counts.get(term.id, 0) + 1
-                    if term_counts:
-                        most_common_term_id = max(term_counts, key=term_counts.get)
-                        wizard.final_payment_term_id = self.env['account.payment.term'].browse(most_common_term_id)
+                else:
+                    wizard.final_payment_term_id = max(payment_terms, key=lambda term: payment_term_ids.count(term.id))
             
             if wizard.has_incoterm_mismatch and not wizard.final_incoterm_id:
                 # Prefer incoterm from destination picking if using existing method
-                if wizard.merge_method == 'existing' and wizard.dest_picking_id and wizard.dest_picking_id.sale_id:
-                    wizard.final_incoterm_id = wizard.dest_picking_id.sale_id.incoterm
+                if wizard.merge_method == 'existing' and dest_sale_id:
+                    wizard.final_incoterm_id = index.orders[dest_sale_id][2]
                 # Otherwise use the most common incoterm
-                elif incoterms:
-                    incoterm_counts = {}
-                    for order in sale_orders:
-                        incoterm = order.incoterm
-                        if incoterm:
-                            incoterm_counts[incoterm.id] = incoterm_counts.get(incoterm.id, 0) + 1
-                    if incoterm_counts:
-                        most_common_incoterm_id = max(incoterm_counts, key=incoterm_counts.get)
-                        wizard.final_incoterm_id = self.env['account.incoterms'].browse(most_common_incoterm_id)
-                        
-    @api.depends('picking_ids')
-    def _compute_available_terms(self):
-        for wizard in self:
-            payment_terms = self.env['account.payment.term']
-            incoterms = self.env['account.incoterms']
-            
-            # Get unique sales orders
-            sale_orders = self.env['sale.order']
-            for picking in wizard.picking_ids:
-                if hasattr(picking, 'sale_id') and picking.sale_id:
-                    sale_orders |= picking.sale_id
                 else:
-                    # Check for sales orders through stock moves
-                    for move in picking.move_ids:
-                        if move.sale_line_id and move.sale_line_id.order_id:
-                            sale_orders |= move.sale_line_id.order_id
+                    wizard.final_incoterm_id = max(incoterms, key=lambda incoterm: incoterm_ids.count(incoterm.id))
+
+    def _get_term_warnings(self, index):
+        """Payment and delivery term warnings for pickings whose sale order differs from the first picking's"""
+        pickings = self.picking_ids._origin
+        payment_warnings = []
+        delivery_warnings = []
+        if len(pickings) < 2:
+            return payment_warnings, delivery_warnings
+        
+        reference_sale_id = index.picking_sale.get(pickings[0].id)
+        if not reference_sale_id:
+            return payment_warnings, delivery_warnings
+        reference_name, reference_payment_term_id, reference_incoterm_id = index.orders[reference_sale_id]
+        
+        PaymentTerm = self.env['account.payment.term']
+        Incoterm = self.env['account.incoterms']
+        for picking in pickings:
+            sale_id = index.picking_sale.get(picking.id)
+            if not sale_id:
+                continue
+            name, payment_term_id, incoterm_id = index.orders[sale_id]
             
-            # Get unique terms
-            payment_terms = sale_orders.mapped('payment_term_id')
-            incoterms = sale_orders.mapped('incoterm')
+            # Check payment terms
+            if payment_term_id != reference_payment_term_id:
+                payment_warnings.append(_(
+                    "Warning: Orders have different payment terms. "
+                    "Order %s has '%s' while order %s has '%s'") % (
+                    name, PaymentTerm.browse(payment_term_id).name or 'None',
+                    reference_name, PaymentTerm.browse(reference_payment_term_id).name or 'None'))
             
-            wizard.available_payment_terms = payment_terms
-            wizard.available_incoterms = incoterms
+            # Check incoterms (delivery terms)
+            if incoterm_id != reference_incoterm_id:
+                delivery_warnings.append(_(
+                    "Warning: Orders have different delivery terms (incoterms). "
+                    "Order %s has '%s' while order %s has '%s'") % (
+                    name, Incoterm.browse(incoterm_id).name or 'None',
+                    reference_name, Incoterm.browse(reference_incoterm_id).name or 'None'))
+        return payment_warnings, delivery_warnings
 
     def _validate_compatible_pickings(self):
         
@@ -180,28 +158,6 @@ class MergePickings(models.TransientModel):
                 raise ValidationError(_("Cannot merge already validated delivery orders."))
             if picking.state == 'cancel':
                 raise ValidationError(_("Cannot merge cancelled delivery orders."))
-            
-            # Check for sales order terms mismatches and store warnings
-            if hasattr(picking, 'sale_id') and picking.sale_id and hasattr(reference_picking, 'sale_id') and reference_picking.sale_id:
-                # Check payment terms
-                if picking.sale_id.payment_term_id != reference_picking.sale_id.payment_term_id:
-                    if not hasattr(self, 'term_warnings'):
-                        self.term_warnings = []
-                    self.term_warnings.append(_(
-                        "Warning: Orders have different payment terms. "
-                        "Order %s has '%s' while order %s has '%s'") % (
-                        picking.sale_id.name, picking.sale_id.payment_term_id.name or 'None',
-                        reference_picking.sale_id.name, reference_picking.sale_id.payment_term_id.name or 'None'))
-                
-                # Check incoterms (delivery terms)
-                if picking.sale_id.incoterm != reference_picking.sale_id.incoterm:
-                    if not hasattr(self, 'term_warnings'):
-                        self.term_warnings = []
-                    self.term_warnings.append(_(
-                        "Warning: Orders have different delivery terms (incoterms). "
-                        "Order %s has '%s' while order %s has '%s'") % (
-                        picking.sale_id.name, picking.sale_id.incoterm.name or 'None',
-                        reference_picking.sale_id.name, reference_picking.sale_id.incoterm.name or 'None'))
 
     def action_merge_pickings(self):
         
@@ -238,48 +194,32 @@ class MergePickings(models.TransientModel):
             })
             source_pickings = self.picking_ids
         
-        # Copy all moves from source pickings to destination picking
-        for source_picking in source_pickings:
-            # Skip if it's the destination picking
-            if source_picking == dest_picking:
-                continue
-                
-            # Process each move
-            for move in source_picking.move_ids:
-                # Skip cancelled moves
-                if move.state == 'cancel':
-                    continue
-                
-                # Important: PRESERVE the sale_line_id to maintain price information
-                new_move = move.copy({
-                    'picking_id': dest_picking.id,
-                    'state': 'draft',
-                    'sale_line_id': move.sale_line_id.id,  # Preserve sales order line reference
-                    'group_id': move.group_id.id,  # Preserve procurement group (links to sale order)
-                    'origin_returned_move_id': False,
-                    'price_unit': move.price_unit,  # Preserve original price
-                })
-                
-                # Copy move lines if any
-                if move.move_line_ids:
-                    for move_line in move.move_line_ids:
-                        move_line.copy({
-                            'move_id': new_move.id,
-                            'picking_id': dest_picking.id,
-                            'state': 'draft',
-                        })
-            
-            # Mark the original picking as merged
-            source_picking.write({
-                'merged_to_picking': [(4, dest_picking.id)],
-            })
-            
-            # Cancel the source picking
-            source_picking.action_cancel()
+        # The destination itself keeps its moves
+        source_pickings -= dest_picking
+        moves = source_pickings.move_ids.filtered(lambda move: move.state != 'cancel')
+        if self.move_method == 'rehome':
+            self._rehome_moves(moves, dest_picking)
+        else:
+            self._copy_moves(moves, dest_picking)
+        
+        # Mark the original pickings as merged
+        source_pickings.write({
+            'merged_to_picking': [(4, dest_picking.id)],
+        })
+        
+        # Cancel the source pickings
+        if self.move_method == 'rehome':
+            # Pickings left with only cancelled moves are cancelled already,
+            # pickings left without moves would otherwise fall back to draft
+            emptied_pickings = source_pickings.filtered(lambda picking: not picking.move_ids)
+            emptied_pickings.flush_recordset(['state'])
+            emptied_pickings.write({'state': 'cancel'})
+        else:
+            source_pickings.action_cancel()
         
         # Prepare term information for the destination picking
         term_info = {
-            'merged_from_pickings': [(4, p.id) for p in source_pickings if p != dest_picking]
+            'merged_from_pickings': [(4, p.id) for p in source_pickings]
         }
         
         # Add selected final terms
@@ -291,8 +231,9 @@ class MergePickings(models.TransientModel):
         
         # Add term mismatch notes
         term_notes = []
-        if hasattr(self, 'term_warnings') and self.term_warnings:
-            term_notes.extend(self.term_warnings)
+        payment_warnings, delivery_warnings = self._get_term_warnings(
+            self.env['stock.picking']._get_term_index(self.picking_ids.ids))
+        term_notes.extend(payment_warnings + delivery_warnings)
         
         # Add notes about selected terms
         if self.has_payment_term_mismatch:
@@ -320,3 +261,36 @@ class MergePickings(models.TransientModel):
             'res_id': dest_picking.id,
             'type': 'ir.actions.act_window',
         }
+    
+    def _copy_moves(self, moves, dest_picking):
+        """Copy the moves and their move lines into the destination picking, one create per model"""
+        move_vals_list = []
+        for move in moves:
+            # Important: PRESERVE the sale_line_id to maintain price information
+            move_vals_list += move.copy_data({
+                'picking_id': dest_picking.id,
+                'state': 'draft',
+                'sale_line_id': move.sale_line_id.id,  # Preserve sales order line reference
+                'group_id': move.group_id.id,  # Preserve procurement group (links to sale order)
+                'origin_returned_move_id': False,
+                'price_unit': move.price_unit,  # Preserve original price
+            })
+        new_moves = self.env['stock.move'].create(move_vals_list)
+        
+        # Copy move lines if any
+        move_line_vals_list = []
+        for move, new_move in zip(moves, new_moves):
+            for move_line in move.move_line_ids:
+                move_line_vals_list += move_line.copy_data({
+                    'move_id': new_move.id,
+                    'picking_id': dest_picking.id,
+                    'state': 'draft',
+                })
+        self.env['stock.move.line'].create(move_line_vals_list)
+        return new_moves
+    
+    def _rehome_moves(self, moves, dest_picking):
+        """Attach the moves and their move lines to the destination picking as they are"""
+        moves.write({'picking_id': dest_picking.id})
+        moves.move_line_ids.write({'picking_id': dest_picking.id})
+        return moves
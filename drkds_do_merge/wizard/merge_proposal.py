@@ -0,0 +1,50 @@
+from odoo import models, fields, api, _
+
+
+class MergeProposal(models.TransientModel):
+    _name = 'stock.picking.merge.proposal'
+    _description = 'Mergeable Delivery Orders'
+
+    line_ids = fields.One2many('stock.picking.merge.proposal.line', 'proposal_id', string='Mergeable Groups')
+
+    @api.model
+    def default_get(self, fields_list):
+        res = super().default_get(fields_list)
+        if 'line_ids' in fields_list:
+            res['line_ids'] = [(0, 0, {
+                'partner_id': pickings[0].partner_id.id,
+                'picking_type_id': pickings[0].picking_type_id.id,
+                'picking_ids': [(6, 0, pickings.ids)],
+                'scheduled_date': min(pickings.mapped('scheduled_date')),
+            }) for pickings in self.env['stock.picking']._find_mergeable_groups()]
+        return res
+
+
+class MergeProposalLine(models.TransientModel):
+    _name = 'stock.picking.merge.proposal.line'
+    _description = 'Mergeable Delivery Order Group'
+    _order = 'partner_id, scheduled_date'
+
+    proposal_id = fields.Many2one('stock.picking.merge.proposal', required=True, ondelete='cascade')
+    partner_id = fields.Many2one('res.partner', string='Partner', readonly=True)
+    picking_type_id = fields.Many2one('stock.picking.type', string='Operation Type', readonly=True)
+    picking_ids = fields.Many2many('stock.picking', string='Delivery Orders', readonly=True)
+    picking_count = fields.Integer(string='Deliveries', compute='_compute_picking_count')
+    scheduled_date = fields.Datetime(string='First Scheduled Date', readonly=True)
+
+    @api.depends('picking_ids')
+    def _compute_picking_count(self):
+        for line in self:
+            line.picking_count = len(line.picking_ids)
+
+    def action_merge(self):
+        """Open the merge wizard for this group"""
+        self.ensure_one()
+        return {
+            'name': _('Merge Delivery Orders'),
+            'type': 'ir.actions.act_window',
+            'res_model': 'stock.picking.merge.wizard',
+            'view_mode': 'form',
+            'target': 'new',
+            'context': {'default_picking_ids': self.picking_ids.ids},
+        }
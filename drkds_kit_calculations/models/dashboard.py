@@ -1,7 +1,18 @@
 from odoo import models, fields, api, _
 from odoo.exceptions import UserError
+from odoo.tools import SQL
+from odoo.tools.misc import format_date
 from datetime import datetime, timedelta
+import copy
 import json
+import threading
+import time
+
+# Seconds dashboard statistics are reused before being read again
+STATS_CACHE_TTL = 30
+
+_stats_cache = {}
+_stats_cache_lock = threading.Lock()
 
 class Dashboard(models.TransientModel):
     _name = 'drkds.dashboard'
@@ -31,118 +42,77 @@ class Dashboard(models.TransientModel):
     
     @api.depends_context('uid')
     def _compute_statistics(self):
+        utils = self.env['drkds.dashboard.utils']
+        sheet_stats = utils._cached_stats('sheet_stats', utils._get_sheet_stats)
+        counts = utils._cached_stats('active_counts', utils._get_active_counts)
         for record in self:
-            # Total cost sheets
-            record.total_cost_sheets = self.env['drkds.cost.sheet'].search_count([])
-            
-            # Confirmed cost sheets
-            record.confirmed_cost_sheets = self.env['drkds.cost.sheet'].search_count([
-                ('state', '=', 'confirmed')
-            ])
-            
-            # Active components
-            record.active_components = self.env['drkds.kit.component'].search_count([
-                ('active', '=', True)
-            ])
-            
-            # Active templates
-            record.active_templates = self.env['drkds.cost.template'].search_count([
-                ('active', '=', True)
-            ])
+            record.total_cost_sheets = sum(stats['count'] for stats in sheet_stats.values())
+            record.confirmed_cost_sheets = sheet_stats.get('confirmed', {}).get('count', 0)
+            record.active_components = counts['components']
+            record.active_templates = counts['templates']
     
     @api.depends_context('uid')
     def _compute_financial_stats(self):
+        utils = self.env['drkds.dashboard.utils']
+        sheet_stats = utils._cached_stats('sheet_stats', utils._get_sheet_stats)
+        valued = [sheet_stats[state] for state in ('calculated', 'confirmed') if state in sheet_stats]
+        count = sum(stats['count'] for stats in valued)
+        total_value = sum(stats['total'] for stats in valued)
         for record in self:
-            cost_sheets = self.env['drkds.cost.sheet'].search([
-                ('state', 'in', ['calculated', 'confirmed'])
-            ])
-            
-            if cost_sheets:
-                total_value = sum(cost_sheets.mapped('enabled_components_total'))
-                record.total_cost_value = total_value
-                record.average_cost_value = total_value / len(cost_sheets)
-            else:
-                record.total_cost_value = 0.0
-                record.average_cost_value = 0.0
+            record.total_cost_value = total_value
+            record.average_cost_value = total_value / count if count else 0.0
     
     @api.depends_context('uid')
     def _compute_system_health(self):
+        # Only compute for admin users
+        if not self.env.user.has_group('drkds_kit_calculations.group_admin'):
+            self.active_users_count = 0
+            self.recent_changes_count = 0
+            self.calculations_count = 0
+            return
+        
+        utils = self.env['drkds.dashboard.utils']
+        # Last 30 days, recent changes over the last 7
+        log_stats = utils._cached_stats('log_stats', utils._get_log_stats, 30, 7)
         for record in self:
-            # Only compute for admin users
-            if not self.env.user.has_group('drkds_kit_calculations.group_admin'):
-                record.active_users_count = 0
-                record.recent_changes_count = 0
-                record.calculations_count = 0
-                continue
-            
-            # Active users in last 30 days
-            thirty_days_ago = datetime.now() - timedelta(days=30)
-            active_user_logs = self.env['drkds.change.log'].search([
-                ('create_date', '>=', thirty_days_ago)
-            ])
-            record.active_users_count = len(set(active_user_logs.mapped('user_id.id')))
-            
-            # Recent changes in last 7 days
-            seven_days_ago = datetime.now() - timedelta(days=7)
-            record.recent_changes_count = self.env['drkds.change.log'].search_count([
-                ('create_date', '>=', seven_days_ago)
-            ])
-            
-            # Calculations in last 30 days
-            record.calculations_count = self.env['drkds.change.log'].search_count([
-                ('create_date', '>=', thirty_days_ago),
-                ('action_type', '=', 'calculation')
-            ])
+            record.active_users_count = log_stats['active_users']
+            record.recent_changes_count = log_stats['recent_changes']
+            record.calculations_count = log_stats['calculations']
     
     @api.depends_context('uid')
     def _compute_recent_activity(self):
         for record in self:
-            # Get recent cost sheets (last 10)
-            recent_sheets = self.env['drkds.cost.sheet'].search([], 
-                                                               order='create_date desc', 
-                                                               limit=10)
             # Note: This is a computed field, so we can't actually assign Many2many
-            # In the view, we'll use a different approach
+            # In the view, we'll use get_recent_cost_sheets instead
             record.recent_cost_sheets = False
     
     @api.depends_context('uid')
     def _compute_charts(self):
+        utils = self.env['drkds.dashboard.utils']
+        sheet_stats = utils._cached_stats('sheet_stats', utils._get_sheet_stats)
+        # Last 6 months
+        monthly_counts = utils._cached_stats('monthly_sheets', utils._get_monthly_sheet_counts, 180)
         for record in self:
             # Cost sheets by status chart
-            status_data = {}
-            sheets_by_status = self.env['drkds.cost.sheet'].read_group(
-                [], ['state'], ['state']
-            )
-            for group in sheets_by_status:
-                status_data[group['state']] = group['state_count']
-            
             record.cost_sheets_by_status_chart = json.dumps({
                 'type': 'pie',
                 'data': {
-                    'labels': list(status_data.keys()),
+                    'labels': list(sheet_stats.keys()),
                     'datasets': [{
-                        'data': list(status_data.values()),
+                        'data': [stats['count'] for stats in sheet_stats.values()],
                         'backgroundColor': ['#FF6384', '#36A2EB', '#FFCE56', '#4BC0C0']
                     }]
                 }
             })
             
-            # Monthly activity chart (last 6 months)
-            six_months_ago = datetime.now() - timedelta(days=180)
-            monthly_data = self.env['drkds.cost.sheet'].read_group([
-                ('create_date', '>=', six_months_ago)
-            ], ['create_date'], ['create_date:month'])
-            
-            months = [group['create_date:month'] for group in monthly_data]
-            counts = [group['create_date_count'] for group in monthly_data]
-            
+            # Monthly activity chart
             record.monthly_activity_chart = json.dumps({
                 'type': 'line',
                 'data': {
-                    'labels': months,
+                    'labels': [month for month, count in monthly_counts],
                     'datasets': [{
                         'label': 'Cost Sheets Created',
-                        'data': counts,
+                        'data': [count for month, count in monthly_counts],
                         'borderColor': '#36A2EB',
                         'fill': False
                     }]
@@ -416,62 +386,125 @@ class DashboardUtils(models.AbstractModel):
     _name = 'drkds.dashboard.utils'
     _description = 'Dashboard Utility Functions'
     
+    def _cached_stats(self, name, compute, *args):
+        """``compute(*args)``, reused for STATS_CACHE_TTL seconds by the same
+        user, companies and language"""
+        key = (self.env.cr.dbname, self.env.uid, tuple(self.env.companies.ids), self.env.lang, name, args)
+        now = time.monotonic()
+        with _stats_cache_lock:
+            expiry, value = _stats_cache.get(key, (0, None))
+            if expiry > now:
+                return copy.deepcopy(value)
+        
+        value = compute(*args)
+        with _stats_cache_lock:
+            # Drop expired entries so the cache stays small
+            for expired in [k for k, (expiry, _value) in _stats_cache.items() if expiry <= now]:
+                del _stats_cache[expired]
+            _stats_cache[key] = (now + STATS_CACHE_TTL, copy.deepcopy(value))
+        return value
+    
+    @api.model
+    def _get_sheet_stats(self, period_days=None):
+        """Count and total value of the cost sheets per state, in one query"""
+        domain = []
+        if period_days:
+            domain.append(('create_date', '>=', fields.Datetime.now() - timedelta(days=period_days)))
+        return {
+            state: {'count': count, 'total': total}
+            for state, count, total in self.env['drkds.cost.sheet']._read_group(
+                domain, ['state'], ['__count', 'enabled_components_total:sum']
+            )
+        }
+    
+    @api.model
+    def _get_active_counts(self):
+        return {
+            'components': self.env['drkds.kit.component'].search_count([('active', '=', True)]),
+            'templates': self.env['drkds.cost.template'].search_count([('active', '=', True)]),
+        }
+    
+    @api.model
+    def _get_log_stats(self, period_days, recent_days=None):
+        """Change log counters of the last ``period_days``, in one query"""
+        ChangeLog = self.env['drkds.change.log']
+        ChangeLog.flush_model(['create_date', 'user_id', 'action_type'])
+        now = fields.Datetime.now()
+        recent_since = now - timedelta(days=recent_days or period_days)
+        query = ChangeLog._search([('create_date', '>=', now - timedelta(days=period_days))])
+        self.env.cr.execute(query.select(
+            SQL("COUNT(DISTINCT drkds_change_log.user_id)"),
+            SQL("COUNT(*) FILTER (WHERE drkds_change_log.create_date >= %s)", recent_since),
+            SQL("COUNT(*) FILTER (WHERE drkds_change_log.action_type = 'calculation')"),
+            SQL("COUNT(*) FILTER (WHERE drkds_change_log.action_type = 'toggle')"),
+        ))
+        active_users, recent_changes, calculations, toggles = self.env.cr.fetchone()
+        return {
+            'active_users': active_users,
+            'recent_changes': recent_changes,
+            'calculations': calculations,
+            'toggles': toggles,
+        }
+    
+    @api.model
+    def _get_monthly_sheet_counts(self, period_days):
+        """(month label, count) of the cost sheets created per month"""
+        return [
+            (format_date(self.env, month, date_format='MMMM yyyy'), count)
+            for month, count in self.env['drkds.cost.sheet']._read_group(
+                [('create_date', '>=', fields.Datetime.now() - timedelta(days=period_days))],
+                ['create_date:month'], ['__count'],
+            )
+        ]
+    
+    @api.model
+    def _get_trend_counts(self, metric, periods):
+        """Records created per 30-day period, newest first, in one query"""
+        if metric == 'cost_sheets':
+            Model, domain = self.env['drkds.cost.sheet'], []
+        elif metric == 'calculations':
+            Model, domain = self.env['drkds.change.log'], [('action_type', '=', 'calculation')]
+        else:
+            return {}
+        
+        Model.flush_model(['create_date'])
+        now = fields.Datetime.now()
+        query = Model._search(domain + [
+            ('create_date', '>=', now - timedelta(days=30 * periods)),
+            ('create_date', '<', now),
+        ])
+        period = SQL(
+            "FLOOR(EXTRACT(EPOCH FROM %s - %s) / %s)::int",
+            now, SQL.identifier(Model._table, 'create_date'), 30 * 24 * 3600,
+        )
+        self.env.cr.execute(SQL("%s GROUP BY 1", query.select(period, SQL("COUNT(*)"))))
+        return dict(self.env.cr.fetchall())
+    
     @api.model
     def get_kpi_data(self, period_days=30):
         """Get KPI data for dashboard widgets"""
-        period_start = datetime.now() - timedelta(days=period_days)
+        sheet_stats = self._cached_stats('sheet_stats', self._get_sheet_stats, period_days)
+        log_stats = self._cached_stats('log_stats', self._get_log_stats, period_days)
         
         return {
-            'cost_sheets_created': self.env['drkds.cost.sheet'].search_count([
-                ('create_date', '>=', period_start)
-            ]),
-            'calculations_performed': self.env['drkds.change.log'].search_count([
-                ('create_date', '>=', period_start),
-                ('action_type', '=', 'calculation')
-            ]),
-            'components_toggled': self.env['drkds.change.log'].search_count([
-                ('create_date', '>=', period_start),
-                ('action_type', '=', 'toggle')
-            ]),
-            'active_users': len(set(
-                self.env['drkds.change.log'].search([
-                    ('create_date', '>=', period_start)
-                ]).mapped('user_id.id')
-            )),
+            'cost_sheets_created': sum(stats['count'] for stats in sheet_stats.values()),
+            'calculations_performed': log_stats['calculations'],
+            'components_toggled': log_stats['toggles'],
+            'active_users': log_stats['active_users'],
             'total_cost_value': sum(
-                self.env['drkds.cost.sheet'].search([
-                    ('create_date', '>=', period_start),
-                    ('state', 'in', ['calculated', 'confirmed'])
-                ]).mapped('enabled_components_total')
+                sheet_stats[state]['total'] for state in ('calculated', 'confirmed') if state in sheet_stats
             )
         }
     
     @api.model
     def get_trend_data(self, metric='cost_sheets', periods=6):
         """Get trend data for charts"""
-        data = []
-        for i in range(periods):
-            period_start = datetime.now() - timedelta(days=30*(i+1))
-            period_end = datetime.now() - timedelta(days=30*i)
-            
-            if metric == 'cost_sheets':
-                count = self.env['drkds.cost.sheet'].search_count([
-                    ('create_date', '>=', period_start),
-                    ('create_date', '<', period_end)
-                ])
-            elif metric == 'calculations':
-                count = self.env['drkds.change.log'].search_count([
-                    ('create_date', '>=', period_start),
-                    ('create_date', '<', period_end),
-                    ('action_type', '=', 'calculation')
-                ])
-            else:
-                count = 0
-            
-            data.append({
-                'period': period_start.strftime('%Y-%m'),
-                'value': count
-            })
+        counts = self._cached_stats('trend', self._get_trend_counts, metric, periods)
+        now = fields.Datetime.now()
+        data = [{
+            'period': (now - timedelta(days=30 * (i + 1))).strftime('%Y-%m'),
+            'value': counts.get(i, 0),
+        } for i in range(periods)]
         
         return list(reversed(data))
     
@@ -491,35 +524,38 @@ class DashboardUtils(models.AbstractModel):
             'drkds_kit_calculations.group_admin'
         ]
         
+        # Activity of every user in two grouped queries
+        log_stats = {}
+        for user, action_type, count, last_activity in self.env['drkds.change.log']._read_group(
+            [('create_date', '>=', thirty_days_ago)],
+            ['user_id', 'action_type'], ['__count', 'create_date:max'],
+        ):
+            stats = log_stats.setdefault(user.id, {'total': 0, 'last_activity': None})
+            stats[action_type] = count
+            stats['total'] += count
+            stats['last_activity'] = max(filter(None, [stats['last_activity'], last_activity]), default=None)
+        sheet_counts = {
+            user.id: count for user, count in self.env['drkds.cost.sheet']._read_group(
+                [('create_date', '>=', thirty_days_ago)], ['create_uid'], ['__count'],
+            )
+        }
+        
         users_data = []
         for group_xml_id in drkds_groups:
             try:
                 group = self.env.ref(group_xml_id)
                 for user in group.users:
-                    # Get user activity
-                    user_logs = self.env['drkds.change.log'].search([
-                        ('user_id', '=', user.id),
-                        ('create_date', '>=', thirty_days_ago)
-                    ])
-                    
-                    cost_sheets = self.env['drkds.cost.sheet'].search_count([
-                        ('create_uid', '=', user.id),
-                        ('create_date', '>=', thirty_days_ago)
-                    ])
-                    
-                    calculations = user_logs.filtered(lambda l: l.action_type == 'calculation')
-                    toggles = user_logs.filtered(lambda l: l.action_type == 'toggle')
-                    
+                    stats = log_stats.get(user.id, {})
                     users_data.append({
                         'user_name': user.name,
                         'user_group': group.name.replace('Cost Sheet ', ''),
-                        'cost_sheets_created': cost_sheets,
-                        'calculations_performed': len(calculations),
-                        'components_toggled': len(toggles),
-                        'total_activity': len(user_logs),
-                        'last_activity': max(user_logs.mapped('create_date')) if user_logs else None
+                        'cost_sheets_created': sheet_counts.get(user.id, 0),
+                        'calculations_performed': stats.get('calculation', 0),
+                        'components_toggled': stats.get('toggle', 0),
+                        'total_activity': stats.get('total', 0),
+                        'last_activity': stats.get('last_activity')
                     })
             except:
                 continue
         
-        return users_data
\ No newline at end of file
+        return users_data
@@ -28,12 +28,14 @@
         'data/sequences.xml',
         'data/component_data.xml',
         'data/template_data.xml',
+        'data/recalculation_cron.xml',
         
         # Views (in dependency order)
         'views/component_views.xml',
         'views/template_views.xml',
         'views/cost_sheet_views.xml',
         'views/dashboard_views.xml',
+        'views/recalculation_job_views.xml',
         
         # Wizards
         'wizard/cost_calculator_wizard_views.xml',
@@ -0,0 +1,117 @@
+# File: drkds_kit_calculator/formula_engine.py
+
+"""Formula dependency resolution for kit cost sheets (no ORM access)"""
+
+import ast
+import functools
+import math
+from collections import namedtuple
+
+# Globals every formula is evaluated with; template variables are passed as locals
+SAFE_GLOBALS = {
+    '__builtins__': {'abs': abs, 'min': min, 'max': max, 'round': round},
+    'math': math,
+}
+
+# Names available to every formula that are not template variables
+BUILTIN_NAMES = frozenset(('math', 'abs', 'min', 'max', 'round'))
+
+# Syntax a formula may use: arithmetic, comparisons, conditionals, lists and
+# tuples, and calls to the builtins above or to math functions
+ALLOWED_NODES = (
+    ast.Expression, ast.Constant, ast.Name, ast.Load, ast.Attribute, ast.Call,
+    ast.keyword, ast.List, ast.Tuple,
+    ast.BinOp, ast.UnaryOp, ast.BoolOp, ast.Compare, ast.IfExp,
+    ast.operator, ast.unaryop, ast.boolop, ast.cmpop,
+)
+
+CompiledFormula = namedtuple('CompiledFormula', ['code', 'names'])
+
+
+class FormulaCycleError(ValueError):
+    """Raised when formulas reference each other in a loop"""
+
+    def __init__(self, cycle):
+        self.cycle = cycle
+        super().__init__(' -> '.join(str(node) for node in cycle))
+
+
+class FormulaError(ValueError):
+    """Raised when a formula uses syntax outside ALLOWED_NODES"""
+
+
+@functools.lru_cache(maxsize=4096)
+def compile_formula(expression):
+    """Parse, check and compile a formula once per process.
+
+    Returns a CompiledFormula with the code object and the variable names it
+    reads. Raises SyntaxError for invalid Python and FormulaError for
+    constructs that are not allowed in formulas.
+    """
+    tree = ast.parse(expression.strip(), mode='eval')
+    for node in ast.walk(tree):
+        if not isinstance(node, ALLOWED_NODES):
+            raise FormulaError(f"'{type(node).__name__}' is not allowed in formulas")
+        if isinstance(node, ast.Attribute) and (
+                not isinstance(node.value, ast.Name) or node.value.id != 'math'
+                or node.attr.startswith('_')):
+            raise FormulaError("Only math functions can be used as attributes")
+        if isinstance(node, ast.keyword) and node.arg is None:
+            raise FormulaError("'**' arguments are not allowed in formulas")
+    names = frozenset(
+        node.id for node in ast.walk(tree)
+        if isinstance(node, ast.Name) and node.id not in BUILTIN_NAMES
+    )
+    return CompiledFormula(compile(tree, '<formula>', 'eval'), names)
+
+
+def formula_names(expression):
+    """Variable names read by an expression, without builtins"""
+    return compile_formula(expression).names
+
+
+def evaluate(expression, values):
+    """Evaluate a formula with ``values`` as its variables"""
+    return eval(compile_formula(expression).code, SAFE_GLOBALS, values)
+
+
+def topological_order(dependencies):
+    """Order nodes so that every node comes after the nodes it depends on.
+
+    ``dependencies`` maps each node to the nodes it reads; nodes that are not
+    keys of the mapping are treated as known inputs. Ties keep the mapping's
+    order, so lines are still evaluated by sequence when they are independent.
+    Raises FormulaCycleError with one offending cycle when there is no order.
+    """
+    pending = {
+        node: {dep for dep in deps if dep in dependencies}
+        for node, deps in dependencies.items()
+    }
+    dependants = {node: [] for node in pending}
+    for node, deps in pending.items():
+        for dep in deps:
+            dependants[dep].append(node)
+
+    order = [node for node, deps in pending.items() if not deps]
+    for node in order:
+        for dependant in dependants[node]:
+            deps = pending[dependant]
+            deps.discard(node)
+            if not deps:
+                order.append(dependant)
+
+    if len(order) < len(pending):
+        raise FormulaCycleError(_find_cycle({node: deps for node, deps in pending.items() if deps}))
+    return order
+
+
+def _find_cycle(pending):
+    """One cycle among nodes that still have unresolved dependencies"""
+    node = next(iter(pending))
+    path = []
+    seen = {}
+    while node not in seen:
+        seen[node] = len(path)
+        path.append(node)
+        node = next(iter(pending[node]))
+    return path[seen[node]:] + [node]
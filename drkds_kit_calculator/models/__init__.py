@@ -3,4 +3,5 @@
 from . import component
 from . import template  
 from . import cost_sheet
-from . import dashboard
\ No newline at end of file
+from . import dashboard
+from . import recalculation_job
\ No newline at end of file
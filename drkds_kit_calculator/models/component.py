@@ -44,6 +44,30 @@ class KitComponent(models.Model):
         for record in self:
             record.rate_with_multiplier = record.current_rate * record.rate_multiplier
     
+    def write(self, vals):
+        old_rates = {component.id: component.current_rate for component in self} if 'current_rate' in vals else {}
+        result = super().write(vals)
+        if 'current_rate' in vals:
+            self._update_template_rates(old_rates)
+            # Propagate the new rate to open cost sheets in the background
+            self.env['kit.recalculation.job']._queue_for_components(self)
+        return result
+    
+    def _update_template_rates(self, old_rates):
+        """Move fixed template rates still equal to the previous component rate,
+        which the template copied from it, to the new rate"""
+        template_lines = self.env['kit.template.line'].search([
+            ('component_id', 'in', self.ids),
+            ('rate_type', '=', 'fixed'),
+        ])
+        for component in self:
+            outdated = template_lines.filtered(
+                lambda l: l.component_id == component and l.rate_value == old_rates[component.id]
+            )
+            if outdated and old_rates[component.id] != component.current_rate:
+                # The component's own job covers the cost sheets of these templates
+                outdated.with_context(skip_recalculation_queue=True).write({'rate_value': component.current_rate})
+    
     @api.constrains('current_rate')
     def _check_current_rate(self):
         for record in self:
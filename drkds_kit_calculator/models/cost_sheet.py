@@ -2,11 +2,13 @@
 
 from odoo import models, fields, api, _
 from odoo.exceptions import ValidationError, UserError
-import ast
 import operator
 import math
 import re
 import logging
+from collections import defaultdict
+
+from .. import formula_engine
 
 _logger = logging.getLogger(__name__)
 
@@ -162,6 +164,19 @@ class KitCostSheet(models.Model):
                 # Rollback happens automatically with savepoint
                 raise UserError(_('Recalculation Error: %s') % str(e))
     
+    def action_queue_recalculation(self):
+        """Recalculate the selected cost sheets in the background"""
+        job = self.env['kit.recalculation.job']._queue(self, _('Manual: %s cost sheets') % len(self))
+        if not job:
+            raise UserError(_('Only cost sheets that are not confirmed can be recalculated.'))
+        return {
+            'name': _('Bulk Recalculation'),
+            'type': 'ir.actions.act_window',
+            'res_model': 'kit.recalculation.job',
+            'res_id': job.id,
+            'view_mode': 'form',
+        }
+    
     def reset_to_template_values(self):
         """Reset all values to template defaults"""
         self.ensure_one()
@@ -242,150 +257,123 @@ class KitCostSheet(models.Model):
         return sanitized or "Component"
     
     def _calculate_all_formulas(self):
-        """Calculate all formulas - use actual calculated values, not cached fields"""
+        """Calculate all parameter and component formulas in dependency order.
+        
+        Formulas are parsed once to find the variables they read, ordered
+        topologically and evaluated in memory; changed values are written
+        in one pass at the end. Circular references raise a UserError.
+        """
+        self.ensure_one()
         _logger.info(f"=== CALCULATION START for cost sheet {self.id} ===")
         
-        # Step 1: Calculate parameters first
         context = {'math': math}
+        formulas = {}      # node -> formula text
+        variables = {}     # formula variable -> node that calculates it
+        node_names = {}    # node -> formula variable
+        fallbacks = {}     # node -> value used when the formula fails
         
-        # Get current parameter values
+        # Step 1: Parameters - fixed/input values are known, calculated ones are nodes
         for param in self.parameter_ids:
-            if param.parameter_type in ['fixed', 'input']:
-                context[param.parameter_code] = param.get_numeric_value()
-        
-        # Calculate parameters with dependency resolution
-        calculated_params = self.parameter_ids.filtered(lambda p: p.parameter_type == 'calculated')
-        for iteration in range(10):
-            updated = False
-            for param in calculated_params:
-                if param.parameter_id.formula:
-                    try:
-                        old_value = param.get_numeric_value()
-                        new_value = float(self._safe_eval(param.parameter_id.formula, context))
-                        if abs(new_value - old_value) > 0.001:
-                            if param.data_type == 'float':
-                                param.value_float = new_value
-                            elif param.data_type == 'integer':
-                                param.value_integer = int(new_value)
-                            context[param.parameter_code] = new_value
-                            updated = True
-                    except:
-                        pass
-            if not updated:
-                break
-        
-        # Step 2: Calculate components - track ACTUAL calculated values
+            context[param.parameter_code] = param.get_numeric_value()
+            if param.parameter_type == 'calculated' and param.parameter_id.formula:
+                node = ('parameter', param.id)
+                formulas[node] = param.parameter_id.formula
+                variables[param.parameter_code] = node
+                node_names[node] = param.parameter_code
+                fallbacks[node] = None
+        
+        # Step 2: Components - only enabled lines take part, in sequence order
         enabled_lines = self.component_ids.filtered(lambda l: l.is_enabled).sorted('sequence')
-        
-        # Dictionary to track ACTUAL calculated values (not cached fields)
-        actual_values = {}
-        
-        # Initialize with current field values
+        line_vals = {}
         for line in enabled_lines:
             comp_name = self._sanitize_name(line.component_id.name)
-            actual_values[comp_name] = {
-                'quantity': line.quantity,
-                'rate': line.rate,
-                'length': line.length
-            }
-        
-        # Multiple iterations to resolve dependencies
-        for iteration in range(5):
-            updated = False
-            _logger.debug(f"Component iteration {iteration + 1}")
-            
-            for line in enabled_lines:
-                comp_name = self._sanitize_name(line.component_id.name)
-                
-                # Build context with parameters + ACTUAL calculated values + CALCULATED PARAMETERS
-                comp_context = context.copy()
-                
-                # *** FIX: ADD ALL CALCULATED PARAMETERS TO COMPONENT CONTEXT ***
-                for param in self.parameter_ids:
-                    comp_context[param.parameter_code] = param.get_numeric_value()
-                
-                # Add component values
-                for other_name, values in actual_values.items():
-                    comp_context[f"{other_name}_Qty"] = values['quantity']
-                    comp_context[f"{other_name}_Rate"] = values['rate']
-                    comp_context[f"{other_name}_Length"] = values['length']
-                
-                old_qty, old_rate, old_length = line.quantity, line.rate, line.length
-                
-                # Calculate quantity
-                if line.qty_type == 'calculated' and line.template_line_id and line.template_line_id.qty_formula:
-                    try:
-                        new_qty = float(self._safe_eval(line.template_line_id.qty_formula, comp_context))
-                        line.quantity = new_qty
-                        actual_values[comp_name]['quantity'] = new_qty  # Update ACTUAL value immediately
-                        _logger.debug(f"{line.component_name} qty: {line.template_line_id.qty_formula} = {new_qty}")
-                    except Exception as e:
-                        _logger.warning(f"Quantity calc failed for {line.component_name}: {e}")
-                        line.quantity = 0.0
-                        actual_values[comp_name]['quantity'] = 0.0
-                elif line.qty_type == 'fixed' and line.template_line_id:
-                    new_qty = line.template_line_id.qty_value or 0.0
-                    line.quantity = new_qty
-                    actual_values[comp_name]['quantity'] = new_qty
-                # For input type, keep current value and update actual_values
-                else:
-                    actual_values[comp_name]['quantity'] = line.quantity
-                
-                # Calculate rate
-                if line.rate_type == 'calculated' and line.template_line_id and line.template_line_id.rate_formula:
-                    try:
-                        new_rate = float(self._safe_eval(line.template_line_id.rate_formula, comp_context))
-                        line.rate = new_rate
-                        actual_values[comp_name]['rate'] = new_rate  # Update ACTUAL value immediately
-                        _logger.debug(f"{line.component_name} rate: {line.template_line_id.rate_formula} = {new_rate}")
-                    except Exception as e:
-                        _logger.warning(f"Rate calc failed for {line.component_name}: {e}")
-                        line.rate = line.component_id.current_rate
-                        actual_values[comp_name]['rate'] = line.rate
-                elif line.rate_type == 'fixed' and line.template_line_id:
-                    new_rate = line.template_line_id.rate_value or line.component_id.current_rate
-                    line.rate = new_rate
-                    actual_values[comp_name]['rate'] = new_rate
-                else:
-                    actual_values[comp_name]['rate'] = line.rate
-                
-                # Calculate length
-                if line.length_type == 'calculated' and line.template_line_id and line.template_line_id.length_formula:
-                    try:
-                        new_length = float(self._safe_eval(line.template_line_id.length_formula, comp_context))
-                        line.length = new_length
-                        actual_values[comp_name]['length'] = new_length  # Update ACTUAL value immediately
-                        _logger.debug(f"{line.component_name} length: {line.template_line_id.length_formula} = {new_length}")
-                    except Exception as e:
-                        _logger.warning(f"Length calc failed for {line.component_name}: {e}")
-                        line.length = 1.0
-                        actual_values[comp_name]['length'] = 1.0
-                elif line.length_type == 'fixed' and line.template_line_id:
-                    new_length = line.template_line_id.length_value or 1.0
-                    line.length = new_length
-                    actual_values[comp_name]['length'] = new_length
+            template_line = line.template_line_id
+            for field_name, suffix, value_type, formula, fixed_value, fallback in (
+                    ('quantity', 'Qty', line.qty_type, template_line.qty_formula,
+                     template_line.qty_value or 0.0, 0.0),
+                    ('rate', 'Rate', line.rate_type, template_line.rate_formula,
+                     template_line.rate_value or line.component_id.current_rate, line.component_id.current_rate),
+                    ('length', 'Length', line.length_type, template_line.length_formula,
+                     template_line.length_value or 1.0, 1.0)):
+                name = f"{comp_name}_{suffix}"
+                variables.pop(name, None)
+                if value_type == 'calculated' and template_line and formula:
+                    node = (line.id, field_name)
+                    formulas[node] = formula
+                    variables[name] = node
+                    node_names[node] = name
+                    fallbacks[node] = fallback
+                elif value_type == 'fixed' and template_line:
+                    context[name] = fixed_value
+                    line_vals.setdefault(line.id, {})[field_name] = fixed_value
                 else:
-                    actual_values[comp_name]['length'] = line.length
-                
-                # Check if anything changed
-                if (abs(line.quantity - old_qty) > 0.001 or 
-                    abs(line.rate - old_rate) > 0.01 or 
-                    abs(line.length - old_length) > 0.001):
-                    updated = True
-                    _logger.debug(f"Updated {line.component_name}: qty={old_qty}->{line.quantity}")
-            
-            # If nothing changed, we're done
-            if not updated:
-                _logger.debug(f"Components converged after {iteration + 1} iterations")
-                break
+                    context[name] = line[field_name]
         
-        _logger.info(f"=== CALCULATION COMPLETED ===")
+        # Step 3: Order the formulas by the variables they read
+        dependencies = {}
+        for node, formula in formulas.items():
+            try:
+                names = formula_engine.formula_names(formula)
+            except (SyntaxError, ValueError):
+                # Reported by _safe_eval when the formula is evaluated
+                names = ()
+            dependencies[node] = [variables[name] for name in names if name in variables]
+        try:
+            order = formula_engine.topological_order(dependencies)
+        except formula_engine.FormulaCycleError as e:
+            cycle = ' -> '.join(node_names[node] for node in e.cycle)
+            raise UserError(_('Circular formula reference: %s') % cycle)
+        
+        # Step 4: Evaluate in memory
+        param_values = {}
+        for node in order:
+            name = node_names[node]
+            try:
+                value = self._safe_eval(formulas[node], context)
+                value = float(value) if value is not None else fallbacks[node]
+            except Exception as e:
+                _logger.warning(f"Formula for {name} failed: {e}")
+                value = fallbacks[node]
+            if value is None:
+                continue
+            # Duplicate component names: only the last line feeds other formulas
+            if variables.get(name) == node:
+                context[name] = value
+            if node[0] == 'parameter':
+                param_values[node[1]] = value
+            else:
+                line_vals.setdefault(node[0], {})[node[1]] = value
         
-        # Log final values for debugging
-        for line in enabled_lines:
-            comp_name = self._sanitize_name(line.component_id.name)
-            _logger.debug(f"Final {line.component_name}: qty={line.quantity}, rate={line.rate}, length={line.length}")
-            _logger.debug(f"Actual values: {actual_values[comp_name]}")
+        # Step 5: Write changed values once
+        self._write_formula_results(param_values, line_vals)
+        
+        _logger.info(f"=== CALCULATION COMPLETED: {len(order)} formulas ===")
+    
+    def _write_formula_results(self, param_values, line_vals):
+        """Write calculated values that differ from the stored ones, grouped by identical values"""
+        tolerances = {'quantity': 0.001, 'rate': 0.01, 'length': 0.001}
+        pending = defaultdict(list)
+        
+        for param in self.parameter_ids:
+            new_value = param_values.get(param.id)
+            if new_value is None or abs(new_value - param.get_numeric_value()) <= 0.001:
+                continue
+            if param.data_type == 'float':
+                pending[('kit.cost.parameter', (('value_float', new_value),))].append(param.id)
+            elif param.data_type == 'integer':
+                pending[('kit.cost.parameter', (('value_integer', int(new_value)),))].append(param.id)
+        
+        for line in self.component_ids.filtered(lambda l: l.id in line_vals):
+            vals = line_vals[line.id]
+            changed = tuple(sorted(
+                (field_name, value) for field_name, value in vals.items()
+                if abs(value - line[field_name]) > tolerances[field_name]
+            ))
+            if changed:
+                pending[('kit.cost.line', changed)].append(line.id)
+        
+        for (model, vals), ids in pending.items():
+            self.env[model].browse(ids).write(dict(vals))
     
     def _reset_to_clean_state(self):
         """Reset ONLY calculated values to template defaults - preserve user inputs"""
@@ -439,194 +427,18 @@ class KitCostSheet(models.Model):
                     elif param.data_type == 'boolean':
                         param.value_boolean = False
     
-    def _build_fresh_parameter_context(self):
-        """Build fresh parameter context from current database state"""
-        context = {'math': math}
-        
-        # Re-read parameters from database
-        self.parameter_ids.read()
-        
-        # First pass: get fixed and input parameters
-        for param in self.parameter_ids:
-            if param.parameter_type in ['fixed', 'input']:
-                value = param.get_numeric_value()
-                context[param.parameter_code] = value
-                _logger.debug(f"Parameter {param.parameter_code}: {value} (type: {param.parameter_type})")
-        
-        return context
-    
-    def _calculate_parameters(self, context):
-        """Calculate calculated parameters with dependency resolution"""
-        calculated_params = self.parameter_ids.filtered(lambda p: p.parameter_type == 'calculated')
-        
-        if not calculated_params:
-            _logger.debug("No calculated parameters to process")
-            return
-        
-        _logger.info(f"Calculating {len(calculated_params)} calculated parameters")
-        
-        # Calculate in iterations to handle dependencies
-        max_iterations = 10
-        for iteration in range(max_iterations):
-            updated = False
-            _logger.debug(f"Parameter iteration {iteration + 1}")
-            
-            for param in calculated_params:
-                # Get formula from template
-                formula = param.parameter_id.formula
-                if formula:
-                    try:
-                        value = self._safe_eval(formula, context)
-                        if value is not None:
-                            new_value = float(value)
-                            # Check if this is actually a new/different value
-                            current_value = param.get_numeric_value()
-                            
-                            if abs(new_value - current_value) > 0.001:  # Avoid floating point precision issues
-                                context[param.parameter_code] = new_value
-                                
-                                # Update the parameter value using write() for better persistence
-                                if param.data_type == 'float':
-                                    param.write({'value_float': new_value})
-                                elif param.data_type == 'integer':
-                                    param.write({'value_integer': int(new_value)})
-                                
-                                updated = True
-                                _logger.debug(f"Updated parameter {param.parameter_code}: {current_value} -> {new_value}")
-                    except Exception as e:
-                        _logger.warning(f"Failed to calculate parameter {param.parameter_code} with formula '{formula}': {e}")
-                        continue
-            
-            if not updated:
-                _logger.debug(f"Parameter calculation converged after {iteration + 1} iterations")
-                break
-        else:
-            _logger.warning(f"Parameter calculation did not converge after {max_iterations} iterations")
-    
-    def _calculate_components(self, context):
-        """Calculate component values using template formulas with dependency resolution"""
-        # Re-read component state and get enabled lines
-        self.component_ids.read()
-        enabled_lines = self.component_ids.filtered(lambda l: l.is_enabled).sorted('sequence')
-        
-        if not enabled_lines:
-            _logger.debug("No enabled components to calculate")
-            return
-        
-        _logger.info(f"Calculating {len(enabled_lines)} enabled components")
-        
-        # Use multiple iterations to resolve component dependencies
-        max_iterations = 5
-        for iteration in range(max_iterations):
-            updated = False
-            _logger.debug(f"Component calculation iteration {iteration + 1}")
-            
-            # Calculate component formulas in sequence order
-            for line in enabled_lines:
-                _logger.debug(f"Processing component {line.sequence}: {line.component_name}")
-                
-                # Build component context fresh for each component with CURRENT values
-                comp_context = context.copy()
-                
-                # Add ALL OTHER component values to context (with fresh values)
-                for other_line in enabled_lines:
-                    if other_line.id != line.id:
-                        # Re-read to get latest calculated values
-                        other_line.read(['quantity', 'rate', 'length'])
-                        comp_name = self._sanitize_name(other_line.component_id.name)
-                        comp_context[f"{comp_name}_Qty"] = other_line.quantity
-                        comp_context[f"{comp_name}_Rate"] = other_line.rate
-                        comp_context[f"{comp_name}_Length"] = other_line.length
-                        _logger.debug(f"Added to context: {comp_name}_Qty={other_line.quantity}")
-                
-                # Store original values for comparison
-                original_quantity = line.quantity
-                original_rate = line.rate
-                original_length = line.length
-                
-                # Calculate quantity using template formula
-                new_quantity = line.quantity
-                if line.qty_type == 'calculated' and line.template_line_id and line.template_line_id.qty_formula:
-                    try:
-                        quantity = self._safe_eval(line.template_line_id.qty_formula, comp_context)
-                        new_quantity = float(quantity) if quantity is not None else 0.0
-                        _logger.debug(f"Calculated quantity for {line.component_name}: {line.template_line_id.qty_formula} = {new_quantity}")
-                    except Exception as e:
-                        _logger.warning(f"Failed to calculate quantity for {line.component_name}: {e}")
-                        new_quantity = 0.0
-                elif line.qty_type == 'fixed' and line.template_line_id:
-                    new_quantity = line.template_line_id.qty_value or 0.0
-                
-                # Calculate rate using template formula
-                new_rate = line.rate
-                if line.rate_type == 'calculated' and line.template_line_id and line.template_line_id.rate_formula:
-                    try:
-                        rate = self._safe_eval(line.template_line_id.rate_formula, comp_context)
-                        new_rate = float(rate) if rate is not None else line.component_id.current_rate
-                        _logger.debug(f"Calculated rate for {line.component_name}: {line.template_line_id.rate_formula} = {new_rate}")
-                    except Exception as e:
-                        _logger.warning(f"Failed to calculate rate for {line.component_name}: {e}")
-                        new_rate = line.component_id.current_rate
-                elif line.rate_type == 'fixed' and line.template_line_id:
-                    new_rate = line.template_line_id.rate_value or line.component_id.current_rate
-                
-                # Calculate length using template formula
-                new_length = line.length
-                if line.length_type == 'calculated' and line.template_line_id and line.template_line_id.length_formula:
-                    try:
-                        length = self._safe_eval(line.template_line_id.length_formula, comp_context)
-                        new_length = float(length) if length is not None else 1.0
-                        _logger.debug(f"Calculated length for {line.component_name}: {line.template_line_id.length_formula} = {new_length}")
-                    except Exception as e:
-                        _logger.warning(f"Failed to calculate length for {line.component_name}: {e}")
-                        new_length = 1.0
-                elif line.length_type == 'fixed' and line.template_line_id:
-                    new_length = line.template_line_id.length_value or 1.0
-                
-                # Check if values actually changed (avoid unnecessary updates)
-                if (abs(new_quantity - original_quantity) > 0.001 or 
-                    abs(new_rate - original_rate) > 0.01 or 
-                    abs(new_length - original_length) > 0.001):
-                    
-                    # Update component values immediately
-                    line.write({
-                        'quantity': new_quantity,
-                        'rate': new_rate,
-                        'length': new_length,
-                    })
-                    
-                    # Force immediate database flush
-                    self.env.flush_all()
-                    
-                    updated = True
-                    _logger.debug(f"Updated {line.component_name}: qty={original_quantity}->{new_quantity}, rate={original_rate}->{new_rate}, length={original_length}->{new_length}")
-            
-            # If no values changed in this iteration, we're done
-            if not updated:
-                _logger.debug(f"Component calculation converged after {iteration + 1} iterations")
-                break
-                
-            # Small delay and cache clear between iterations
-            self.env.invalidate_all()
-            
-        else:
-            _logger.warning(f"Component calculation did not converge after {max_iterations} iterations")
-    
     def _safe_eval(self, expression, context):
-        """Safely evaluate mathematical expressions"""
+        """Safely evaluate mathematical expressions.
+        
+        Formulas are checked and compiled once per process by
+        formula_engine.compile_formula; here they are only evaluated.
+        """
         if not expression:
             return 0
         
-        allowed_names = {
-            "__builtins__": {"abs": abs, "min": min, "max": max, "round": round},
-            "math": math,
-        }
-        allowed_names.update(context)
-        
         try:
-            node = ast.parse(expression, mode='eval')
-            result = eval(compile(node, '<string>', 'eval'), allowed_names)
-            _logger.debug(f"Formula '{expression}' evaluated to: {result}")
+            result = formula_engine.evaluate(expression, context)
+            _logger.debug("Formula '%s' evaluated to: %s", expression, result)
             return result
         except Exception as e:
             _logger.error(f"Formula Error in '{expression}': {e}")
@@ -709,16 +521,18 @@ class KitCostSheet(models.Model):
                     if comp_name in formula:
                         _logger.info(f"  ✅ References: {comp_name}")
                 
-                # Look for unknown references
-                import re
-                refs = re.findall(r'\b[a-zA-Z_][a-zA-Z0-9_]*\b', formula)
+                # Look for unknown references (same parser the calculation uses)
+                try:
+                    refs = formula_engine.formula_names(formula)
+                except (SyntaxError, ValueError) as e:
+                    _logger.error(f"  ❌ Invalid formula: {e}")
+                    continue
+                param_codes = [p.parameter_code for p in self.parameter_ids]
                 unknown_refs = []
-                for ref in refs:
-                    if ref not in ['math', 'abs', 'min', 'max', 'round', 'ceil', 'floor']:
-                        # Check if it's a parameter
-                        param_codes = [p.parameter_code for p in self.parameter_ids]
-                        if ref not in param_codes and not any(ref.startswith(cn) for cn in all_component_names):
-                            unknown_refs.append(ref)
+                for ref in sorted(refs):
+                    # Check if it's a parameter
+                    if ref not in param_codes and not any(ref.startswith(cn) for cn in all_component_names):
+                        unknown_refs.append(ref)
                 
                 if unknown_refs:
                     _logger.warning(f"  ⚠️ Unknown references: {unknown_refs}")
@@ -0,0 +1,237 @@
+# File: drkds_kit_calculator/models/recalculation_job.py
+
+from odoo import models, fields, api, _
+import logging
+import time
+
+_logger = logging.getLogger(__name__)
+
+class KitRecalculationJob(models.Model):
+    _name = 'kit.recalculation.job'
+    _description = 'Kit Cost Sheet Bulk Recalculation'
+    _order = 'create_date desc'
+
+    # Sheets recalculated per committed chunk
+    _batch_size = 50
+    # Seconds a cron run may spend before handing over to the next run
+    _time_limit = 60
+
+    name = fields.Char(string='Description', required=True)
+    trigger = fields.Selection([
+        ('component_rate', 'Component Rate Change'),
+        ('template', 'Template Change'),
+        ('manual', 'Manual'),
+    ], string='Trigger', required=True, default='manual')
+    state = fields.Selection([
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+    ], string='Status', default='pending', required=True)
+
+    line_ids = fields.One2many('kit.recalculation.job.line', 'job_id', string='Cost Sheets')
+    date_done = fields.Datetime(string='Completed On', readonly=True)
+
+    # Progress
+    sheet_count = fields.Integer(string='Sheets', compute='_compute_progress')
+    done_count = fields.Integer(string='Recalculated', compute='_compute_progress')
+    failed_count = fields.Integer(string='Failed', compute='_compute_progress')
+    progress = fields.Float(string='Progress (%)', compute='_compute_progress')
+    amount_before = fields.Float(string='Total Before', compute='_compute_progress')
+    amount_after = fields.Float(string='Total After', compute='_compute_progress')
+
+    @api.depends('line_ids.state')
+    def _compute_progress(self):
+        groups = self.env['kit.recalculation.job.line'].read_group(
+            [('job_id', 'in', self.ids)],
+            ['amount_before:sum', 'amount_after:sum'],
+            ['job_id', 'state'],
+            lazy=False,
+        )
+        stats = {}
+        for group in groups:
+            job_stats = stats.setdefault(group['job_id'][0], {'amount_before': 0.0, 'amount_after': 0.0})
+            job_stats[group['state']] = group['__count']
+            job_stats['amount_before'] += group['amount_before'] or 0.0
+            job_stats['amount_after'] += group['amount_after'] or 0.0
+
+        for job in self:
+            job_stats = stats.get(job.id, {})
+            job.done_count = job_stats.get('done', 0)
+            job.failed_count = job_stats.get('failed', 0)
+            job.sheet_count = job.done_count + job.failed_count + job_stats.get('pending', 0)
+            job.progress = (job.done_count + job.failed_count) * 100.0 / job.sheet_count if job.sheet_count else 0.0
+            job.amount_before = job_stats.get('amount_before', 0.0)
+            job.amount_after = job_stats.get('amount_after', 0.0)
+
+    @api.model
+    def _queue(self, cost_sheets, name, trigger='manual'):
+        """Queue a recalculation of ``cost_sheets``; confirmed sheets are left untouched.
+
+        Sheets still waiting in a job are not queued again, the others are
+        merged into the pending job of the same trigger when there is one.
+        Returns the job holding the sheets.
+        """
+        cost_sheets = cost_sheets.filtered(lambda s: s.state != 'confirmed')
+        # Module data updates rewrite templates without changing them
+        if not cost_sheets or self.env.context.get('install_mode'):
+            return self.browse()
+
+        # A pending line is recalculated from the sheet's state at processing time
+        queued_lines = self.env['kit.recalculation.job.line'].search([
+            ('cost_sheet_id', 'in', cost_sheets.ids),
+            ('state', '=', 'pending'),
+            ('job_id.state', 'in', ('pending', 'running')),
+        ])
+        cost_sheets -= queued_lines.cost_sheet_id
+        if not cost_sheets:
+            return queued_lines.job_id[-1:]
+
+        line_commands = [(0, 0, {'cost_sheet_id': sheet_id}) for sheet_id in cost_sheets.ids]
+        job = self.search([('state', '=', 'pending'), ('trigger', '=', trigger)], order='id desc', limit=1)
+        if job:
+            vals = {'line_ids': line_commands}
+            if name not in job.name.split('; '):
+                vals['name'] = f"{job.name}; {name}"
+            job.write(vals)
+            _logger.info(f"Merged {len(cost_sheets)} cost sheets into bulk recalculation {job.id}: {name}")
+            return job
+
+        job = self.create({
+            'name': name,
+            'trigger': trigger,
+            'line_ids': line_commands,
+        })
+        _logger.info(f"Queued bulk recalculation {job.id} for {len(cost_sheets)} cost sheets: {name}")
+        return job
+
+    @api.model
+    def _queue_for_components(self, components):
+        """Queue every open cost sheet using one of ``components``"""
+        cost_sheets = self.env['kit.cost.line'].search([
+            ('component_id', 'in', components.ids),
+            ('cost_sheet_id.state', '!=', 'confirmed'),
+        ]).cost_sheet_id
+        return self._queue(
+            cost_sheets,
+            _('Rate change: %s') % ', '.join(components.mapped('name')),
+            trigger='component_rate',
+        )
+
+    @api.model
+    def _queue_for_templates(self, templates):
+        """Queue every open cost sheet built from one of ``templates``"""
+        cost_sheets = self.env['kit.cost.sheet'].search([
+            ('template_id', 'in', templates.ids),
+            ('state', '!=', 'confirmed'),
+        ])
+        return self._queue(
+            cost_sheets,
+            _('Template change: %s') % ', '.join(templates.mapped('name')),
+            trigger='template',
+        )
+
+    def action_process_now(self):
+        """Ask the recalculation cron to run as soon as possible"""
+        cron = self.env.ref('drkds_kit_calculator.ir_cron_kit_recalculation', raise_if_not_found=False)
+        if cron:
+            cron._trigger()
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'display_notification',
+            'params': {
+                'title': _('Recalculation Scheduled'),
+                'message': _('The cost sheets will be recalculated in the background.'),
+                'type': 'info',
+            }
+        }
+
+    def action_view_cost_sheets(self):
+        self.ensure_one()
+        return {
+            'name': _('Cost Sheets'),
+            'type': 'ir.actions.act_window',
+            'res_model': 'kit.cost.sheet',
+            'view_mode': 'tree,form',
+            'domain': [('id', 'in', self.line_ids.cost_sheet_id.ids)],
+        }
+
+    @api.model
+    def _cron_process_jobs(self):
+        """Work through pending jobs in committed chunks until the time budget is used"""
+        deadline = time.monotonic() + self._time_limit
+        for job in self.search([('state', 'in', ('pending', 'running'))], order='id'):
+            if not job._process(deadline):
+                # Out of time: continue in a fresh cron run instead of hitting the worker limit
+                self.env.ref('drkds_kit_calculator.ir_cron_kit_recalculation')._trigger()
+                return
+
+    def _process(self, deadline):
+        """Recalculate this job's pending sheets; False when stopped by the deadline"""
+        self.ensure_one()
+        JobLine = self.env['kit.recalculation.job.line']
+        if self.state == 'pending':
+            self.state = 'running'
+            self._commit_progress()
+
+        while True:
+            lines = JobLine.search([('job_id', '=', self.id), ('state', '=', 'pending')],
+                                   limit=self._batch_size, order='id')
+            if not lines:
+                break
+            lines._recalculate()
+            self._commit_progress()
+            _logger.info(f"Bulk recalculation {self.id}: {self.done_count + self.failed_count}/{self.sheet_count} sheets")
+            if time.monotonic() > deadline:
+                return False
+
+        self.write({'state': 'done', 'date_done': fields.Datetime.now()})
+        self._commit_progress()
+        return True
+
+    def _commit_progress(self):
+        """Commit finished chunks so a killed worker only loses the current one"""
+        if not self.env.registry.in_test_mode():
+            self.env.cr.commit()
+
+
+class KitRecalculationJobLine(models.Model):
+    _name = 'kit.recalculation.job.line'
+    _description = 'Kit Cost Sheet Bulk Recalculation Line'
+    _order = 'id'
+
+    job_id = fields.Many2one('kit.recalculation.job', string='Job', required=True, ondelete='cascade', index=True)
+    cost_sheet_id = fields.Many2one('kit.cost.sheet', string='Cost Sheet', required=True, ondelete='cascade')
+    state = fields.Selection([
+        ('pending', 'Pending'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ], string='Status', default='pending', required=True, index=True)
+
+    amount_before = fields.Float(string='Amount Before', readonly=True)
+    amount_after = fields.Float(string='Amount After', readonly=True)
+    difference = fields.Float(string='Difference', compute='_compute_difference', store=True)
+    error = fields.Text(string='Error', readonly=True)
+
+    @api.depends('amount_before', 'amount_after', 'state')
+    def _compute_difference(self):
+        for line in self:
+            line.difference = line.amount_after - line.amount_before if line.state == 'done' else 0.0
+
+    def _recalculate(self):
+        """Recalculate each line's cost sheet, recording its enabled amount before and after"""
+        for line in self:
+            sheet = line.cost_sheet_id
+            amount_before = sheet.enabled_amount
+            try:
+                with self.env.cr.savepoint():
+                    sheet._calculate_all_formulas()
+                    sheet.last_calculation = fields.Datetime.now()
+            except Exception as e:
+                _logger.warning(f"Bulk recalculation failed for cost sheet {sheet.id}: {e}")
+                line.write({'state': 'failed', 'amount_before': amount_before, 'error': str(e)})
+                continue
+            line.write({
+                'state': 'done',
+                'amount_before': amount_before,
+                'amount_after': sheet.enabled_amount,
+            })
@@ -7,6 +7,14 @@ import operator
 import math
 import re
 
+# Template fields whose change makes existing cost sheets outdated
+RECALCULATION_LINE_FIELDS = {
+    'qty_type', 'qty_value', 'qty_formula',
+    'rate_type', 'rate_value', 'rate_formula',
+    'length_type', 'length_value', 'length_formula',
+}
+RECALCULATION_PARAMETER_FIELDS = {'parameter_type', 'formula'}
+
 class KitTemplate(models.Model):
     _name = 'kit.template'
     _description = 'Kit Template'
@@ -133,6 +141,12 @@ class KitTemplateLine(models.Model):
         if self.component_id:
             self.rate_value = self.component_id.current_rate
     
+    def write(self, vals):
+        result = super().write(vals)
+        if RECALCULATION_LINE_FIELDS.intersection(vals) and not self.env.context.get('skip_recalculation_queue'):
+            self.env['kit.recalculation.job']._queue_for_templates(self.template_id)
+        return result
+    
     @api.constrains('qty_formula', 'rate_formula', 'length_formula')
     def _check_formulas(self):
         for record in self:
@@ -228,6 +242,12 @@ class KitTemplateParameter(models.Model):
     formula = fields.Text(string='Formula', help="Formula for calculated parameters")
     description = fields.Text(string='Description')
     
+    def write(self, vals):
+        result = super().write(vals)
+        if RECALCULATION_PARAMETER_FIELDS.intersection(vals):
+            self.env['kit.recalculation.job']._queue_for_templates(self.template_id)
+        return result
+    
     @api.constrains('parameter_type', 'formula')
     def _check_calculated_formula(self):
         for record in self:
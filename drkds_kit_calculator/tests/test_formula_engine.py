@@ -0,0 +1,31 @@
+from odoo.tests.common import BaseCase
+
+from odoo.addons.drkds_kit_calculator import formula_engine
+from odoo.addons.drkds_kit_calculator.formula_engine import FormulaError
+
+
+class TestFormulaEngine(BaseCase):
+
+    def test_list_and_tuple_arguments(self):
+        values = {'A': 2.0, 'B': 5.0}
+        self.assertEqual(formula_engine.evaluate('max([A, B])', values), 5.0)
+        self.assertEqual(formula_engine.evaluate('min((A, B))', values), 2.0)
+        self.assertEqual(formula_engine.formula_names('max([A, B]) * math.pi'), {'A', 'B'})
+
+    def test_keyword_arguments(self):
+        self.assertEqual(formula_engine.evaluate('round(A, ndigits=1)', {'A': 1.26}), 1.3)
+        with self.assertRaises(FormulaError):
+            formula_engine.compile_formula('max(**A)')
+
+    def test_rejected_syntax(self):
+        for expression in ('[x for x in A]', 'A.__class__', 'lambda: A', 'max(*A)'):
+            with self.subTest(expression=expression), self.assertRaises(FormulaError):
+                formula_engine.compile_formula(expression)
+
+    def test_formulas_ordered_by_dependency(self):
+        order = formula_engine.topological_order({'C': {'B'}, 'B': {'A'}, 'A': set()})
+        self.assertEqual(list(order), ['A', 'B', 'C'])
+
+    def test_cycle(self):
+        with self.assertRaises(formula_engine.FormulaCycleError):
+            formula_engine.topological_order({'A': {'B'}, 'B': {'A'}})
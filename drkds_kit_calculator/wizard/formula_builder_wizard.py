@@ -2,9 +2,9 @@
 
 from odoo import models, fields, api, _
 from odoo.exceptions import ValidationError, UserError
-import ast
 import math
-import re
+
+from .. import formula_engine
 
 class KitFormulaBuilderWizard(models.TransientModel):
     _name = 'kit.formula.builder.wizard'
@@ -188,23 +188,13 @@ class KitFormulaBuilderWizard(models.TransientModel):
             return
         
         try:
-            # Check syntax by parsing
-            ast.parse(self.formula, mode='eval')
+            # Check syntax and allowed constructs; the compiled formula is
+            # cached and reused when cost sheets evaluate it
+            referenced_fields = formula_engine.formula_names(self.formula)
             
             # Check if all referenced fields exist
-            available_field_names = self.available_fields.mapped('name')
-            
-            # Extract field references from formula
-            referenced_fields = re.findall(r'\b[a-zA-Z_][a-zA-Z0-9_]*\b', self.formula)
-            
-            # Filter out math functions and operators
-            math_functions = ['math', 'sqrt', 'abs', 'min', 'max', 'ceil', 'floor', 'sin', 'cos', 'tan']
-            referenced_fields = [f for f in referenced_fields if f not in math_functions]
-            
-            missing_fields = []
-            for field in referenced_fields:
-                if field not in available_field_names:
-                    missing_fields.append(field)
+            available_field_names = set(self.available_fields.mapped('name'))
+            missing_fields = sorted(referenced_fields - available_field_names)
             
             if missing_fields:
                 self.validation_result = f"Unknown fields: {', '.join(missing_fields)}"
@@ -213,6 +203,8 @@ class KitFormulaBuilderWizard(models.TransientModel):
                 
         except SyntaxError as e:
             self.validation_result = f"Syntax error: {str(e)}"
+        except formula_engine.FormulaError as e:
+            self.validation_result = f"Not allowed: {str(e)}"
         except Exception as e:
             self.validation_result = f"Error: {str(e)}"
         
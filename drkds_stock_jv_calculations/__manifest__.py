@@ -18,6 +18,7 @@ This module allows you to:
         'security/ir.model.access.csv',
         'views/stock_jv_calculation_views.xml',
         'views/stock_jv_calculation_wizard_views.xml',
+        'views/stock_jv_planning_views.xml',
         'views/menu_views.xml',
     ],
     'installable': True,
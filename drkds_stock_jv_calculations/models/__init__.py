@@ -1 +1,3 @@
+from . import bom_explosion
 from . import stock_jv_calculation 
+from . import stock_jv_planning
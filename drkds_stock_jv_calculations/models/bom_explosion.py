@@ -0,0 +1,129 @@
+from odoo import models, _
+from odoo.exceptions import UserError
+from collections import namedtuple
+
+# BOMs of one company: first BOM per variant and per template, and the
+# (component, quantity) pairs of each BOM keyed by BOM id
+BomIndex = namedtuple('BomIndex', ['variant_boms', 'template_boms', 'components'])
+
+
+# Raw material explosion shared by the models that have a company_id field
+class StockJvBomExplosionMixin(models.AbstractModel):
+    _name = 'stock.jv.bom.explosion.mixin'
+    _description = 'Stock JV BOM Explosion'
+    
+    def _get_bom_index(self):
+        """
+        Load every BOM of the company with its lines in a handful of queries
+        """
+        boms = self.env['mrp.bom'].search([('company_id', '=', self.company_id.id)])
+        
+        # Searched in BOM order, so the first BOM kept per key is the one a
+        # search with limit=1 would return
+        variant_boms = {}
+        template_boms = {}
+        for bom in boms:
+            if bom.product_id:
+                variant_boms.setdefault(bom.product_id.id, bom)
+            else:
+                template_boms.setdefault(bom.product_tmpl_id.id, bom)
+        
+        components = {bom.id: [] for bom in boms}
+        for line in boms.bom_line_ids:
+            component = line.product_id
+            
+            # Component quantity for bom.product_qty, in the component's UoM
+            if line.product_uom_id.id != component.uom_id.id:
+                line_qty = line.product_uom_id._compute_quantity(line.product_qty, component.uom_id)
+            else:
+                line_qty = line.product_qty
+            components[line.bom_id.id].append((component, line_qty))
+        
+        return BomIndex(variant_boms, template_boms, components)
+    
+    def _find_indexed_bom(self, index, product):
+        """
+        First BOM made for the product or for its template, as the per-product
+        BOM search returns it
+        """
+        boms = [bom for bom in (index.variant_boms.get(product.id),
+                                index.template_boms.get(product.product_tmpl_id.id)) if bom]
+        if not boms:
+            return self.env['mrp.bom']
+        return min(boms, key=lambda bom: (bom.sequence, bom.id))
+    
+    def _explode_raw_materials(self, demand, index):
+        """
+        Explode the demanded products level by level into raw materials.
+        
+        ``demand`` maps each product to its quantities per calculation line;
+        the result maps each raw material to the quantity every line needs.
+        Every sub-assembly is exploded once, at the deepest level it is used
+        on, after all of its parents have added their quantities to it.
+        """
+        boms, levels = self._get_explosion_levels(demand, index)
+        quantities = {product_id: dict(shares) for product_id, shares in demand.items()}
+        raw_materials = {}
+        
+        for level in levels:
+            for product_id in level:
+                bom = boms[product_id]
+                factors = {key: qty / bom.product_qty for key, qty in quantities.pop(product_id).items()}
+                for component, line_qty in index.components[bom.id]:
+                    # Sub-assemblies are exploded on a later level, other components are raw materials
+                    target = quantities if boms[component.id] else raw_materials
+                    shares = target.setdefault(component.id, {})
+                    for key, factor in factors.items():
+                        shares[key] = shares.get(key, 0.0) + line_qty * factor
+        
+        return raw_materials
+    
+    def _get_explosion_levels(self, demand, index):
+        """
+        Find the BOM of every product reachable from the demanded ones and
+        group the products having a BOM by the deepest level they appear on
+        """
+        boms = {}
+        for product in self.env['product.product'].browse(demand):
+            boms[product.id] = self._find_indexed_bom(index, product)
+        depths = dict.fromkeys(demand, 0)
+        
+        frontier = list(demand)
+        while frontier:
+            next_frontier = {}
+            for product_id in frontier:
+                for component, line_qty in index.components[boms[product_id].id]:
+                    if component.id not in boms:
+                        boms[component.id] = self._find_indexed_bom(index, component)
+                    if not boms[component.id] or depths.get(component.id, -1) > depths[product_id]:
+                        continue
+                    
+                    depths[component.id] = depths[product_id] + 1
+                    # A chain deeper than the number of BOMs must loop back on itself
+                    if depths[component.id] > len(index.components):
+                        raise UserError(_(
+                            "The BOM of '%s' contains itself, directly or through one of its components."
+                        ) % component.display_name)
+                    next_frontier[component.id] = True
+            frontier = list(next_frontier)
+        
+        levels = [[] for dummy in range(max(depths.values(), default=-1) + 1)]
+        for product_id, depth in depths.items():
+            levels[depth].append(product_id)
+        return boms, levels
+    
+    def _get_bom_coefficients(self, products, index):
+        """
+        Flatten the BOMs of the given products into raw material quantities
+        per unit of each product, in the product's UoM.
+        
+        Returns {raw_material_id: {product_id: quantity}}, computed in a single
+        explosion; products without a BOM have no coefficients.
+        """
+        demand = {}
+        for product in products:
+            bom = self._find_indexed_bom(index, product)
+            if bom:
+                # One unit of the product, in its BOM's UoM
+                demand[product.id] = {product.id: product.uom_id._compute_quantity(1.0, bom.product_uom_id, round=False)}
+        return self._explode_raw_materials(demand, index)
@@ -1,5 +1,6 @@
 from odoo import models, fields, api, _
 from odoo.exceptions import UserError
+from odoo.tools import float_compare
 import logging
 
 _logger = logging.getLogger(__name__)
@@ -8,7 +9,7 @@ class StockJvCalculation(models.Model):
     _name = 'stock.jv.calculation'
     _description = 'Stock JV Calculation'
     _order = 'date desc, id desc'
-    _inherit = ['mail.thread', 'mail.activity.mixin']
+    _inherit = ['mail.thread', 'mail.activity.mixin', 'stock.jv.bom.explosion.mixin']
     
     name = fields.Char('Reference', required=True, copy=False, readonly=True, default=lambda self: _('New'))
     date = fields.Date('Date', default=fields.Date.context_today, required=True, tracking=True)
@@ -45,55 +46,10 @@ class StockJvCalculation(models.Model):
         if not self.line_ids:
             raise UserError(_("Please add at least one product to calculate raw materials."))
         
-        # Clear previous results
-        self.result_ids.unlink()
-        
-        # Dictionary to store raw material quantities
-        raw_materials = {}
-        
-        # Track BOM unit mismatches
-        unit_mismatches = []
-        
-        # Get list of top-level product IDs to exclude from raw materials
-        top_level_ids = set(line.product_id.id for line in self.line_ids)
-        
-        # Process each product line
-        for line in self.line_ids:
-            product = line.product_id
-            quantity = line.product_qty
-            
-            # Check if product has BOM using direct search
-            domain = [
-                '|',
-                ('product_id', '=', product.id),
-                '&',
-                ('product_id', '=', False),
-                ('product_tmpl_id', '=', product.product_tmpl_id.id),
-                ('company_id', '=', self.company_id.id),
-            ]
-            bom = self.env['mrp.bom'].search(domain, limit=1)
-            
-            if bom and product.uom_id.id != bom.product_uom_id.id:
-                unit_mismatches.append(_(
-                    "Unit mismatch warning: Product '%s' uses '%s' but its BOM uses '%s'. Conversion will be applied."
-                ) % (product.name, product.uom_id.name, bom.product_uom_id.name))
-            
-            self._process_bom(product, quantity, raw_materials, is_top_level=True, top_level_ids=top_level_ids)
-        
-        # Create result lines
-        result_vals = []
-        for raw_material_id, data in raw_materials.items():
-            raw_material = self.env['product.product'].browse(raw_material_id)
-            result_vals.append({
-                'calculation_id': self.id,
-                'product_id': raw_material_id,
-                'product_qty': data['qty'],
-                'product_uom': data['uom'],
-                'has_uom_warning': False,
-            })
-        
-        if result_vals:
-            self.env['stock.jv.calculation.result'].create(result_vals)
+        # Only lines added or changed since the last calculation are exploded;
+        # the others keep their stored contributions
+        unit_mismatches = self._explode_lines(self.line_ids.filtered(lambda line: not line.is_exploded))
+        self._update_results()
         
         # Create notification for unit mismatches
         if unit_mismatches:
@@ -115,86 +71,91 @@ class StockJvCalculation(models.Model):
             },
         }
     
-    def _process_bom(self, product, quantity, raw_materials, is_top_level=True, top_level_ids=None):
+    def action_recalculate_from_boms(self):
+        """Explode every line again, e.g. after the BOMs have changed"""
+        self.ensure_one()
+        self.line_ids.contribution_ids.unlink()
+        self.line_ids.write({'is_exploded': False})
+        return self.calculate_raw_materials()
+    
+    def _explode_lines(self, lines):
         """
-        Recursively process BOM to get all raw materials
+        Store the raw material contributions of each of the given lines and
+        return the unit mismatch messages found on the way
         """
-        # Initialize top_level_ids if not provided
-        if top_level_ids is None and is_top_level:
-            top_level_ids = set([product.id])
-        elif top_level_ids is None:
-            top_level_ids = set()
-                
-        # Find the BOM for this product using direct search
-        domain = [
-            '|',
-            ('product_id', '=', product.id),
-            '&',
-            ('product_id', '=', False),
-            ('product_tmpl_id', '=', product.product_tmpl_id.id),
-            ('company_id', '=', self.company_id.id),
-        ]
+        if not lines:
+            return []
         
-        bom = self.env['mrp.bom'].search(domain, limit=1)
+        # All BOMs of the company, loaded once for the whole explosion
+        index = self._get_bom_index()
         
-        # If no BOM found or can't use it
-        if not bom:
-            # If product is not in the top-level products list, add as raw material
-            if product.id not in top_level_ids:
-                if product.id not in raw_materials:
-                    raw_materials[product.id] = {
-                        'qty': 0.0,
-                        'uom': product.uom_id.id,
-                        'uom_category': product.uom_id.category_id.id,
-                    }
-                raw_materials[product.id]['qty'] += quantity
-            return
+        # Track BOM unit mismatches
+        unit_mismatches = []
         
-        # Check if product UoM and BOM UoM are different
-        if is_top_level and product.uom_id.id != bom.product_uom_id.id:
-            # Convert quantity to BOM UoM
-            quantity = product.uom_id._compute_quantity(quantity, bom.product_uom_id)
+        # Quantity of each line to explode, in its BOM's UoM, per product;
+        # top-level products without a BOM are not raw materials
+        demand = {}
+        for line in lines:
+            product = line.product_id
+            quantity = line.product_qty
             
-        # Process each BOM line
-        factor = quantity / bom.product_qty
-        for line in bom.bom_line_ids:
-            component = line.product_id
+            bom = self._find_indexed_bom(index, product)
+            if not bom:
+                continue
             
-            # Calculate component quantity with proper unit conversion
-            if line.product_uom_id.id != component.uom_id.id:
-                line_qty = line.product_uom_id._compute_quantity(line.product_qty, component.uom_id) * factor
-            else:
-                line_qty = line.product_qty * factor
-                
-            # Check if component has BOM - using the same direct search approach
-            component_domain = [
-                '|',
-                ('product_id', '=', component.id),
-                '&',
-                ('product_id', '=', False),
-                ('product_tmpl_id', '=', component.product_tmpl_id.id),
-                ('company_id', '=', self.company_id.id),
-            ]
-            component_bom = self.env['mrp.bom'].search(component_domain, limit=1)
+            if product.uom_id.id != bom.product_uom_id.id:
+                unit_mismatches.append(_(
+                    "Unit mismatch warning: Product '%s' uses '%s' but its BOM uses '%s'. Conversion will be applied."
+                ) % (product.name, product.uom_id.name, bom.product_uom_id.name))
+                # Convert quantity to BOM UoM
+                quantity = product.uom_id._compute_quantity(quantity, bom.product_uom_id)
             
-            if component_bom:
-                # If component has BOM, process recursively
-                self._process_bom(
-                    component, 
-                    line_qty, 
-                    raw_materials, 
-                    is_top_level=False,
-                    top_level_ids=top_level_ids
-                )
-            else:
-                # If no BOM, add to raw materials
-                if component.id not in raw_materials:
-                    raw_materials[component.id] = {
-                        'qty': 0.0,
-                        'uom': component.uom_id.id,
-                        'uom_category': component.uom_id.category_id.id,
-                    }
-                raw_materials[component.id]['qty'] += line_qty
+            demand.setdefault(product.id, {})[line.id] = quantity
+        
+        raw_materials = self._explode_raw_materials(demand, index)
+        
+        lines.contribution_ids.unlink()
+        self.env['stock.jv.calculation.contribution'].create([{
+            'calculation_id': self.id,
+            'line_id': line_id,
+            'product_id': raw_material_id,
+            'product_qty': qty,
+        } for raw_material_id, shares in raw_materials.items() for line_id, qty in shares.items()])
+        lines.write({'is_exploded': True})
+        
+        return unit_mismatches
+    
+    def _update_results(self):
+        """
+        Bring the result lines in line with the summed contributions, touching
+        only the raw materials whose quantity changed
+        """
+        groups = self.env['stock.jv.calculation.contribution'].read_group(
+            [('calculation_id', '=', self.id)],
+            ['product_qty:sum'],
+            ['product_id'],
+        )
+        totals = {group['product_id'][0]: group['product_qty'] for group in groups}
+        
+        obsolete = self.env['stock.jv.calculation.result']
+        for result in self.result_ids:
+            qty = totals.pop(result.product_id.id, None)
+            if qty is None:
+                obsolete |= result
+            elif float_compare(result.product_qty, qty, precision_rounding=result.product_uom.rounding):
+                # Written together when the changes are flushed
+                result.product_qty = qty
+        obsolete.unlink()
+        
+        # Create result lines for new raw materials
+        raw_materials = self.env['product.product'].browse(totals)
+        self.env['stock.jv.calculation.result'].create([{
+            'calculation_id': self.id,
+            'product_id': raw_material.id,
+            'product_qty': totals[raw_material.id],
+            'product_uom': raw_material.uom_id.id,
+            'has_uom_warning': False,
+        } for raw_material in raw_materials])
     
     def action_cancel(self):
         self.write({'state': 'cancel'})
@@ -218,6 +179,16 @@ class StockJvCalculationLine(models.Model):
     product_qty = fields.Float('Quantity', required=True, default=1.0)
     product_uom = fields.Many2one('uom.uom', string='UoM', related='product_id.uom_id', readonly=True)
     bom_id = fields.Many2one('mrp.bom', string='BOM', compute='_compute_bom_id', store=True)
+    contribution_ids = fields.One2many('stock.jv.calculation.contribution', 'line_id', string='Raw Material Contributions')
+    is_exploded = fields.Boolean('Exploded', copy=False,
+                                 help="The raw material contributions of this line are up to date")
+    
+    def write(self, vals):
+        if 'product_id' in vals or 'product_qty' in vals:
+            # Exploded again by the next calculation
+            self.contribution_ids.unlink()
+            vals = dict(vals, is_exploded=False)
+        return super(StockJvCalculationLine, self).write(vals)
     
     @api.depends('product_id', 'calculation_id.company_id')
     def _compute_bom_id(self):
@@ -253,4 +224,14 @@ class StockJvCalculationResult(models.Model):
     has_uom_warning = fields.Boolean('UoM Warning', default=False, 
                                      help="Indicates there was a unit of measure conversion in the BOM calculation")
     is_subcontracted = fields.Boolean('Is Subcontracted', default=False)
-    is_supplied_to_subcontractor = fields.Boolean('Supplied to Subcontractor', default=False)
\ No newline at end of file
+    is_supplied_to_subcontractor = fields.Boolean('Supplied to Subcontractor', default=False)
+
+
+class StockJvCalculationContribution(models.Model):
+    _name = 'stock.jv.calculation.contribution'
+    _description = 'Stock JV Calculation Raw Material Contribution'
+    
+    calculation_id = fields.Many2one('stock.jv.calculation', string='Calculation Reference', required=True, ondelete='cascade', index=True)
+    line_id = fields.Many2one('stock.jv.calculation.line', string='Product Line', required=True, ondelete='cascade', index=True)
+    product_id = fields.Many2one('product.product', string='Raw Material', required=True)
+    product_qty = fields.Float('Required Quantity', required=True)
\ No newline at end of file
@@ -0,0 +1,208 @@
+from odoo import models, fields, api, _
+from odoo.exceptions import UserError, ValidationError
+from dateutil.relativedelta import relativedelta
+from bisect import bisect_right
+import logging
+
+_logger = logging.getLogger(__name__)
+
+class StockJvPlanning(models.Model):
+    _name = 'stock.jv.planning'
+    _description = 'Multi-Period Raw Material Planning'
+    _order = 'date desc, id desc'
+    _inherit = ['mail.thread', 'mail.activity.mixin', 'stock.jv.bom.explosion.mixin']
+    
+    name = fields.Char('Reference', required=True, copy=False, readonly=True, default=lambda self: _('New'))
+    date = fields.Date('Date', default=fields.Date.context_today, required=True, tracking=True)
+    user_id = fields.Many2one('res.users', string='User', default=lambda self: self.env.user, required=True, tracking=True)
+    company_id = fields.Many2one('res.company', string='Company', required=True, 
+                                 default=lambda self: self.env.company)
+    state = fields.Selection([
+        ('draft', 'Draft'),
+        ('done', 'Done'),
+    ], string='Status', default='draft', readonly=True, tracking=True)
+    
+    period_type = fields.Selection([
+        ('week', 'Weekly'),
+        ('month', 'Monthly'),
+    ], string='Periods', default='month', required=True)
+    date_from = fields.Date('From', required=True, default=lambda self: fields.Date.context_today(self).replace(day=1))
+    date_to = fields.Date('To', required=True,
+                          default=lambda self: fields.Date.context_today(self).replace(day=1) + relativedelta(months=12, days=-1))
+    
+    period_ids = fields.One2many('stock.jv.planning.period', 'planning_id', string='Periods')
+    demand_ids = fields.One2many('stock.jv.planning.demand', 'planning_id', string='Finished Goods Demand')
+    requirement_ids = fields.One2many('stock.jv.planning.requirement', 'planning_id', string='Raw Material Requirements')
+    
+    @api.model_create_multi
+    def create(self, vals_list):
+        for vals in vals_list:
+            if vals.get('name', _('New')) == _('New'):
+                vals['name'] = self.env['ir.sequence'].next_by_code('stock.jv.planning') or _('New')
+        return super(StockJvPlanning, self).create(vals_list)
+    
+    @api.constrains('date_from', 'date_to')
+    def _check_dates(self):
+        for record in self:
+            if record.date_from > record.date_to:
+                raise ValidationError(_("The planning must end after it starts."))
+    
+    def action_generate_periods(self):
+        """Split the planning horizon into weeks or months, replacing the demand"""
+        self.ensure_one()
+        self.period_ids.unlink()
+        
+        step = relativedelta(weeks=1) if self.period_type == 'week' else relativedelta(months=1)
+        if self.period_type == 'week':
+            start = self.date_from - relativedelta(days=self.date_from.weekday())
+        else:
+            start = self.date_from.replace(day=1)
+        
+        period_vals = []
+        while start <= self.date_to:
+            end = start + step - relativedelta(days=1)
+            period_vals.append({
+                'planning_id': self.id,
+                'sequence': len(period_vals),
+                'name': start.strftime('W%V %G') if self.period_type == 'week' else start.strftime('%b %Y'),
+                'date_start': start,
+                'date_end': end,
+            })
+            start += step
+        self.env['stock.jv.planning.period'].create(period_vals)
+        return True
+    
+    def action_load_deliveries(self):
+        """
+        Fill the demand matrix with the open outgoing moves of each period,
+        i.e. the deliveries of confirmed sales orders
+        """
+        self.ensure_one()
+        if not self.period_ids:
+            self.action_generate_periods()
+        periods = self.period_ids.sorted('date_start')
+        starts = [period.date_start for period in periods]
+        
+        groups = self.env['stock.move']._read_group(
+            [
+                ('company_id', '=', self.company_id.id),
+                ('picking_code', '=', 'outgoing'),
+                ('state', 'not in', ('draft', 'done', 'cancel')),
+                ('date', '>=', fields.Datetime.to_datetime(periods[0].date_start)),
+                ('date', '<', fields.Datetime.to_datetime(periods[-1].date_end + relativedelta(days=1))),
+            ],
+            ['product_id', 'date:day'],
+            ['product_qty:sum'],
+        )
+        
+        # Quantity per (product, period), in the product's UoM
+        matrix = {}
+        for product, day, qty in groups:
+            # Days are bucketed in the user's timezone and may fall just before the horizon
+            period = periods[max(bisect_right(starts, fields.Date.to_date(day)) - 1, 0)]
+            key = (product.id, period.id)
+            matrix[key] = matrix.get(key, 0.0) + qty
+        
+        self.demand_ids.unlink()
+        self.env['stock.jv.planning.demand'].create([{
+            'planning_id': self.id,
+            'product_id': product_id,
+            'period_id': period_id,
+            'product_qty': qty,
+        } for (product_id, period_id), qty in matrix.items()])
+        return True
+    
+    def action_calculate(self):
+        """
+        Compute the raw material requirements of all periods at once.
+        
+        Every finished good is exploded once into raw material quantities per
+        unit; each period's requirements are then the product of that
+        coefficient matrix with the period's demand.
+        """
+        self.ensure_one()
+        if not self.demand_ids:
+            raise UserError(_("Please enter or load the finished goods demand first."))
+        
+        # Demand matrix: product -> period -> quantity
+        demand = {}
+        for line in self.demand_ids:
+            periods = demand.setdefault(line.product_id.id, {})
+            periods[line.period_id.id] = periods.get(line.period_id.id, 0.0) + line.product_qty
+        
+        index = self._get_bom_index()
+        coefficients = self._get_bom_coefficients(self.demand_ids.product_id, index)
+        
+        requirements = {}
+        for raw_material_id, per_product in coefficients.items():
+            for product_id, coefficient in per_product.items():
+                for period_id, qty in demand[product_id].items():
+                    key = (raw_material_id, period_id)
+                    requirements[key] = requirements.get(key, 0.0) + coefficient * qty
+        
+        _logger.info(f"Planning {self.name}: {len(demand)} finished goods, {len(coefficients)} raw materials, "
+                     f"{len(self.period_ids)} periods")
+        
+        self.requirement_ids.unlink()
+        raw_materials = self.env['product.product'].browse({raw_material_id for raw_material_id, period_id in requirements})
+        uoms = {raw_material.id: raw_material.uom_id.id for raw_material in raw_materials}
+        self.env['stock.jv.planning.requirement'].create([{
+            'planning_id': self.id,
+            'product_id': raw_material_id,
+            'period_id': period_id,
+            'product_qty': qty,
+            'product_uom': uoms[raw_material_id],
+        } for (raw_material_id, period_id), qty in requirements.items()])
+        
+        self.write({'state': 'done'})
+        return self.action_view_requirements()
+    
+    def action_view_requirements(self):
+        self.ensure_one()
+        return {
+            'type': 'ir.actions.act_window',
+            'name': _('Raw Material Requirements'),
+            'res_model': 'stock.jv.planning.requirement',
+            'view_mode': 'pivot,tree',
+            'domain': [('planning_id', '=', self.id)],
+            'context': {'create': False},
+        }
+    
+    def action_draft(self):
+        self.write({'state': 'draft'})
+
+
+class StockJvPlanningPeriod(models.Model):
+    _name = 'stock.jv.planning.period'
+    _description = 'Raw Material Planning Period'
+    _order = 'sequence, date_start'
+    
+    planning_id = fields.Many2one('stock.jv.planning', string='Planning', required=True, ondelete='cascade', index=True)
+    sequence = fields.Integer('Sequence', default=10)
+    name = fields.Char('Period', required=True)
+    date_start = fields.Date('Start', required=True)
+    date_end = fields.Date('End', required=True)
+
+
+class StockJvPlanningDemand(models.Model):
+    _name = 'stock.jv.planning.demand'
+    _description = 'Raw Material Planning Demand'
+    
+    planning_id = fields.Many2one('stock.jv.planning', string='Planning', required=True, ondelete='cascade', index=True)
+    period_id = fields.Many2one('stock.jv.planning.period', string='Period', required=True, ondelete='cascade',
+                                domain="[('planning_id', '=', planning_id)]")
+    product_id = fields.Many2one('product.product', string='Product', required=True, domain=[('type', 'in', ['product', 'consu'])])
+    product_qty = fields.Float('Quantity', required=True, default=1.0)
+    product_uom = fields.Many2one('uom.uom', string='UoM', related='product_id.uom_id', readonly=True)
+
+
+class StockJvPlanningRequirement(models.Model):
+    _name = 'stock.jv.planning.requirement'
+    _description = 'Raw Material Planning Requirement'
+    _order = 'period_id, product_id'
+    
+    planning_id = fields.Many2one('stock.jv.planning', string='Planning', required=True, ondelete='cascade', index=True)
+    period_id = fields.Many2one('stock.jv.planning.period', string='Period', required=True, ondelete='cascade')
+    product_id = fields.Many2one('product.product', string='Raw Material', required=True)
+    product_qty = fields.Float('Required Quantity', required=True)
+    product_uom = fields.Many2one('uom.uom', string='UoM', required=True)
@@ -0,0 +1,6 @@
+from . import controllers
+from . import models
+
+
+def _build_sales_rollup(env):
+    env['owl.sales.rollup']._rebuild()
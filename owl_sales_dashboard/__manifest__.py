@@ -20,8 +20,11 @@
     ],
     'data': [
         'security/ir.model.access.csv',
+        'security/owl_sales_rollup_security.xml',
+        'data/ir_cron_data.xml',
         'views/dashboard_menu.xml',
     ],
+    'post_init_hook': '_build_sales_rollup',
     'assets': {
         'web.assets_backend': [
             'owl_sales_dashboard/static/src/css/dashboard.css',
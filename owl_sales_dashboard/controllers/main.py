@@ -0,0 +1,14 @@
+from odoo import http
+from odoo.http import request
+
+
+class OwlSalesDashboardController(http.Controller):
+    @http.route('/owl_sales_dashboard/data', type='json', auth='user', methods=['POST'])
+    def get_dashboard_data(self, date_from, date_to, team_ids=None, category_ids=None, limit=10, **params):
+        """
+        Every KPI and chart series of the dashboard, aggregated server side.
+        Series hold at most ``limit`` points, see get_dashboard_data.
+        """
+        return request.env['owl.sales.rollup'].get_dashboard_data(
+            date_from, date_to, team_ids=team_ids, category_ids=category_ids, limit=limit,
+        )
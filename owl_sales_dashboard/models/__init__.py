@@ -0,0 +1,2 @@
+from . import sales_rollup
+from . import sale_order
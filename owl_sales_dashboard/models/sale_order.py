@@ -0,0 +1,48 @@
+from odoo import models, api
+
+# Stored fields whose changes move an order between rollup rows or change
+# its amounts. Recomputed amounts are only written through _write.
+ROLLUP_ORDER_FIELDS = {'state', 'company_id', 'team_id', 'user_id', 'partner_id', 'amount_total'}
+ROLLUP_LINE_FIELDS = {'order_id', 'product_id', 'price_total'}
+
+
+class SaleOrder(models.Model):
+    _inherit = 'sale.order'
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        orders = super().create(vals_list)
+        self.env['owl.sales.rollup']._mark_dirty(orders)
+        return orders
+
+    def _write(self, vals):
+        if ROLLUP_ORDER_FIELDS.intersection(vals):
+            self.env['owl.sales.rollup']._mark_dirty(self)
+        return super()._write(vals)
+
+    def unlink(self):
+        self.env['owl.sales.rollup']._mark_dirty(self)
+        return super().unlink()
+
+
+class SaleOrderLine(models.Model):
+    _inherit = 'sale.order.line'
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        lines = super().create(vals_list)
+        self.env['owl.sales.rollup']._mark_dirty(lines.order_id)
+        return lines
+
+    def _write(self, vals):
+        if ROLLUP_LINE_FIELDS.intersection(vals):
+            self.env['owl.sales.rollup']._mark_dirty(self.order_id)
+        res = super()._write(vals)
+        if 'order_id' in vals:
+            # The order the lines move to changes too
+            self.env['owl.sales.rollup']._mark_dirty(self.order_id)
+        return res
+
+    def unlink(self):
+        self.env['owl.sales.rollup']._mark_dirty(self.order_id)
+        return super().unlink()
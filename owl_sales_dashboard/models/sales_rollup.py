@@ -0,0 +1,277 @@
+from odoo import models, fields, api
+from odoo.tools.misc import format_date
+import datetime
+import logging
+
+_logger = logging.getLogger(__name__)
+
+# Days changed by the transaction, queued when it commits
+DIRTY_DAYS_KEY = 'owl_sales_dashboard.rollup_days'
+# Queue of the days whose rows the rollup cron rebuilds
+DIRTY_DAYS_TABLE = 'owl_sales_rollup_dirty_day'
+
+ROLLUP_STATES = ('draft', 'sent', 'sale', 'done')
+ORDER_STATES = ('sale', 'done')
+
+# Points a chart series may hold, whatever the caller asks for
+MAX_SERIES_LIMIT = 50
+MONTHLY_POINTS = 12
+
+
+class OwlSalesRollup(models.Model):
+    """Daily sales totals read by the dashboard instead of the sale orders.
+
+    Order rows hold the orders of a day per kind, company, sales team,
+    salesperson and customer. Line rows, which have a product, hold the
+    order line amounts per product and product category. The days of
+    changed orders are queued and rebuilt by a cron every minute, so order
+    edits never contend on the rollup rows.
+    """
+    _name = 'owl.sales.rollup'
+    _description = 'Sales Dashboard Daily Rollup'
+    _log_access = False
+    _order = 'date desc'
+
+    date = fields.Date(string='Day', required=True, index=True)
+    kind = fields.Selection([
+        ('quotation', 'Quotation'),
+        ('order', 'Sales Order'),
+    ], string='Kind', required=True)
+    company_id = fields.Many2one('res.company', string='Company', required=True, index=True)
+    team_id = fields.Many2one('crm.team', string='Sales Team')
+    user_id = fields.Many2one('res.users', string='Salesperson')
+    partner_id = fields.Many2one('res.partner', string='Customer')
+    categ_id = fields.Many2one('product.category', string='Product Category')
+    product_id = fields.Many2one('product.product', string='Product')
+    order_count = fields.Integer(string='Orders')
+    amount_total = fields.Float(string='Total')
+    line_amount = fields.Float(string='Line Total')
+
+    def init(self):
+        super().init()
+        self.env.cr.execute(f"""
+            CREATE TABLE IF NOT EXISTS {DIRTY_DAYS_TABLE} (date date PRIMARY KEY)
+        """)
+
+    @api.model
+    def _mark_dirty(self, orders):
+        """Queue the days of ``orders`` for the rollup cron when the transaction commits"""
+        data = self.env.cr.precommit.data
+        if DIRTY_DAYS_KEY not in data:
+            data[DIRTY_DAYS_KEY] = set()
+            self.env.cr.precommit.add(self._flush_dirty_days)
+        data[DIRTY_DAYS_KEY].update(
+            order.create_date.date() for order in orders.sudo() if order.create_date
+        )
+
+    def _flush_dirty_days(self):
+        days = self.env.cr.precommit.data.pop(DIRTY_DAYS_KEY, set())
+        if days:
+            # Only inserted at commit, so concurrent edits of a day barely wait
+            self.env.cr.execute(f"""
+                INSERT INTO {DIRTY_DAYS_TABLE} (date) SELECT unnest(%s::date[])
+                ON CONFLICT (date) DO NOTHING
+            """, [sorted(days)])
+
+    @api.model
+    def _cron_rebuild_dirty_days(self):
+        """Rebuild the queued days. Days queued by transactions this one
+        does not see are left in the queue for the next run."""
+        self.env.cr.execute(f"DELETE FROM {DIRTY_DAYS_TABLE} RETURNING date")
+        days = {row[0] for row in self.env.cr.fetchall()}
+        if days:
+            self._rebuild(days)
+
+    @api.model
+    def _rebuild(self, days=None):
+        """Recompute the rows of ``days`` from the sale orders, every day when None"""
+        cr = self.env.cr
+        where, params = "so.state IN %s", [ROLLUP_STATES]
+        if days is None:
+            cr.execute("DELETE FROM owl_sales_rollup")
+        else:
+            days = sorted(days)
+            where += " AND so.create_date >= %s AND so.create_date < %s AND so.create_date::date = ANY(%s)"
+            params += [days[0], days[-1] + datetime.timedelta(days=1), days]
+            cr.execute("DELETE FROM owl_sales_rollup WHERE date = ANY(%s)", [days])
+
+        kind = "CASE WHEN so.state IN ('sale', 'done') THEN 'order' ELSE 'quotation' END"
+        cr.execute(f"""
+            INSERT INTO owl_sales_rollup (date, kind, company_id, team_id, user_id, partner_id,
+                                          order_count, amount_total, line_amount)
+                 SELECT so.create_date::date, {kind}, so.company_id, so.team_id, so.user_id, so.partner_id,
+                        count(*), sum(so.amount_total), 0
+                   FROM sale_order so
+                  WHERE {where}
+               GROUP BY 1, 2, 3, 4, 5, 6
+        """, params)
+        order_rows = cr.rowcount
+        cr.execute(f"""
+            INSERT INTO owl_sales_rollup (date, kind, company_id, team_id, user_id, categ_id, product_id,
+                                          order_count, amount_total, line_amount)
+                 SELECT so.create_date::date, {kind}, so.company_id, so.team_id, so.user_id,
+                        pt.categ_id, sol.product_id, count(DISTINCT so.id), 0, sum(sol.price_total)
+                   FROM sale_order_line sol
+                   JOIN sale_order so ON so.id = sol.order_id
+                   JOIN product_product pp ON pp.id = sol.product_id
+                   JOIN product_template pt ON pt.id = pp.product_tmpl_id
+                  WHERE {where}
+               GROUP BY 1, 2, 3, 4, 5, 6, 7
+        """, params)
+        _logger.info(
+            "Rebuilt sales rollup of %s: %s order rows, %s line rows",
+            'every day' if days is None else f'{len(days)} days', order_rows, cr.rowcount,
+        )
+        self.env.invalidate_all()
+
+    @api.model
+    def _cron_rebuild(self):
+        # Also catches changes the order hooks do not see, e.g. a product
+        # moved to another category
+        self.env.cr.execute(f"DELETE FROM {DIRTY_DAYS_TABLE}")
+        self._rebuild()
+
+    @api.model
+    def get_dashboard_data(self, date_from, date_to, team_ids=None, category_ids=None, limit=10):
+        """Every KPI and chart series of the sales dashboard for a period.
+
+        Dates are inclusive; percentages compare with the period of the
+        same length just before ``date_from``. With ``category_ids`` only the
+        orders holding a product of those categories count.
+
+        The response is bounded: series hold at most ``limit`` points
+        (capped at MAX_SERIES_LIMIT), the monthly one MONTHLY_POINTS, and
+        ``truncated`` names the series that had more.
+        """
+        date_from = fields.Date.to_date(date_from)
+        date_to = fields.Date.to_date(date_to)
+        limit = max(1, min(int(limit or 10), MAX_SERIES_LIMIT))
+        periods = {
+            'current': (date_from, date_to),
+            'previous': (date_from - (date_to - date_from) - datetime.timedelta(days=1),
+                         date_from - datetime.timedelta(days=1)),
+        }
+        if category_ids:
+            totals, groups = self._read_category_orders(periods, team_ids, category_ids, limit)
+        else:
+            totals, groups = self._read_rollup(periods, team_ids, limit)
+
+        def total(kind, period):
+            return totals.get((kind, period), (0, 0.0))
+
+        def percentage(current, previous):
+            return round((current - previous) / previous * 100, 2) if previous else 0
+
+        def average(kind, period):
+            count, amount = total(kind, period)
+            return amount / count if count else 0.0
+
+        order_count, revenue = total('order', 'current')
+        previous_count, previous_revenue = total('order', 'previous')
+        quotation_count = total('quotation', 'current')[0]
+        sizes = {name: MONTHLY_POINTS if name == 'monthly_sales' else limit for name in groups}
+        data = {
+            'quotations': {
+                'value': quotation_count,
+                'percentage': percentage(quotation_count, total('quotation', 'previous')[0]),
+            },
+            'orders': {
+                'value': order_count,
+                'percentage': percentage(order_count, previous_count),
+                'revenue': revenue,
+                'revenue_percentage': percentage(revenue, previous_revenue),
+                'average': average('order', 'current'),
+                'average_percentage': percentage(average('order', 'current'), average('order', 'previous')),
+            },
+            'limit': limit,
+            'truncated': sorted(name for name, points in groups.items() if len(points) > sizes[name]),
+        }
+        for name, points in groups.items():
+            data[name] = [
+                {'label': self._format_series_key(key), 'value': value}
+                for key, value in points[:sizes[name]]
+            ]
+        # Months are read newest first to keep the latest ones
+        data['monthly_sales'].reverse()
+        return data
+
+    def _read_rollup(self, periods, team_ids, limit):
+        """Period totals {(kind, period): (count, amount)} and chart groups
+        of the current period, read from the rollup rows"""
+        filters = [('team_id', 'in', team_ids)] if team_ids else []
+        order_rows = [('product_id', '=', False)]
+        totals = {}
+        for period, (start, end) in periods.items():
+            for kind, count, amount in self._read_group(
+                [('date', '>=', start), ('date', '<=', end)] + filters + order_rows,
+                ['kind'], ['order_count:sum', 'amount_total:sum'],
+            ):
+                totals[kind, period] = (count, amount)
+
+        start, end = periods['current']
+        orders = [('date', '>=', start), ('date', '<=', end), ('kind', '=', 'order')] + filters
+        return totals, {
+            'top_products': self._read_top(
+                orders + [('product_id', '!=', False)], 'product_id', 'line_amount', limit),
+            'top_sales_people': self._read_top(
+                orders + order_rows + [('user_id', '!=', False)], 'user_id', 'amount_total', limit),
+            'partner_orders': self._read_top(
+                orders + order_rows + [('partner_id', '!=', False)], 'partner_id', 'amount_total', limit),
+            'monthly_sales': self._read_group(
+                orders + order_rows, ['date:month'], ['amount_total:sum'],
+                order='date:month desc', limit=MONTHLY_POINTS + 1,
+            ),
+        }
+
+    def _read_category_orders(self, periods, team_ids, category_ids, limit):
+        """Same as _read_rollup for the orders holding a product of
+        ``category_ids``, aggregated from the sale orders themselves"""
+        SaleOrder = self.env['sale.order']
+
+        def order_domain(start, end):
+            domain = [
+                ('state', 'in', ROLLUP_STATES),
+                ('create_date', '>=', datetime.datetime.combine(start, datetime.time.min)),
+                ('create_date', '<', datetime.datetime.combine(end + datetime.timedelta(days=1), datetime.time.min)),
+                # Semi-join on the order lines, the orders are never listed
+                ('order_line', 'any', [('product_id.categ_id', 'in', category_ids)]),
+            ]
+            if team_ids:
+                domain.append(('team_id', 'in', team_ids))
+            return domain
+
+        totals = {}
+        for period, (start, end) in periods.items():
+            for state, count, amount in SaleOrder._read_group(
+                order_domain(start, end), ['state'], ['__count', 'amount_total:sum'],
+            ):
+                kind = 'order' if state in ORDER_STATES else 'quotation'
+                kind_count, kind_amount = totals.get((kind, period), (0, 0.0))
+                totals[kind, period] = (kind_count + count, kind_amount + amount)
+
+        orders = order_domain(*periods['current']) + [('state', 'in', ORDER_STATES)]
+        return totals, {
+            'top_products': self._read_top(
+                [('order_id', 'any', orders), ('product_id', '!=', False)], 'product_id', 'price_total', limit,
+                model=self.env['sale.order.line']),
+            'top_sales_people': self._read_top(
+                orders + [('user_id', '!=', False)], 'user_id', 'amount_total', limit, model=SaleOrder),
+            'partner_orders': self._read_top(
+                orders + [('partner_id', '!=', False)], 'partner_id', 'amount_total', limit, model=SaleOrder),
+            'monthly_sales': SaleOrder._read_group(
+                orders, ['create_date:month'], ['amount_total:sum'],
+                order='create_date:month desc', limit=MONTHLY_POINTS + 1,
+            ),
+        }
+
+    def _read_top(self, domain, groupby, measure, limit, model=None):
+        """Largest ``measure`` sums per ``groupby`` of the rollup, or of ``model``"""
+        # One group more than shown, telling whether the series is truncated
+        return (self if model is None else model)._read_group(
+            domain, [groupby], [f'{measure}:sum'], order=f'{measure}:sum desc', limit=limit + 1,
+        )
+
+    def _format_series_key(self, key):
+        if isinstance(key, datetime.date):
+            return format_date(self.env, key, date_format='MMMM yyyy')
+        return key.display_name